@@ -0,0 +1 @@
+"""Cash register benchmarks."""
@@ -0,0 +1,145 @@
+"""
+ASGI load test.
+
+Sends the same requests to one process served through ``main.wsgi``, one
+request at a time like a sync worker, and through ``main.asgi`` with many
+requests in flight on a single event loop, then prints the requests per
+second of each. Every query sleeps ``latency`` milliseconds first to stand
+in for the network round trip to a database server, which is the time a
+sync worker spends blocked. Run it from the project root:
+
+    python -m benchmarks.asgi [current-state|payments|status] [requests] [concurrency] [latency ms]
+"""
+
+# Utils
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, random_payments, setup_django, wsgi_request
+
+
+def add_latency(latency):
+    """Make every query of every connection wait ``latency`` seconds."""
+    from django.db.backends.signals import connection_created
+
+    def wait(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if wait not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wait)
+
+    connection_created.connect(install, weak=False)
+    return wait
+
+
+def requests_for(endpoint, count):
+    """Return ``count`` ``(method, path, body)`` requests to an endpoint."""
+    from django.urls import reverse
+
+    from cash_register.models import CurrencyDenomination
+
+    if endpoint == "payments":
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        return [("POST", reverse("payments-list"), json.dumps(payment).encode())
+                for payment in random_payments(denominations, count)]
+    name = "current-state" if endpoint == "current-state" else "check-status"
+    return [("GET", reverse(name), b"")] * count
+
+
+async def asgi_request(application, method, path, body):
+    """Serve a request through an ASGI application, return its status."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    statuses = []
+    done = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client stays connected until the response is sent.
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await application({
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }, receive, send)
+    done.set()
+    return statuses[0]
+
+
+def run_wsgi(requests):
+    """Serve the requests one at a time, return elapsed time and failures."""
+    from main.wsgi import application
+
+    started = time.perf_counter()
+    statuses = [wsgi_request(application, *request) for request in requests]
+    return time.perf_counter() - started, failures(statuses)
+
+
+def run_asgi(requests, concurrency):
+    """Serve the requests ``concurrency`` at a time on one event loop."""
+    from main.asgi import application
+
+    async def serve():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(request):
+            async with semaphore:
+                return await asgi_request(application, *request)
+
+        return await asyncio.gather(*map(limited, requests))
+
+    started = time.perf_counter()
+    statuses = asyncio.run(serve())
+    return time.perf_counter() - started, failures(statuses)
+
+
+def failures(statuses):
+    """Return how many responses were not successful."""
+    return sum(1 for status in statuses if status >= 300)
+
+
+def main(endpoint="current-state", count=500, concurrency=50, latency=2):
+    setup_django()
+    from django.db import connection
+
+    # Worker threads can not share an in-memory database.
+    with benchmark_database(on_disk=True):
+        requests = requests_for(endpoint, count)
+        add_latency(latency / 1000)
+        print(f"{connection.vendor}: {count} x {endpoint}, "
+              f"{latency} ms per query")
+        # Warm up imports and caches outside the measurement.
+        run_wsgi(requests[:5])
+        run_asgi(requests[:5], concurrency)
+        for mode, (elapsed, failed) in (
+            ("wsgi, 1 at a time", run_wsgi(requests)),
+            (f"asgi, {concurrency} in flight",
+             run_asgi(requests, concurrency)),
+        ):
+            print(f"{mode:>20}: {count / elapsed:7.0f} requests/s  "
+                  f"failed: {failed}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *map(int, sys.argv[2:]))
@@ -0,0 +1,60 @@
+"""
+Payment replay benchmark.
+
+Compares replaying queued payments one request at a time against
+``POST /api/payments/`` with sending them in one
+``POST /api/payments/batch/``. Run it from the project root:
+
+    python -m benchmarks.batch [payments]
+"""
+
+# Utils
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, random_payments, setup_django
+
+
+def main(count=200):
+    setup_django()
+    from django.test import Client
+    from django.urls import reverse
+
+    from cash_register.models import CurrencyDenomination
+
+    with benchmark_database():
+        client = Client()
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        payments = random_payments(denominations, count)
+        # Warm up imports and caches outside the measurement.
+        client.post(reverse("payments-list"),
+                    payments[0],
+                    content_type="application/json")
+        client.post(reverse("payments-batch"),
+                    payments[:1],
+                    content_type="application/json")
+
+        started = time.perf_counter()
+        for payment in payments:
+            response = client.post(reverse("payments-list"),
+                                   payment,
+                                   content_type="application/json")
+            assert response.status_code == 201, response.content
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post(reverse("payments-batch"),
+                               payments,
+                               content_type="application/json")
+        batch = time.perf_counter() - started
+        assert all(result["status"] == 201 for result in response.json())
+
+    print(f"payments: {count}")
+    print(f"one request per payment: {count / single:.0f} payments/s")
+    print(f"single batch request: {count / batch:.0f} payments/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
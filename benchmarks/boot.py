@@ -0,0 +1,122 @@
+"""
+Server boot benchmark.
+
+Starts the API the way the previous entrypoint did (``migrate``, both
+``loaddata`` fixtures and ``runserver``) and with the production launch
+mode of ``scripts/entrypoint.sh`` (gunicorn, see ``gunicorn.conf.py``),
+against the same already migrated SQLite database. Prints the cold start
+time, until the first successful response, and the steady-state requests
+per second of ``GET /api/available-cash/current-state/``. Run it from the
+project root:
+
+    python -m benchmarks.boot [seconds] [clients]
+"""
+
+# Utils
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PORT = 8765
+URL = f"http://127.0.0.1:{PORT}/api/available-cash/current-state/"
+
+PREVIOUS_ENTRYPOINT = (
+    "python manage.py migrate && "
+    "python manage.py loaddata currency_denomination_fixtures && "
+    "python manage.py loaddata available_cash_fixtures && "
+    f"exec python manage.py runserver 127.0.0.1:{PORT}")
+PRODUCTION_ENTRYPOINT = "exec sh scripts/entrypoint.sh"
+
+
+def environment(database):
+    """Return the environment of a server using ``database``."""
+    return dict(os.environ,
+                DJANGO_SETTINGS_MODULE="main.settings.production",
+                SECRET_KEY="benchmark",
+                DEBUG="False",
+                ALLOWED_HOSTS="*",
+                DBENGINE="django.db.backends.sqlite3",
+                DBNAME=database,
+                SERVER_MODE="production",
+                GUNICORN_BIND=f"127.0.0.1:{PORT}",
+                PYTHONWARNINGS="ignore")
+
+
+def migrated_database():
+    """Return the path of a new migrated and seeded SQLite database."""
+    database = os.path.join(tempfile.mkdtemp(), "boot.sqlite3")
+    for command in ("migrate", "seed"):
+        subprocess.run([sys.executable, "manage.py", command, "-v", "0"],
+                       env=environment(database),
+                       check=True,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+    return database
+
+
+def wait_until_up(timeout=60):
+    """Poll the API until it answers, return False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urlopen(URL, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (URLError, ConnectionError, OSError):
+            time.sleep(0.02)
+    return False
+
+
+def requests_per_second(seconds, clients):
+    """Send requests from ``clients`` threads for ``seconds``."""
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        served = 0
+        while time.perf_counter() < deadline:
+            with urlopen(URL, timeout=10) as response:
+                response.read()
+            served += 1
+        return served
+
+    with ThreadPoolExecutor(clients) as executor:
+        served = sum(executor.map(lambda _: client(), range(clients)))
+    return served / seconds
+
+
+def measure(name, command, database, seconds, clients):
+    """Boot a server with ``command`` and print its measurements."""
+    started = time.perf_counter()
+    server = subprocess.Popen(["sh", "-c", command],
+                              env=environment(database),
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    try:
+        if not wait_until_up():
+            print(f"{name}: did not start")
+            return
+        cold_start = time.perf_counter() - started
+        requests_per_second(1, clients)
+        throughput = requests_per_second(seconds, clients)
+        print(f"{name:>10}: cold start {cold_start:5.2f} s  "
+              f"{throughput:6.0f} requests/s")
+    finally:
+        os.killpg(server.pid, 15)
+        server.wait()
+
+
+def main(seconds=5, clients=8):
+    database = migrated_database()
+    print(f"{os.cpu_count()} CPUs, {clients} clients, {seconds} s")
+    measure("runserver", PREVIOUS_ENTRYPOINT, database, seconds, clients)
+    measure("gunicorn", PRODUCTION_ENTRYPOINT, database, seconds, clients)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
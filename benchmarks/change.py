@@ -0,0 +1,78 @@
+"""
+Change-making engine microbenchmark.
+
+Times ``make_change`` against the denominations in the currency fixtures,
+then the worst case: amounts the stock can not return, with thousands of
+pieces of every denomination but a single 200 piece. Run it from the
+project root:
+
+    python -m benchmarks.change
+"""
+
+# Utils
+import json
+import os
+import random
+import timeit
+
+# Change engine
+from cash_register.change import make_change
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                       "cash_register", "fixtures",
+                       "currency_denomination_fixtures.json")
+
+
+def load_denominations():
+    """Return the fixture denominations, largest first."""
+    with open(FIXTURE) as fixture:
+        return sorted((row["fields"]["currency_type"]
+                       for row in json.load(fixture)),
+                      reverse=True)
+
+
+def scenarios(denominations, samples=1000, seed=0):
+    """Yield random ``(amount, stock)`` pairs on a 50 pesos grid."""
+    generator = random.Random(seed)
+    for _ in range(samples):
+        stock = {
+            denomination: generator.randint(0, 30)
+            for denomination in denominations
+        }
+        yield generator.randrange(0, 400000, 50), stock
+
+
+def main():
+    denominations = load_denominations()
+    timings = []
+    missing = 0
+    for amount, stock in scenarios(denominations):
+        runs = 20
+        elapsed = min(
+            timeit.repeat(lambda: make_change(amount, stock),
+                          number=runs,
+                          repeat=3)) / runs
+        timings.append(elapsed * 1e6)
+        missing += make_change(amount, stock) is None
+    timings.sort()
+    print(f"denominations: {denominations}")
+    print(f"scenarios: {len(timings)} (missing change: {missing})")
+    print(f"mean: {sum(timings) / len(timings):.1f} us")
+    print(f"p50: {timings[len(timings) // 2]:.1f} us")
+    print(f"p99: {timings[int(len(timings) * 0.99)]:.1f} us")
+    print(f"max: {timings[-1]:.1f} us")
+
+    for pieces in (1000, 3000, 5000):
+        stock = {denomination: pieces for denomination in denominations}
+        stock.update({200: 1, 100: 0, 50: 0})
+        for amount in (100300, 1000300, 10000300):
+            elapsed = min(
+                timeit.repeat(lambda: make_change(amount, stock),
+                              number=5,
+                              repeat=3)) / 5
+            print(f"infeasible {amount} with {pieces} pieces: "
+                  f"{elapsed * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
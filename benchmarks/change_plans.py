@@ -0,0 +1,69 @@
+"""
+Change plan cache microbenchmark.
+
+Replays sales of a few hot prices paid with a few bills against a drawer
+stocked from the currency fixtures, moving the stock after every sale, and
+times the change calculation with ``make_change`` and through
+``ChangePlanCache``. Prints the mean time per sale and the hit ratio of the
+cache. Run it from the project root:
+
+    python -m benchmarks.change_plans [sales] [cache size]
+"""
+
+# Utils
+import random
+import sys
+import time
+
+# Change engine
+from cash_register.change import ChangePlanCache, make_change
+
+from benchmarks.change import load_denominations
+
+PRICES = (1200, 2500, 3800, 4500, 7900, 12300, 15800, 24900, 36500, 48700)
+BILLS = (2000, 5000, 10000, 20000, 50000)
+
+
+def sales(count, seed=0):
+    """Return ``count`` ``(paid bill, change)`` sales of the hot prices."""
+    generator = random.Random(seed)
+    result = []
+    for _ in range(count):
+        price = generator.choice(PRICES)
+        bill = generator.choice([bill for bill in BILLS if bill >= price] or
+                                [max(BILLS)])
+        paid = -(-price // bill) * bill
+        result.append((bill, paid // bill, paid - price))
+    return result
+
+
+def replay(calculate, denominations, sales):
+    """Return the seconds spent calculating the change of every sale."""
+    stock = {denomination: 30 for denomination in denominations}
+    elapsed = 0
+    for bill, quantity, change in sales:
+        started = time.perf_counter()
+        plan = calculate(change, stock)
+        elapsed += time.perf_counter() - started
+        stock[bill] = stock.get(bill, 0) + quantity
+        for denomination, pieces in plan or ():
+            stock[denomination] -= pieces
+    return elapsed
+
+
+def main(count=20000, size=4096):
+    denominations = load_denominations()
+    replayed = sales(count)
+    cache = ChangePlanCache(size)
+    print(f"{count} sales of {len(PRICES)} prices, cache size {size}")
+    for name, calculate in (("make_change", make_change),
+                            ("ChangePlanCache", cache.make_change)):
+        elapsed = replay(calculate, denominations, replayed)
+        print(f"{name:>16}: {elapsed / count * 1e6:6.1f} us per sale")
+    stats = cache.stats()
+    print(f"hits: {stats['hits']}  misses: {stats['misses']}  "
+          f"hit ratio: {stats['hit_ratio']:.1%}  size: {stats['size']}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""
+Database connection benchmark.
+
+Sends ``POST /api/payments/`` requests one at a time through
+``main.wsgi``, opening a new database connection for every request
+(``CONN_MAX_AGE=0``) and then reusing it (``CONN_MAX_AGE=60``), and prints
+the p50 and p99 latency of each. Every new connection first waits
+``connect`` milliseconds to stand in for the TCP and authentication
+handshake of a database server. Run it from the project root, on Postgres
+with the DB* variables of the .env file, through PgBouncer with
+``DBPOOLMODE=pgbouncer``:
+
+    python -m benchmarks.connections [payments] [connect ms]
+"""
+
+# Utils
+import json
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, percentile, random_payments, setup_django, wsgi_request
+
+
+def add_connect_latency(latency):
+    """Make every new connection wait ``latency`` seconds."""
+    from django.db.backends.signals import connection_created
+
+    def wait(sender, connection, **kwargs):
+        time.sleep(latency)
+
+    connection_created.connect(wait, weak=False)
+
+
+def latencies(payments, conn_max_age):
+    """Return the sorted latencies in ms of posting ``payments``."""
+    from django.db import connection
+    from django.urls import reverse
+
+    from main.wsgi import application
+
+    connection.close()
+    connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    url = reverse("payments-list")
+    timings = []
+    for payment in payments:
+        body = json.dumps(payment).encode()
+        started = time.perf_counter()
+        status = wsgi_request(application, "POST", url, body)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert status == 201, status
+    return sorted(timings)
+
+
+def main(count=500, connect=5):
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+
+    from cash_register.models import CurrencyDenomination
+
+    # SQLite never closes in-memory connections.
+    with benchmark_database(on_disk=True):
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        payments = random_payments(denominations, count + 20)
+        add_connect_latency(connect / 1000)
+        pool_mode = settings.DB_POOL_MODE or "none"
+        print(f"{connection.vendor}: {count} payments, pool mode {pool_mode}, "
+              f"{connect} ms per new connection")
+        modes = [("new connection per request", 0),
+                 ("persistent connection", 60)]
+        for name, conn_max_age in modes:
+            latencies(payments[:20], conn_max_age)
+            timings = latencies(payments[20:], conn_max_age)
+            print(f"{name:>26}: p50 {percentile(timings, 0.5):6.2f} ms  "
+                  f"p99 {percentile(timings, 0.99):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
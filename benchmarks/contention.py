@@ -0,0 +1,93 @@
+"""
+Drawer contention benchmark.
+
+Runs payment threads against ``POST /api/payments/`` of a single register,
+once with optimistic updates of the available cash (``CASH_UPDATE_RETRIES``
+attempts before locking) and once locking the drawer rows in currency
+order on every payment (``CASH_UPDATE_RETRIES=0``). Prints the payments per
+second of each mode and checks that no update was lost: the money in the
+drawer must have grown by every amount paid.
+
+SQLite locks the whole database on every write, so the difference between
+the modes only shows on Postgres (``DB*`` variables of the .env file). Run
+it from the project root:
+
+    python -m benchmarks.contention [threads] [payments]
+"""
+
+# Utils
+from concurrent.futures import ThreadPoolExecutor
+import json
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, random_payments, setup_django, wsgi_request
+
+
+def drawer_total():
+    """Money in the drawer, added up from its rows."""
+    from cash_register.models import AvailableCash
+
+    return sum(currency_type * quantity
+               for currency_type, quantity in AvailableCash.objects.
+               values_list("currency_type", "quantity"))
+
+
+def run(application, payments, threads):
+    """Post the payments ``threads`` at a time, return seconds and statuses."""
+    from django.db import connections
+
+    def pay(payment):
+        try:
+            return wsgi_request(application, "POST", "/api/payments/",
+                                json.dumps(payment).encode())
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(threads) as executor:
+        started = time.perf_counter()
+        statuses = list(executor.map(pay, payments))
+        elapsed = time.perf_counter() - started
+    return elapsed, statuses
+
+
+def main(threads=8, count=400):
+    setup_django()
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import override_settings
+
+    from cash_register.metrics import CASH_UPDATE_CONFLICTS
+    from cash_register.models import CurrencyDenomination
+
+    application = WSGIHandler()
+    with benchmark_database(on_disk=True):
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        payments = random_payments(denominations, count)
+        # Warm up imports and caches outside the measurement.
+        run(application, payments[:threads], threads)
+
+        for mode, retries in (("locked", 0), ("optimistic", 3)):
+            conflicts = sum(
+                CASH_UPDATE_CONFLICTS.value(reason)
+                for reason in ("stock_changed", "deadlock"))
+            total = drawer_total()
+            with override_settings(CASH_UPDATE_RETRIES=retries):
+                elapsed, statuses = run(application, payments, threads)
+            created = [
+                payment for payment, status in zip(payments, statuses)
+                if status == 201
+            ]
+            lost = (total + sum(payment["amount"] for payment in created) -
+                    drawer_total())
+            retried = sum(
+                CASH_UPDATE_CONFLICTS.value(reason)
+                for reason in ("stock_changed", "deadlock")) - conflicts
+            print(f"{mode}: {len(created) / elapsed:.0f} payments/s, "
+                  f"{count - len(created)} failed, {retried} retried, "
+                  f"{lost} lost")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
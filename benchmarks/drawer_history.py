@@ -0,0 +1,92 @@
+"""
+Drawer history benchmark.
+
+Generates ``writes`` changes of the default drawer over a year, two
+denomination events each, with a snapshot every
+``DRAWER_SNAPSHOT_INTERVAL`` versions, then times rebuilding the drawer at
+random dates from the nearest snapshot and from the first event. Run it
+from the project root:
+
+    python -m benchmarks.drawer_history [writes] [dates]
+"""
+
+# Utils
+from datetime import datetime, timedelta, timezone
+import random
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, setup_django
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=365)
+
+
+def generate_history(register_id, denominations, writes, interval, seed=0):
+    """Insert the events and snapshots of ``writes`` drawer changes."""
+    from cash_register.models import DrawerEvent, DrawerSnapshot
+
+    generator = random.Random(seed)
+    quantities = {denomination: 1000 for denomination in denominations}
+    events, snapshots = [], []
+    for version in range(1, writes + 1):
+        created_at = START + SPAN * version / writes
+        paid, returned = generator.sample(denominations, 2)
+        for currency_type, delta in ((paid, 1), (returned, -1)):
+            quantities[currency_type] += delta
+            events.append(
+                DrawerEvent(register_id=register_id,
+                            version=version,
+                            currency_type=currency_type,
+                            delta=delta,
+                            created_at=created_at))
+        if version % interval == 0:
+            snapshots.append(
+                DrawerSnapshot(register_id=register_id,
+                               version=version,
+                               quantities={
+                                   str(currency_type): quantity
+                                   for currency_type, quantity in
+                                   quantities.items()
+                               },
+                               created_at=created_at))
+    DrawerEvent.objects.bulk_create(events, batch_size=5000)
+    DrawerSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+def mean_rebuild(register_id, dates):
+    """Return the mean ms to rebuild the drawer at each date."""
+    from cash_register.models import DrawerEvent
+
+    started = time.perf_counter()
+    for date in dates:
+        DrawerEvent.objects.state_at(register_id, date)
+    return (time.perf_counter() - started) / len(dates) * 1000
+
+
+def main(writes=200000, count=50):
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+
+    from cash_register.models import DEFAULT_REGISTER_ID, CurrencyDenomination, DrawerSnapshot
+
+    with benchmark_database():
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        interval = settings.DRAWER_SNAPSHOT_INTERVAL
+        generate_history(DEFAULT_REGISTER_ID, denominations, writes, interval)
+        generator = random.Random(1)
+        dates = [START + SPAN * generator.random() for _ in range(count)]
+        print(f"{connection.vendor}: {writes} writes, snapshot every "
+              f"{interval} versions, {count} dates")
+        with_snapshots = mean_rebuild(DEFAULT_REGISTER_ID, dates)
+        DrawerSnapshot.objects.all().delete()
+        from_events = mean_rebuild(DEFAULT_REGISTER_ID, dates)
+        print(f"{'nearest snapshot':>17}: {with_snapshots:8.2f} ms")
+        print(f"{'every event':>17}: {from_events:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""
+Idempotency key benchmark.
+
+Posts payments with an ``Idempotency-Key`` to ``POST /api/payments/``
+through ``main.wsgi``, then retries each of them answered from the
+in-memory LRU and from the ``IdempotencyKey`` table, and prints the p50
+and p99 latency of each. Run it from the project root:
+
+    python -m benchmarks.idempotency [payments]
+"""
+
+# Utils
+import json
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, percentile, random_payments, setup_django, wsgi_request
+
+
+def latencies(application, url, payments, before=None):
+    """Return the sorted latencies in ms of posting keyed ``payments``."""
+    timings = []
+    for key, payment in enumerate(payments):
+        if before is not None:
+            before()
+        body = json.dumps(payment).encode()
+        started = time.perf_counter()
+        status = wsgi_request(application, "POST", url, body,
+                              HTTP_IDEMPOTENCY_KEY=f"sale-{key}")
+        timings.append((time.perf_counter() - started) * 1000)
+        assert status == 201, status
+    return sorted(timings)
+
+
+def main(count=500):
+    setup_django()
+    from django.db import connection
+    from django.urls import reverse
+
+    from cash_register.idempotency import idempotency_cache
+    from cash_register.models import CurrencyDenomination
+    from main.wsgi import application
+
+    with benchmark_database():
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        payments = random_payments(denominations, count)
+        url = reverse("payments-list")
+        print(f"{connection.vendor}: {count} payments")
+        for name, before in (
+            ("first request", None),
+            ("retry from memory", None),
+            ("retry from database", idempotency_cache.clear),
+        ):
+            timings = latencies(application, url, payments, before)
+            print(f"{name:>20}: p50 {percentile(timings, 0.5):6.2f} ms  "
+                  f"p99 {percentile(timings, 0.99):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
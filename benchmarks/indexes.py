@@ -0,0 +1,154 @@
+"""
+Report index benchmark.
+
+Fills the transaction log and payment tables with generated rows, then
+prints the query plan and timing of the reporting queries without and
+with the report indexes added by ``0008_report_indexes``. Runs against the configured
+database engine (SQLite by default, Postgres with the DB* variables of the
+.env file). Run it from the project root:
+
+    python -m benchmarks.indexes [logs]
+"""
+
+# Utils
+from datetime import datetime, timedelta, timezone
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, setup_django
+
+REPORT_INDEXES = ("payment_created_idx", "transactionlog_report_idx")
+BATCH_SIZE = 50000
+START = datetime(2021, 1, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=5 * 365)
+
+
+def generate_rows(count):
+    """
+    Insert ``count`` transaction logs and ``count // 2`` payments spread
+    evenly over five years.
+    """
+    from django.db import connection, transaction
+
+    from cash_register.models import DEFAULT_REGISTER_ID, Payment, TransactionLog
+    from cash_register.partitions import create_partitions
+
+    # Monthly partitions on Postgres instead of the default one.
+    create_partitions(start=START)
+    adapt = connection.ops.adapt_datetimefield_value
+    step = SPAN / count
+    log_sql = (f"INSERT INTO {TransactionLog._meta.db_table} "
+               "(register_id, transaction_type, amount, balance, created_at) "
+               "VALUES (%s, %s, %s, %s, %s)")
+    payment_sql = (f"INSERT INTO {Payment._meta.db_table} "
+                   "(register_id, amount, total_payment, created_at) "
+                   "VALUES (%s, %s, %s, %s)")
+    balance = 0
+    for start in range(0, count, BATCH_SIZE):
+        logs = []
+        payments = []
+        for index in range(start, min(start + BATCH_SIZE, count)):
+            created_at = adapt(START + step * index)
+            amount = 1000 + index % 97 * 500
+            if index % 2:
+                balance -= amount
+                logs.append((DEFAULT_REGISTER_ID, "outcome", amount, balance,
+                             created_at))
+            else:
+                balance += amount
+                logs.append((DEFAULT_REGISTER_ID, "income", amount, balance,
+                             created_at))
+                payments.append(
+                    (DEFAULT_REGISTER_ID, amount, amount, created_at))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(log_sql, logs)
+            cursor.executemany(payment_sql, payments)
+
+
+def report_queries():
+    """Return the reporting querysets to explain, by name."""
+    from django.db.models import Sum
+
+    from cash_register.models import DEFAULT_REGISTER_ID, Payment, TransactionLog
+
+    date = START + SPAN / 2
+    month = (date, date + timedelta(days=30))
+    logs = TransactionLog.objects.filter(register_id=DEFAULT_REGISTER_ID)
+    return {
+        "cash_history balance":
+        logs.filter(created_at__lte=date).order_by(
+            "-created_at", "-id").values_list("balance")[:1],
+        "monthly totals by type":
+        logs.filter(created_at__range=month).values(
+            "transaction_type").annotate(total=Sum("amount")).order_by(),
+        "monthly income total":
+        logs.filter(
+            created_at__range=month,
+            transaction_type="income").values("transaction_type").annotate(
+                total=Sum("amount")).order_by(),
+        "monthly payments":
+        Payment.objects.filter(register_id=DEFAULT_REGISTER_ID,
+                               created_at__range=month).values_list("id"),
+    }
+
+
+def explain_queries(title):
+    """Print the plan and best timing of every reporting query."""
+    from django.db import connection
+
+    analyze = {"analyze": True} if connection.vendor == "postgresql" else {}
+    print(f"== {title} ==")
+    for name, queryset in report_queries().items():
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - started)
+        print(f"-- {name}: {min(timings) * 1000:.2f} ms")
+        print(queryset.explain(**analyze))
+
+
+def report_indexes():
+    """Yield the ``(model, index)`` pairs of the report indexes."""
+    from cash_register.models import Payment, TransactionLog
+
+    for model in (Payment, TransactionLog):
+        for index in model._meta.indexes:
+            if index.name in REPORT_INDEXES:
+                yield model, index
+
+
+def analyze():
+    """Refresh the planner statistics."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def main(count=10_000_000):
+    setup_django()
+    from django.db import connection
+
+    with benchmark_database():
+        with connection.schema_editor() as schema_editor:
+            for model, index in report_indexes():
+                schema_editor.remove_index(model, index)
+        started = time.perf_counter()
+        generate_rows(count)
+        print(f"{connection.vendor}: generated {count} logs in "
+              f"{time.perf_counter() - started:.1f} s")
+        analyze()
+        explain_queries("without report indexes")
+
+        started = time.perf_counter()
+        with connection.schema_editor() as schema_editor:
+            for model, index in report_indexes():
+                schema_editor.add_index(model, index)
+        analyze()
+        print(f"indexes built in {time.perf_counter() - started:.1f} s")
+        explain_queries("with report indexes")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
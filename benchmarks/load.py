@@ -0,0 +1,247 @@
+"""
+Load test of the cash register API.
+
+Drives ``POST /api/payments/``, ``GET /api/available-cash/current-state/``,
+``GET /api/available-cash/empty/`` and ``POST /api/logs/search-date/``
+over HTTP at each of the given concurrencies, and prints the throughput,
+the p50/p95/p99 latency and the queries per request of every endpoint.
+Queries are read from the ``X-Query-Count`` header the server sends with
+``QUERYCOUNTHEADER=True``.
+
+Unless ``--url`` points at a running server, it boots the production
+launch mode (gunicorn, see ``gunicorn.conf.py``) on a new SQLite database
+seeded from the fixtures. The drawer is restocked through the API before
+every run so payments always find change. Run it from the project root:
+
+    python -m benchmarks.load [--endpoints payments,current-state,...]
+        [--requests 500] [--concurrency 1,8] [--json results.json]
+        [--url http://host:port]
+
+Save the JSON report of two commits and compare them with:
+
+    python -m benchmarks.load --compare before.json after.json
+"""
+
+# Utils
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.boot import environment, migrated_database
+from benchmarks.utils import percentile, random_payments
+
+ENDPOINTS = ("payments", "current-state", "empty", "search-date")
+PORT = 8766
+# Pieces of every denomination put back before each run.
+STOCK = 10000
+
+
+def request(base_url, method, path, body=None):
+    """
+    Send a request, return its status, latency in ms, query count and
+    decoded body.
+    """
+    data = None if body is None else json.dumps(body).encode()
+    http_request = Request(base_url + path,
+                           data=data,
+                           method=method,
+                           headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urlopen(http_request, timeout=30) as response:
+            status, headers, content = (response.status, response.headers,
+                                        response.read())
+    except HTTPError as error:
+        status, headers, content = error.code, error.headers, error.read()
+    latency = (time.perf_counter() - started) * 1000
+    queries = headers.get("X-Query-Count")
+    return (status, latency, None if queries is None else int(queries),
+            content)
+
+
+def restock(base_url):
+    """Set every denomination of the drawer to ``STOCK`` pieces."""
+    _, _, _, content = request(base_url, "GET",
+                               "/api/available-cash/current-state/")
+    denominations = json.loads(content)["denominations"]
+    for row in denominations:
+        request(base_url, "PATCH", f"/api/available-cash/{row['id']}/",
+                {"quantity": STOCK})
+    return [row["currency_type"] for row in denominations]
+
+
+def endpoint_requests(endpoint, count, denominations):
+    """Return ``count`` ``(method, path, body)`` requests to an endpoint."""
+    if endpoint == "payments":
+        return [("POST", "/api/payments/", payment)
+                for payment in random_payments(denominations, count)]
+    if endpoint == "search-date":
+        date = datetime.now(timezone.utc).isoformat()
+        return [("POST", "/api/logs/search-date/", {"date": date})] * count
+    if endpoint == "empty":
+        return [("GET", "/api/available-cash/empty/", None)] * count
+    return [("GET", "/api/available-cash/current-state/", None)] * count
+
+
+def run(base_url, requests, concurrency):
+    """Send the requests ``concurrency`` at a time, return the results."""
+    with ThreadPoolExecutor(concurrency) as executor:
+        started = time.perf_counter()
+        results = list(
+            executor.map(lambda item: request(base_url, *item)[:3],
+                         requests))
+        elapsed = time.perf_counter() - started
+    return elapsed, results
+
+
+def report(endpoint, concurrency, elapsed, results):
+    """Return the measurements of a run."""
+    latencies = sorted(latency for _, latency, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "failures": sum(1 for status, _, _ in results if status >= 300),
+        "throughput": round(len(results) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "queries_per_request":
+        round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def git_commit():
+    """Return the current commit, None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True,
+                              text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server():
+    """Boot gunicorn on a new seeded database, return the process."""
+    env = dict(environment(migrated_database()),
+               GUNICORN_BIND=f"127.0.0.1:{PORT}",
+               QUERYCOUNTHEADER="True")
+    server = subprocess.Popen(["sh", "scripts/entrypoint.sh"],
+                              env=env,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    base_url = f"http://127.0.0.1:{PORT}"
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        try:
+            if request(base_url, "GET", "/api/status/")[0] == 200:
+                return server
+        except OSError:
+            time.sleep(0.05)
+    os.killpg(server.pid, 15)
+    raise RuntimeError("The server did not start.")
+
+
+def print_report(runs):
+    """Print the measurements of every run as a table."""
+    print(f"{'endpoint':>14} {'conc':>5} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'failed':>7}")
+    for run_report in runs:
+        queries = run_report["queries_per_request"]
+        print(f"{run_report['endpoint']:>14} {run_report['concurrency']:>5} "
+              f"{run_report['throughput']:>8.1f} {run_report['p50_ms']:>8.2f} "
+              f"{run_report['p95_ms']:>8.2f} {run_report['p99_ms']:>8.2f} "
+              f"{'-' if queries is None else queries:>8} "
+              f"{run_report['failures']:>7}")
+
+
+def compare(before_path, after_path):
+    """Print the change of every measurement between two JSON reports."""
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f"{before['commit']} -> {after['commit']}")
+    previous = {(run_report["endpoint"], run_report["concurrency"]): run_report
+                for run_report in before["runs"]}
+    for run_report in after["runs"]:
+        old = previous.get((run_report["endpoint"], run_report["concurrency"]))
+        if old is None:
+            continue
+        changes = []
+        for field in ("throughput", "p50_ms", "p95_ms", "p99_ms",
+                      "queries_per_request"):
+            if old[field] and run_report[field] is not None:
+                change = (run_report[field] - old[field]) / old[field]
+                changes.append(f"{field} {old[field]} -> "
+                               f"{run_report[field]} ({change:+.0%})")
+        print(f"{run_report['endpoint']} x{run_report['concurrency']}: "
+              + ", ".join(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the API.")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", default="1,8")
+    parser.add_argument("--json", help="Write the report to this file.")
+    parser.add_argument("--url", help="Base url of a running server.")
+    parser.add_argument("--compare",
+                        nargs=2,
+                        metavar=("BEFORE", "AFTER"),
+                        help="Compare two JSON reports.")
+    args = parser.parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    endpoints = args.endpoints.split(",")
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints {sorted(unknown)}, "
+                     f"use {list(ENDPOINTS)}")
+    concurrencies = [int(value) for value in args.concurrency.split(",")]
+
+    server = None if args.url else start_server()
+    base_url = (args.url or f"http://127.0.0.1:{PORT}").rstrip("/")
+    runs = []
+    try:
+        for endpoint in endpoints:
+            for concurrency in concurrencies:
+                denominations = restock(base_url)
+                requests = endpoint_requests(endpoint, args.requests,
+                                             denominations)
+                # Warm up the workers outside the measurement.
+                run(base_url, requests[:concurrency], concurrency)
+                elapsed, results = run(base_url, requests, concurrency)
+                runs.append(report(endpoint, concurrency, elapsed, results))
+    finally:
+        if server is not None:
+            os.killpg(server.pid, 15)
+            server.wait()
+
+    print_report(runs)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({
+                "commit": git_commit(),
+                "date": datetime.now(timezone.utc).isoformat(),
+                "cpus": os.cpu_count(),
+                "python": platform.python_version(),
+                "url": args.url,
+                "requests": args.requests,
+                "runs": runs
+            }, output, indent=2)
+            output.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""
+Metrics middleware overhead benchmark.
+
+Serves ``GET /api/available-cash/current-state/`` through the WSGI handler
+with and without ``MetricsMiddleware`` and prints the mean latency of
+each. It also times ``MetricsMiddleware.record`` alone, the cost the
+middleware adds to every request, and a scrape of ``GET /api/metrics``. Run it from the project
+root:
+
+    python -m benchmarks.metrics [requests]
+"""
+
+# Utils
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, setup_django, wsgi_request
+
+METRICS_MIDDLEWARE = "cash_register.middleware.MetricsMiddleware"
+
+
+def mean_latency(application, url, count):
+    """Return the mean latency in us of ``count`` GET requests."""
+    started = time.perf_counter()
+    for _ in range(count):
+        status = wsgi_request(application, "GET", url, b"")
+        assert status == 200, status
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def record_latency(count):
+    """Return the mean time in us of recording the metrics of a request."""
+    from types import SimpleNamespace
+
+    from cash_register.middleware import MetricsMiddleware, QueryCounter
+
+    middleware = MetricsMiddleware(lambda request: None)
+    request = SimpleNamespace(
+        method="GET",
+        resolver_match=SimpleNamespace(route="api/benchmark/"),
+        query_counter=QueryCounter())
+    response = SimpleNamespace(status_code=200)
+    started = time.perf_counter()
+    for _ in range(count):
+        middleware.record(request, response, 0.002)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main(count=5000):
+    setup_django()
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import override_settings
+    from django.urls import reverse
+
+    with override_settings(MIDDLEWARE=[
+            middleware for middleware in settings.MIDDLEWARE
+            if middleware != METRICS_MIDDLEWARE
+    ]):
+        without_metrics = WSGIHandler()
+    with_metrics = WSGIHandler()
+
+    with benchmark_database():
+        url = reverse("current-state")
+        print(f"{count} requests to {url}")
+        # Warm up both handlers and the cash register cache.
+        for application in (without_metrics, with_metrics):
+            mean_latency(application, url, 100)
+        for _ in range(2):
+            for name, application in (("without metrics", without_metrics),
+                                      ("with metrics", with_metrics)):
+                print(f"{name:>16}: "
+                      f"{mean_latency(application, url, count):7.1f} us")
+        print(f"{'record':>16}: {record_latency(count * 10):7.1f} us")
+        started = time.perf_counter()
+        wsgi_request(with_metrics, "GET", reverse("metrics"), b"")
+        print(f"{'scrape':>16}: "
+              f"{(time.perf_counter() - started) * 1e6:7.1f} us")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
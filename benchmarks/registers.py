@@ -0,0 +1,125 @@
+"""
+Register concurrency benchmark.
+
+Runs the same number of payment workers per register against
+``POST /api/registers/<id>/payments/`` for 1, 2, 4 and 8 registers and
+prints the payments per second of each run. Workers are separate
+processes, like the workers of the application server, so the only thing
+they share is the database: with one lock per register, throughput should
+grow with the number of registers until the database itself saturates.
+
+SQLite locks the whole database on every write, so the lock per register
+only shows on Postgres (``DB*`` variables of the .env file). Run it from
+the project root:
+
+    python -m benchmarks.registers [workers per register] [seconds]
+"""
+
+# Utils
+import multiprocessing
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, random_payments, setup_django
+
+REGISTER_COUNTS = (1, 2, 4, 8)
+
+
+def create_registers(count):
+    """Create ``count`` registers stocked like the default register."""
+    from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, Register
+
+    stock = list(
+        AvailableCash.objects.filter(register_id=DEFAULT_REGISTER_ID).values_list(
+            "currency_type", "quantity"))
+    registers = [DEFAULT_REGISTER_ID]
+    for index in range(1, count):
+        register = Register.objects.create(name=f"Benchmark {index}")
+        AvailableCash.objects.bulk_create([
+            AvailableCash(register=register,
+                          currency_type_id=currency_type,
+                          quantity=quantity)
+            for currency_type, quantity in stock
+        ])
+        registers.append(register.id)
+    return registers
+
+
+def pay(register_id, payments, deadline, results):
+    """Post payments to a register until the deadline."""
+    from django.db import connections
+    from django.test import Client
+    from django.urls import reverse
+
+    # Never share the parent connection with a forked worker.
+    connections.close_all()
+    client = Client()
+    url = reverse("register-payments-list",
+                  kwargs={"register_id": register_id})
+    created = failed = 0
+    while time.perf_counter() < deadline:
+        try:
+            response = client.post(url,
+                                   payments[(created + failed) % len(payments)],
+                                   content_type="application/json")
+        except Exception:
+            failed += 1
+            continue
+        if response.status_code == 201:
+            created += 1
+        else:
+            failed += 1
+    connections.close_all()
+    results.put((created, failed))
+
+
+def run(registers, workers, seconds, payments):
+    """Return created and failed payments of a run over ``registers``."""
+    from django.db import connections
+
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    deadline = time.perf_counter() + seconds
+    processes = [
+        context.Process(target=pay,
+                        args=(register_id, payments, deadline, results))
+        for register_id in registers for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(created for created, _ in totals), sum(
+        failed for _, failed in totals)
+
+
+def main(workers=2, seconds=5):
+    setup_django()
+    from django.db import connection
+
+    from cash_register.models import CurrencyDenomination
+
+    # Worker processes can not share an in-memory database.
+    with benchmark_database(on_disk=True):
+        denominations = list(
+            CurrencyDenomination.objects.values_list("currency_type",
+                                                     flat=True))
+        payments = random_payments(denominations, 500)
+        registers = create_registers(max(REGISTER_COUNTS))
+        print(f"{connection.vendor}: {workers} workers per register, "
+              f"{seconds} s per run")
+        baseline = None
+        for count in REGISTER_COUNTS:
+            created, failed = run(registers[:count], workers, seconds,
+                                  payments)
+            throughput = created / seconds
+            baseline = baseline or throughput
+            print(f"registers: {count:2d}  payments/s: {throughput:7.0f}  "
+                  f"speedup: {throughput / baseline:4.1f}x  "
+                  f"failed: {failed}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
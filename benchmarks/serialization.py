@@ -0,0 +1,91 @@
+"""
+Serialization benchmark.
+
+Times serializing and rendering ``rows`` transaction logs (10000 by
+default) like ``GET /api/logs/`` does: with the model serializer and
+JSONRenderer, with the plain dict serializer and JSONRenderer, and with
+the plain dict serializer and FastJSONRenderer. Then times parsing the
+same number of payment bodies with JSONParser and FastJSONParser. Runs
+without a database. Run it from the project root:
+
+    python -m benchmarks.serialization [rows]
+"""
+
+# Utils
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+import json
+import sys
+import time
+
+from benchmarks.utils import random_payments, setup_django
+
+START = datetime(2021, 1, 1, tzinfo=timezone.utc)
+DENOMINATIONS = (100000, 50000, 20000, 10000, 5000, 1000, 500, 200, 100, 50)
+
+
+def transaction_logs(count):
+    """Return ``count`` unsaved transaction logs."""
+    from cash_register.models import TransactionLog
+
+    return [
+        TransactionLog(id=index + 1,
+                       register_id=1,
+                       transaction_type="income" if index % 3 else "outcome",
+                       amount=1000 + index % 97 * 50,
+                       balance=index * 1000,
+                       created_at=START + timedelta(seconds=index))
+        for index in range(count)
+    ]
+
+
+def best_of(function, repeat=5):
+    """Return the best time in ms of calling ``function``."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main(count=10000):
+    setup_django()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from cash_register import renderers
+    from cash_register.parsers import FastJSONParser
+    from cash_register.renderers import FastJSONRenderer
+    from cash_register.serializers import TransactionLogReadSerializer, TransactionLogSerializer
+
+    logs = transaction_logs(count)
+    backend = "orjson" if renderers.orjson is not None else "stdlib"
+    print(f"{count} transaction logs, FastJSONRenderer backend: {backend}")
+    for name, serializer_class, renderer in (
+        ("ModelSerializer + JSONRenderer", TransactionLogSerializer,
+         JSONRenderer()),
+        ("plain dicts + JSONRenderer", TransactionLogReadSerializer,
+         JSONRenderer()),
+        ("plain dicts + FastJSONRenderer", TransactionLogReadSerializer,
+         FastJSONRenderer()),
+    ):
+        serialize = best_of(lambda: serializer_class(logs, many=True).data)
+        data = serializer_class(logs, many=True).data
+        render = best_of(lambda: renderer.render(data))
+        print(f"{name:>31}: serialize {serialize:7.1f} ms  "
+              f"render {render:6.1f} ms  total {serialize + render:7.1f} ms")
+
+    bodies = [
+        json.dumps(payment).encode()
+        for payment in random_payments(DENOMINATIONS, count)
+    ]
+    for name, parser in (("JSONParser", JSONParser()),
+                         ("FastJSONParser", FastJSONParser())):
+        parse = best_of(
+            lambda: [parser.parse(BytesIO(body)) for body in bodies])
+        print(f"{name:>31}: parse {count} payments {parse:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
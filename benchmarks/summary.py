@@ -0,0 +1,94 @@
+"""
+Transaction summary benchmark.
+
+Fills the transaction log and payment tables with generated rows over five
+years (see ``benchmarks.indexes``), rebuilds the summaries and times a one
+month daily report three ways: summing every log of the month in Python,
+grouping the logs by day in the database, and reading the daily summaries
+like ``GET /api/logs/summary/``. Run it from the project root:
+
+    python -m benchmarks.summary [logs]
+"""
+
+# Utils
+from collections import defaultdict
+from datetime import timedelta
+import sys
+import time
+
+from benchmarks.indexes import SPAN, START, generate_rows
+from benchmarks.utils import benchmark_database, setup_django
+
+
+def python_report(month):
+    """Sum the logs of the month per day in Python."""
+    from django.utils import timezone
+
+    from cash_register.models import DEFAULT_REGISTER_ID, TransactionLog
+
+    days = defaultdict(lambda: {"income": 0, "outcome": 0})
+    for log in TransactionLog.objects.filter(register_id=DEFAULT_REGISTER_ID,
+                                             created_at__range=month):
+        day = timezone.localtime(log.created_at).date()
+        days[day][log.transaction_type] += log.amount
+    return len(days)
+
+
+def database_report(month):
+    """Group the logs of the month per day in the database."""
+    from django.db.models import Q, Sum
+    from django.db.models.functions import Trunc
+
+    from cash_register.models import DEFAULT_REGISTER_ID, TransactionLog
+
+    return len(
+        TransactionLog.objects.filter(
+            register_id=DEFAULT_REGISTER_ID,
+            created_at__range=month).annotate(
+                period=Trunc("created_at", "day")).values("period").annotate(
+                    income=Sum("amount", filter=Q(transaction_type="income")),
+                    outcome=Sum("amount",
+                                filter=Q(transaction_type="outcome"))).order_by())
+
+
+def summary_report(month):
+    """Read the daily summaries of the month."""
+    from cash_register.models import DEFAULT_REGISTER_ID, TransactionSummary, period_start
+    from cash_register.serializers import TransactionSummarySerializer
+
+    summaries = TransactionSummary.objects.filter(
+        register_id=DEFAULT_REGISTER_ID,
+        granularity="day",
+        period_start__gte=period_start(month[0], "day"),
+        period_start__lte=month[1]).order_by("period_start")
+    return len(TransactionSummarySerializer(summaries, many=True).data)
+
+
+def main(count=1000000):
+    setup_django()
+    from django.db import connection, transaction
+
+    from cash_register.models import DEFAULT_REGISTER_ID, TransactionSummary
+
+    with benchmark_database():
+        generate_rows(count)
+        started = time.perf_counter()
+        with transaction.atomic():
+            summaries = TransactionSummary.objects.rebuild(DEFAULT_REGISTER_ID)
+        print(f"{connection.vendor}: {count} logs, {summaries} summaries "
+              f"rebuilt in {time.perf_counter() - started:.1f} s")
+        date = START + SPAN / 2
+        month = (date, date + timedelta(days=30))
+        for name, report in (("logs summed in python", python_report),
+                             ("logs grouped in database", database_report),
+                             ("daily summaries", summary_report)):
+            # Warm up imports and caches outside the measurement.
+            report(month)
+            started = time.perf_counter()
+            days = report(month)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{name:>25}: {elapsed:8.1f} ms  ({days} days)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
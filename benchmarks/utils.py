@@ -0,0 +1,105 @@
+"""Benchmark helpers."""
+
+# Utils
+from contextlib import contextmanager
+from wsgiref.util import setup_testing_defaults
+import io
+import os
+import random
+import tempfile
+
+
+def setup_django():
+    """Configure Django so benchmarks can use the ORM and test client."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings.develop")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALLOWED_HOSTS", "*")
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database(stock=10**6, on_disk=False):
+    """
+    Create a throwaway test database seeded from the fixtures, with every
+    denomination stocked with ``stock`` pieces.
+
+    SQLite test databases live in memory unless ``on_disk`` is set, which
+    benchmarks running several threads or processes need.
+    """
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from cash_register.models import AvailableCash
+
+    if on_disk and connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tempfile.mkdtemp(), "benchmark.sqlite3")
+    setup_test_environment(debug=False)
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        call_command("loaddata",
+                     "currency_denomination_fixtures",
+                     "available_cash_fixtures",
+                     verbosity=0)
+        AvailableCash.objects.update(quantity=stock)
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def random_payments(denominations, count, seed=0):
+    """
+    Return ``count`` random payments in the API format, paid with the
+    largest bills first until the amount is covered.
+    """
+    generator = random.Random(seed)
+    bills = sorted(denominations, reverse=True)
+    payments = []
+    for _ in range(count):
+        amount = generator.randrange(1000, 200000, 50)
+        payment_form = []
+        remaining = amount
+        for bill in bills:
+            quantity = remaining // bill
+            if quantity:
+                payment_form.append({
+                    "currency_type": bill,
+                    "quantity": quantity
+                })
+                remaining -= quantity * bill
+        if remaining:
+            payment_form.append({"currency_type": bills[0], "quantity": 1})
+        payments.append({"amount": amount, "payment_form": payment_form})
+    return payments
+
+
+def percentile(values, fraction):
+    """Return the ``fraction`` percentile of sorted ``values``."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def wsgi_request(application, method, path, body, **extra):
+    """
+    Serve a request through a WSGI application, return its status.
+    ``extra`` adds WSGI environ keys, e.g. ``HTTP_IDEMPOTENCY_KEY``.
+    """
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update({
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }, **extra)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    b"".join(application(environ, start_response))
+    return statuses[0]
@@ -0,0 +1,88 @@
+"""
+Payment validation microbenchmark.
+
+Validates ``payments`` random payments (see ``benchmarks.utils``) the way
+``POST /api/payments/`` did before, with a payment serializer and a payment
+form serializer checking the denominations with a query, and with
+``validate_payment`` against the denominations kept in memory. Prints the
+mean time and queries per payment. Run it from the project root:
+
+    python -m benchmarks.validation [payments]
+"""
+
+# Utils
+import sys
+import time
+
+from benchmarks.utils import benchmark_database, random_payments, setup_django
+
+
+def serializer_classes():
+    """Return the serializers the payments were validated with before."""
+    from rest_framework import serializers
+
+    from cash_register.models import CurrencyDenomination, PaymentForm
+    from cash_register.serializers import PaymentSerializer
+
+    class PaymentFormListSerializer(serializers.ListSerializer):
+        def validate(self, attrs):
+            denominations = {line["currency_type"] for line in attrs}
+            known = CurrencyDenomination.objects.filter(
+                currency_type__in=denominations).values_list(
+                    "currency_type", flat=True)
+            unknown = denominations.difference(known)
+            if unknown:
+                raise serializers.ValidationError(
+                    f"Unknown currency types: {sorted(unknown)}")
+            return attrs
+
+    class PaymentFormSerializer(serializers.ModelSerializer):
+        currency_type = serializers.IntegerField()
+
+        class Meta:
+            model = PaymentForm
+            fields = ["currency_type", "quantity"]
+            list_serializer_class = PaymentFormListSerializer
+
+    return PaymentSerializer, PaymentFormSerializer
+
+
+def measure(validate, payments):
+    """Return the mean us and queries of validating every payment."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for payment in payments:
+            validate(payment)
+        elapsed = time.perf_counter() - started
+    return elapsed / len(payments) * 1e6, len(queries) / len(payments)
+
+
+def main(count=5000):
+    setup_django()
+    from cash_register.denominations import denomination_registry
+    from cash_register.validation import validate_payment
+
+    payment_serializer, payment_form_serializer = serializer_classes()
+
+    def with_serializers(payment):
+        payment = dict(payment, total_payment=payment["amount"])
+        assert payment_serializer(data=payment).is_valid()
+        assert payment_form_serializer(data=payment["payment_form"],
+                                       many=True).is_valid()
+
+    with benchmark_database():
+        payments = random_payments(denomination_registry.refresh().values,
+                                   count)
+        print(f"{count} payments")
+        for name, validate in (("serializers", with_serializers),
+                               ("validate_payment", validate_payment)):
+            elapsed, queries = measure(validate, payments)
+            print(f"{name:>17}: {elapsed:7.1f} us  {queries:.0f} queries "
+                  "per payment")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
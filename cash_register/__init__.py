@@ -0,0 +1 @@
+default_app_config = 'cash_register.apps.CashRegisterConfig'
@@ -1,6 +1,22 @@
 """Cash register app."""
+import django
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class CashRegisterConfig(AppConfig):
     name = 'cash_register'
+
+    def ready(self):
+        from .denominations import denomination_registry
+        for signal in (post_save, post_delete):
+            signal.connect(denomination_registry.clear,
+                           sender="cash_register.CurrencyDenomination",
+                           weak=False)
+        from .middleware import install_async_query_counter
+        connection_created.connect(install_async_query_counter)
+        if django.VERSION < (4, 1):
+            from .db import check_connections_health
+            request_started.connect(check_connections_health)
@@ -0,0 +1,274 @@
+"""Cash register state cache."""
+
+# Django
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+# Models
+from .models import Register
+
+# Utils
+from .change import ChangePlanCache
+from .metrics import registry
+import threading
+
+CASH_FIELDS = ("id", "currency_type", "quantity", "updated_at")
+
+
+def get_version(register_id):
+    """
+    Return the version counter of a register, None when the register does
+    not exist
+
+    ...
+    Params
+    - register_id: Register to retrieve the version of
+    """
+    return Register.objects.filter(pk=register_id).values_list(
+        "version", flat=True).first()
+
+
+def bump_version(register_id):
+    """
+    Increase the version counter of a register and return it.
+
+    Must run in the same transaction as the change of available cash it
+    tracks: the row lock taken by the update serializes concurrent writers
+    of the same register until commit, while other registers go on.
+
+    ...
+    Params
+    - register_id: Register whose available cash changes
+    """
+    updated = Register.objects.filter(pk=register_id).update(
+        version=F("version") + 1)
+    if not updated:
+        raise Register.DoesNotExist(f"Register {register_id} does not exist.")
+    return Register.objects.values_list("version",
+                                        flat=True).get(pk=register_id)
+
+
+def cash_row(available_cash):
+    """
+    Return the cached representation of an available cash instance
+
+    ...
+    Params
+    - available_cash: AvailableCash instance
+    """
+    return {
+        "id": available_cash.id,
+        "currency_type": available_cash.currency_type_id,
+        "quantity": available_cash.quantity,
+        "updated_at": available_cash.updated_at
+    }
+
+
+class CashRegisterState:
+    """
+    Read-only snapshot of the cash register
+
+    ...
+    Attributes:
+        version: Version counter the snapshot belongs to
+        cash: Mapping of denomination -> available cash row
+        quantities: Mapping of denomination -> available quantity
+        total_amount: Total amount of money in the cash register
+    """
+    __slots__ = ("version", "cash", "quantities", "total_amount")
+
+    def __init__(self, version, cash):
+        self.version = version
+        self.cash = cash
+        self.quantities = {
+            currency_type: row["quantity"]
+            for currency_type, row in cash.items()
+        }
+        self.total_amount = sum(
+            currency_type * quantity
+            for currency_type, quantity in self.quantities.items())
+
+    @property
+    def rows(self):
+        """Available cash rows sorted by id."""
+        return sorted(self.cash.values(), key=lambda row: row["id"])
+
+
+class CashRegisterCache:
+    """
+    Process-wide cache of the state of every register
+
+    Reads cost a single version lookup while the cached snapshot is up to
+    date. Writers bump the version of the register in their transaction and
+    update the snapshot write-through once it commits; any worker that sees
+    a different version reloads the snapshot.
+
+    ...
+    Methods:
+        get_state(): Retrieve the current state of a register
+        exists(): Check whether a register exists
+        write_through(): Update cached state after a committed change
+        clear(): Drop the cached states
+    """
+    def __init__(self):
+        self._states = {}
+        self._registers = set()
+        self._lock = threading.Lock()
+
+    def get_state(self, register_id):
+        """
+        This method retrieve the current state of a register, raising
+        Register.DoesNotExist when there is no such register
+
+        ...
+        Params
+        - register_id: Register to retrieve the state of
+        """
+        if connection.in_atomic_block:
+            # Uncommitted data must never be shared with other requests.
+            return CashRegisterState(None, self._load(register_id)[1])
+        version = get_version(register_id)
+        state = self._states.get(register_id)
+        if state is None or state.version != version:
+            # The version read with the rows, a change may commit between
+            # both queries.
+            version, cash = self._load(register_id)
+            state = CashRegisterState(version, cash)
+            with self._lock:
+                self._states[register_id] = state
+        return state
+
+    def exists(self, register_id):
+        """
+        This method check whether a register exists. Registers are never
+        deleted, so only the first check of each one runs a query.
+
+        ...
+        Params
+        - register_id: Register to look up
+        """
+        if register_id in self._registers:
+            return True
+        if not Register.objects.filter(pk=register_id).exists():
+            return False
+        with self._lock:
+            self._registers.add(register_id)
+        return True
+
+    def write_through(self,
+                      register_id,
+                      version,
+                      rows=None,
+                      deltas=None,
+                      zero=False,
+                      updated_at=None):
+        """
+        This method update the cached state once the current transaction
+        commits
+
+        ...
+        Params
+        - register_id: Register that changed
+        - version: Version returned by bump_version() for the change
+        - rows: Mapping of denomination -> new available cash row, None
+          when the denomination was removed
+        - deltas: Mapping of denomination -> quantity difference
+        - zero: Whether every denomination was emptied
+        - updated_at: Update date of the rows changed by deltas or zero
+        """
+        transaction.on_commit(lambda: self._apply(
+            register_id, version, rows or {}, deltas or {}, zero, updated_at))
+
+    def clear(self):
+        """
+        This method drop the cached states
+        """
+        with self._lock:
+            self._states = {}
+            self._registers = set()
+
+    def _apply(self, register_id, version, rows, deltas, zero, updated_at):
+        """
+        This private method apply a committed change to the cached state
+
+        ...
+        Params
+        - register_id: Register that changed
+        - version: Version of the change
+        - rows: Mapping of denomination -> new available cash row
+        - deltas: Mapping of denomination -> quantity difference
+        - zero: Whether every denomination was emptied
+        - updated_at: Update date of the rows changed by deltas or zero
+        """
+        with self._lock:
+            state = self._states.get(register_id)
+            # Another worker changed the register in between.
+            if state is None or state.version != version - 1 or any(
+                    currency_type not in state.cash and
+                    currency_type not in rows for currency_type in deltas):
+                self._states.pop(register_id, None)
+                return
+            cash = dict(state.cash)
+            if zero:
+                cash = {
+                    currency_type: dict(row, quantity=0, updated_at=updated_at)
+                    for currency_type, row in cash.items()
+                }
+            for currency_type, row in rows.items():
+                if row is None:
+                    cash.pop(currency_type, None)
+                else:
+                    cash[currency_type] = row
+            for currency_type, delta in deltas.items():
+                row = dict(cash[currency_type])
+                row["quantity"] += delta
+                row["updated_at"] = updated_at
+                cash[currency_type] = row
+            self._states[register_id] = CashRegisterState(version, cash)
+
+    def _load(self, register_id):
+        """
+        This private method load the version and the available cash rows of
+        a register from the database in a single statement, so both belong
+        to the same committed change. Raise Register.DoesNotExist when there
+        is no such register.
+
+        ...
+        Params
+        - register_id: Register to load
+        """
+        rows = list(
+            Register.objects.filter(pk=register_id).values_list(
+                "version", *(f"available_cash__{field}"
+                             for field in CASH_FIELDS)))
+        if not rows:
+            raise Register.DoesNotExist(
+                f"Register {register_id} does not exist.")
+        cash = {
+            row[2]: dict(zip(CASH_FIELDS, row[1:]))
+            for row in rows if row[1] is not None
+        }
+        return rows[0][0], cash
+
+
+cash_register_cache = CashRegisterCache()
+
+
+change_plan_cache = ChangePlanCache(settings.CHANGE_PLAN_CACHE_SIZE)
+
+
+@registry.register_callback
+def change_plan_metrics():
+    """
+    Return the counters of the change plan cache for /api/metrics
+    """
+    stats = change_plan_cache.stats()
+    return [
+        ("cash_register_change_plan_cache_hits_total", "counter",
+         "Change plans answered from the cache.", stats["hits"]),
+        ("cash_register_change_plan_cache_misses_total", "counter",
+         "Change plans computed.", stats["misses"]),
+        ("cash_register_change_plan_cache_size", "gauge",
+         "Change plans cached.", stats["size"]),
+    ]
@@ -0,0 +1,282 @@
+"""Cash register change-making engine.
+
+Pure module (no Django imports) so it can be imported, tested and
+benchmarked on its own.
+"""
+
+# Utils
+from collections import OrderedDict
+from math import gcd
+import threading
+
+_INFEASIBLE = float("inf")
+# Sub-problem lookups before the reachable amounts are worth building,
+# usual changes need less than a hundred.
+_REACHABLE_AFTER = 256
+
+
+class _SearchAgain(Exception):
+    """Raised once the reachable amounts are built to restart the search."""
+
+
+def make_change(amount, stock, denominations=None):
+    """
+    Find the combination of pieces that returns ``amount`` with the fewest
+    pieces, never using more pieces of a denomination than are in stock.
+
+    Branch and bound over the denomination counts, largest denomination
+    first, memoising the sub-problems already solved or proven infeasible
+    for a given piece budget. Unlike a greedy walk it does not get stuck
+    when limited stock forces skipping a large denomination
+    (e.g. 600 with 500x1 and 200x3). Searches that grow past the usual
+    size are pruned with the amounts each suffix of denominations can
+    return, so amounts the stock can not return are rejected at once.
+
+    ...
+    Params
+    - amount: Amount of money to be returned to the customer
+    - stock: Mapping of denomination -> available quantity
+    - denominations: Every denomination of the stock sorted from the
+      largest, spares sorting the stock on every call
+
+    Returns a list of ``(denomination, quantity)`` tuples sorted from the
+    largest denomination, or ``None`` when the change can not be made.
+    """
+    if amount < 0:
+        return None
+    if amount == 0:
+        return []
+
+    if denominations is None:
+        denominations = sorted(stock, reverse=True)
+    denominations = [
+        denomination for denomination in denominations
+        if 0 < denomination <= amount and stock.get(denomination, 0) > 0
+    ]
+    size = len(denominations)
+    quantities = [stock[denomination] for denomination in denominations]
+
+    # Suffix capacity and gcd let a sub-problem be discarded in O(1).
+    capacity = [0] * (size + 1)
+    divisor = [0] * (size + 1)
+    for index in range(size - 1, -1, -1):
+        capacity[index] = capacity[index + 1] + (denominations[index] *
+                                                 quantities[index])
+        divisor[index] = gcd(divisor[index + 1], denominations[index])
+
+    unit = divisor[0] if size else 1
+    # Amounts each suffix of denominations can return, built once the
+    # search gets large so it stops entering sub-problems that no piece
+    # budget solves (e.g. odd hundreds with a single 200 piece).
+    reachable = None
+    searches = 0
+
+    solved = {}
+    failed = {}
+
+    def search(index, remaining, budget):
+        """Fewest pieces to return ``remaining`` within ``budget`` pieces."""
+        nonlocal reachable, searches
+        searches += 1
+        if remaining == 0:
+            return 0
+        if index == size or budget <= 0:
+            return _INFEASIBLE
+        key = (index, remaining)
+        if key in solved:
+            pieces = solved[key][0]
+            return pieces if pieces <= budget else _INFEASIBLE
+        if failed.get(key, -1) >= budget:
+            return _INFEASIBLE
+        if remaining > capacity[index] or remaining % divisor[index]:
+            failed[key] = _INFEASIBLE
+            return _INFEASIBLE
+        if reachable is None and searches > _REACHABLE_AFTER:
+            reachable = _reachable_amounts(amount, denominations, quantities,
+                                           unit)
+            # Unwind so the loops in progress are pruned too.
+            raise _SearchAgain
+        if reachable is not None and not _is_reachable(reachable[index],
+                                                       remaining // unit):
+            failed[key] = _INFEASIBLE
+            return _INFEASIBLE
+
+        denomination = denominations[index]
+        following = denominations[index + 1] if index + 1 < size else 0
+        best, best_count = _INFEASIBLE, 0
+        for count in range(min(quantities[index], remaining // denomination),
+                           -1, -1):
+            limit = min(budget, best - 1)
+            rest = remaining - count * denomination
+            if rest and not following:
+                continue
+            # Fewer pieces of this denomination only leave more to return.
+            if rest > capacity[index + 1]:
+                break
+            # Fewer large pieces never means fewer pieces overall.
+            if following and count - (-rest // following) > limit:
+                break
+            pieces = search(index + 1, rest, limit - count)
+            if pieces != _INFEASIBLE:
+                best, best_count = count + pieces, count
+
+        if best == _INFEASIBLE:
+            failed[key] = budget
+        else:
+            solved[key] = (best, best_count)
+        return best
+
+    try:
+        pieces = search(0, amount, sum(quantities))
+    except _SearchAgain:
+        # Finished sub-problems stay memoised.
+        pieces = search(0, amount, sum(quantities))
+    if pieces == _INFEASIBLE:
+        return None
+
+    change = []
+    index, remaining = 0, amount
+    while remaining:
+        count = solved[(index, remaining)][1]
+        if count:
+            change.append((denominations[index], count))
+        remaining -= count * denominations[index]
+        index += 1
+    return change
+
+
+def _reachable_amounts(amount, denominations, quantities, unit):
+    """
+    Return, for every suffix of the denominations, the bitmap of the
+    amounts up to ``amount`` it can return, in multiples of ``unit``. A
+    bounded subset sum: each quantity is split in powers of two so a
+    denomination costs a logarithmic number of shifts.
+
+    ...
+    Params
+    - amount: Amount of money to be returned to the customer
+    - denominations: Denominations sorted from the largest
+    - quantities: Available quantity of each denomination
+    - unit: Greatest common divisor of the denominations
+    """
+    target = amount // unit
+    mask = (1 << (target + 1)) - 1
+    bits = 1
+    reachable = [None] * (len(denominations) + 1)
+    reachable[-1] = bits.to_bytes((target >> 3) + 1, "little")
+    for index in range(len(denominations) - 1, -1, -1):
+        step = denominations[index] // unit
+        left = min(quantities[index], target // step)
+        part = 1
+        while left:
+            taken = min(part, left)
+            bits |= (bits << (taken * step)) & mask
+            left -= taken
+            part <<= 1
+        reachable[index] = bits.to_bytes((target >> 3) + 1, "little")
+    return reachable
+
+
+def _is_reachable(bitmap, units):
+    """Return whether a bitmap of _reachable_amounts() has an amount."""
+    return bitmap[units >> 3] >> (units & 7) & 1
+
+
+def stock_version(amount, stock, denominations=None):
+    """
+    Return the version of the stock that matters to return ``amount``: the
+    quantity of every denomination up to ``amount``, capped at the pieces
+    the change could ever use. The fewest pieces plan of the capped stock is
+    also one of the full stock, so a sale that only moves pieces above the
+    cap keeps the cached plans of other amounts valid.
+
+    ...
+    Params
+    - amount: Amount of money to be returned to the customer
+    - stock: Mapping of denomination -> available quantity
+    - denominations: Every denomination of the stock sorted from the
+      largest, spares sorting the stock on every call
+    """
+    if denominations is None:
+        denominations = sorted(stock, reverse=True)
+    return tuple((denomination, min(stock[denomination], amount // denomination))
+                 for denomination in denominations
+                 if 0 < denomination <= amount and stock.get(denomination, 0) > 0)
+
+
+class ChangePlanCache:
+    """
+    Thread-safe LRU of change plans keyed on (change amount, stock
+    version), in front of ``make_change``. A change of stock gives the
+    affected amounts a new key, so their old plans are never returned again
+    and age out of the LRU.
+
+    ...
+    Methods:
+        make_change(): Retrieve or calculate the change plan of an amount
+        stats(): Hit and miss counters to size the cache
+        clear(): Drop every plan and reset the counters
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_change(self, amount, stock, denominations=None):
+        """
+        This method retrieve the change plan of an amount, calculating it
+        with ``make_change`` on a miss. Plans are tuples, shared by every
+        caller.
+
+        ...
+        Params
+        - amount: Amount of money to be returned to the customer
+        - stock: Mapping of denomination -> available quantity
+        - denominations: Every denomination of the stock sorted from the
+          largest
+        """
+        if amount <= 0 or self.max_size <= 0:
+            return make_change(amount, stock, denominations)
+        version = stock_version(amount, stock, denominations)
+        key = (amount, version)
+        with self._lock:
+            if key in self._plans:
+                self.hits += 1
+                self._plans.move_to_end(key)
+                return self._plans[key]
+            self.misses += 1
+        # Calculated from the version so the plan depends on the key only.
+        plan = make_change(amount, dict(version),
+                           [denomination for denomination, _ in version])
+        if plan is not None:
+            plan = tuple(plan)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self):
+        """
+        This method return the hit and miss counters of the cache
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._plans),
+                "max_size": self.max_size
+            }
+
+    def clear(self):
+        """
+        This method drop every plan and reset the counters
+        """
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,36 @@
+"""Cash register database connection helpers."""
+
+# Django
+from django.db import connections
+
+
+def check_connections_health(**kwargs):
+    """
+    Close the persistent connections that stopped working (e.g. after a
+    database restart) before a request reuses them, for the databases with
+    CONN_HEALTH_CHECKS enabled. Django >= 4.1 does it on its own.
+
+    Connected to the request_started signal by CashRegisterConfig.
+    """
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.settings_dict.get("CONN_HEALTH_CHECKS"):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def is_deadlock(error):
+    """
+    Return whether a database error rolled back a transaction to break a
+    deadlock, which is safe to run again
+
+    ...
+    Params
+    - error: DatabaseError raised by Django
+    """
+    cause = error.__cause__
+    # psycopg2 and psycopg 3 name the SQLSTATE differently.
+    code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+    return code == "40P01"
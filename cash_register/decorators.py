@@ -0,0 +1,18 @@
+"""Cash register decorators."""
+
+
+def query_budget(budget):
+    """
+    Declare the maximum number of queries a function view may run, checked
+    by QueryBudgetMiddleware. Viewsets declare a query_budgets mapping of
+    action -> budget instead.
+
+    ...
+    Params
+    - budget: Maximum number of queries per request
+    """
+    def decorator(view_func):
+        view_func.query_budget = budget
+        return view_func
+
+    return decorator
@@ -0,0 +1,143 @@
+"""Cash register denomination registry.
+
+Denominations almost never change once the fixtures are loaded, so every
+process keeps them in memory: the registry is loaded when the app is ready
+and dropped whenever a CurrencyDenomination is saved or deleted, to be
+reloaded on next use.
+"""
+
+# Django
+from django.db import DatabaseError, connection
+
+# Models
+from .models import CurrencyDenomination
+
+# Utils
+from types import MappingProxyType
+import threading
+
+
+class Denominations:
+    """
+    Immutable snapshot of the denominations
+
+    ...
+    Attributes:
+        ids: Read-only mapping of currency type -> CurrencyDenomination id
+        values: Currency types sorted from the largest
+    """
+    __slots__ = ("ids", "values")
+
+    def __init__(self, ids):
+        self.ids = MappingProxyType(dict(ids))
+        self.values = tuple(sorted(self.ids, reverse=True))
+
+    def __contains__(self, currency_type):
+        return currency_type in self.ids
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class DenominationRegistry:
+    """
+    Process-wide registry of the denominations
+
+    ...
+    Methods:
+        get(): Retrieve the current denominations
+        refresh(): Reload the denominations from the database
+        clear(): Drop the denominations, reloaded on next use
+        warm_up(): Load the denominations before a server forks
+        unknown(): Currency types that are not denominations
+        instance(): Unsaved CurrencyDenomination of a currency type
+    """
+    def __init__(self):
+        self._denominations = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        This method retrieve the current denominations, loaded on first use
+        """
+        denominations = self._denominations
+        if denominations is None:
+            denominations = self.refresh()
+        return denominations
+
+    def refresh(self):
+        """
+        This method reload the denominations from the database and return
+        them
+        """
+        denominations = Denominations(
+            CurrencyDenomination.objects.values_list("currency_type", "id"))
+        with self._lock:
+            self._denominations = denominations
+        return denominations
+
+    def clear(self, **kwargs):
+        """
+        This method drop the denominations, they are reloaded on next use.
+        Connected to the signals of CurrencyDenomination.
+        """
+        with self._lock:
+            self._denominations = None
+
+    def warm_up(self):
+        """
+        This method load the denominations once the app is loaded, called
+        by gunicorn before it forks its workers (see gunicorn.conf.py).
+        Skipped while the tables do not exist yet, e.g. before the first
+        migrate. The connection is closed so the forked workers never share
+        it.
+        """
+        try:
+            self.refresh()
+        except DatabaseError:
+            pass
+        finally:
+            connection.close()
+
+    def unknown(self, currency_types):
+        """
+        This method return the currency types that are not denominations. A
+        miss reloads the denominations once, so a denomination added by
+        another process is found.
+
+        ...
+        Params
+        - currency_types: Set of currency types to check
+        """
+        unknown = {
+            currency_type for currency_type in currency_types
+            if currency_type not in self.get()
+        }
+        if unknown:
+            denominations = self.refresh()
+            unknown = {
+                currency_type for currency_type in unknown
+                if currency_type not in denominations
+            }
+        return unknown
+
+    def instance(self, currency_type):
+        """
+        This method return an unsaved CurrencyDenomination of a currency
+        type to assign to foreign keys without a query, None when it is not
+        a denomination
+
+        ...
+        Params
+        - currency_type: Currency type
+        """
+        if self.unknown({currency_type}):
+            return None
+        return CurrencyDenomination(id=self.get().ids[currency_type],
+                                    currency_type=currency_type)
+
+
+denomination_registry = DenominationRegistry()
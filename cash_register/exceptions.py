@@ -0,0 +1,42 @@
+"""Cash register exceptions."""
+
+
+class MissingChangeError(Exception):
+    """
+    Raised when the cash register has not enough pieces to return the
+    change of a payment.
+
+    ...
+    Attributes:
+        amount: Change that could not be returned
+    """
+    def __init__(self, amount):
+        super().__init__(f"Sorry, Missing change for ${amount}")
+        self.amount = amount
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a request runs more queries than its view declared.
+    """
+
+
+class IdempotencyKeyReused(Exception):
+    """
+    Raised when an Idempotency-Key is sent again with a different request.
+
+    ...
+    Attributes:
+        key: Idempotency key sent
+    """
+    def __init__(self, key):
+        super().__init__(
+            f"Idempotency-Key {key} was already used with a different request.")
+        self.key = key
+
+
+class AppendOnlyError(Exception):
+    """
+    Raised when a transaction log is going to be updated or deleted, the
+    ledger only accepts new logs.
+    """
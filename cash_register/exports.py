@@ -0,0 +1,57 @@
+"""Cash register streaming exports."""
+
+# Django Rest Framework
+from rest_framework.fields import DateTimeField
+
+# Utils
+import csv
+import json
+
+TRANSACTION_LOG_FIELDS = ("id", "transaction_type", "amount", "balance",
+                          "created_at")
+
+
+class _EchoBuffer:
+    """File-like object handing back each written CSV line."""
+    def write(self, value):
+        return value
+
+
+def _log_values(rows):
+    """
+    Yield the transaction log values formatted like the API does
+
+    ...
+    Params
+    - rows: Iterable of transaction log dicts
+    """
+    date_field = DateTimeField()
+    for row in rows:
+        row["created_at"] = date_field.to_representation(row["created_at"])
+        yield row
+
+
+def transaction_logs_ndjson(rows):
+    """
+    Yield transaction logs as newline delimited JSON
+
+    ...
+    Params
+    - rows: Iterable of transaction log dicts
+    """
+    for row in _log_values(rows):
+        yield json.dumps(row) + "\n"
+
+
+def transaction_logs_csv(rows):
+    """
+    Yield transaction logs as CSV lines, header first
+
+    ...
+    Params
+    - rows: Iterable of transaction log dicts
+    """
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(TRANSACTION_LOG_FIELDS)
+    for row in _log_values(rows):
+        yield writer.writerow([row[field] for field in TRANSACTION_LOG_FIELDS])
@@ -0,0 +1,166 @@
+"""Cash register idempotency keys."""
+
+# Django
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+# Models
+from .models import IdempotencyKey
+
+# Exceptions
+from .exceptions import IdempotencyKeyReused
+
+# Utils
+from collections import OrderedDict
+from datetime import timedelta
+import hashlib
+import json
+import threading
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+STORED_FIELDS = ("id", "request_hash", "status_code", "response", "created_at")
+
+
+def request_hash(data):
+    """
+    Return the fingerprint of a request body, to tell a retry from another
+    request sent with the same key
+
+    ...
+    Params
+    - data: Parsed request body
+    """
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def is_expired(stored):
+    """
+    Return whether a stored response is older than IDEMPOTENCY_KEY_TTL
+
+    ...
+    Params
+    - stored: IdempotencyKey instance
+    """
+    ttl = timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    return stored.created_at < timezone.now() - ttl
+
+
+class IdempotencyCache:
+    """
+    Process-wide LRU of stored responses in front of the IdempotencyKey
+    table, so retries of recent payments are answered without any query.
+    Entries also expire with IDEMPOTENCY_KEY_TTL.
+
+    ...
+    Methods:
+        get(): Retrieve the stored response of a key
+        set(): Keep the stored response of a key
+        clear(): Drop every entry
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, register_id, key):
+        """
+        This method retrieve the stored response of a key, None when it is
+        not cached or expired
+
+        ...
+        Params
+        - register_id: Register the key was sent to
+        - key: Idempotency key
+        """
+        with self._lock:
+            stored = self._entries.get((register_id, key))
+            if stored is None:
+                return None
+            if is_expired(stored):
+                del self._entries[(register_id, key)]
+                return None
+            self._entries.move_to_end((register_id, key))
+            return stored
+
+    def set(self, register_id, key, stored):
+        """
+        This method keep the stored response of a key, evicting the least
+        recently used entries over max_size
+
+        ...
+        Params
+        - register_id: Register the key was sent to
+        - key: Idempotency key
+        - stored: IdempotencyKey instance
+        """
+        with self._lock:
+            self._entries[(register_id, key)] = stored
+            self._entries.move_to_end((register_id, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        This method drop every entry
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+idempotency_cache = IdempotencyCache(settings.IDEMPOTENCY_CACHE_SIZE)
+
+
+def get_stored_response(register_id, key, fingerprint):
+    """
+    Return the stored response of a key from memory or with one indexed
+    lookup, None when the key is new or expired. Raises
+    IdempotencyKeyReused when the key was stored for another request.
+
+    ...
+    Params
+    - register_id: Register the key was sent to
+    - key: Idempotency key
+    - fingerprint: request_hash() of the request body
+    """
+    stored = idempotency_cache.get(register_id, key)
+    if stored is None:
+        stored = IdempotencyKey.objects.filter(
+            register_id=register_id, key=key).only(*STORED_FIELDS).first()
+        if stored is None:
+            return None
+        if is_expired(stored):
+            # Not purged yet, free the key for this request.
+            stored.delete()
+            return None
+        idempotency_cache.set(register_id, key, stored)
+    if stored.request_hash != fingerprint:
+        raise IdempotencyKeyReused(key)
+    return stored
+
+
+def store_response(register_id, key, fingerprint, status_code, response):
+    """
+    Store the response of a key. Must run in the transaction of the request
+    so the response is only kept if it commits: a concurrent retry of the
+    same key waits on the unique index and then fails with IntegrityError.
+
+    ...
+    Params
+    - register_id: Register the key was sent to
+    - key: Idempotency key
+    - fingerprint: request_hash() of the request body
+    - status_code: Status code of the response
+    - response: Data of the response
+    """
+    stored = IdempotencyKey.objects.create(register_id=register_id,
+                                           key=key,
+                                           request_hash=fingerprint,
+                                           status_code=status_code,
+                                           response=response)
+    transaction.on_commit(
+        lambda: idempotency_cache.set(register_id, key, stored))
+    return stored
@@ -0,0 +1,54 @@
+"""Archive transaction logs command."""
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Partitions
+from cash_register.partitions import archive_month, month_start, previous_month, stored_months
+
+# Utils
+from datetime import datetime, timezone
+import os
+
+
+class Command(BaseCommand):
+    """
+    Move the transaction logs of the months older than
+    TRANSACTION_LOG_HOT_MONTHS to one gzipped NDJSON file per month, and
+    remove them from the database. The summaries of those months are kept,
+    so reports still cover them.
+    """
+    help = "Archive the transaction logs of cold months to compressed files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-months",
+                            type=int,
+                            default=settings.TRANSACTION_LOG_HOT_MONTHS,
+                            help="Months kept in the database, current "
+                            "one included.")
+        parser.add_argument("--output-dir",
+                            default=settings.TRANSACTION_LOG_ARCHIVE_DIR,
+                            help="Directory of the archive files.")
+        parser.add_argument("--dry-run",
+                            action="store_true",
+                            help="List the months without archiving them.")
+
+    def handle(self, *args, **options):
+        oldest_hot = month_start(datetime.now(timezone.utc))
+        for _ in range(max(options["keep_months"], 1) - 1):
+            oldest_hot = previous_month(oldest_hot)
+        cold_months = [
+            month for month in stored_months() if month < oldest_hot
+        ]
+        if not cold_months:
+            self.stdout.write("No cold months to archive.")
+            return
+        os.makedirs(options["output_dir"], exist_ok=True)
+        for month in cold_months:
+            if options["dry_run"]:
+                self.stdout.write(f"Would archive {month:%Y-%m}.")
+                continue
+            path, archived = archive_month(month, options["output_dir"])
+            self.stdout.write(f"Archived {archived} logs of {month:%Y-%m} "
+                              f"to {path}.")
@@ -0,0 +1,30 @@
+"""Create transaction log partitions command."""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Partitions
+from cash_register.partitions import create_partitions, is_partitioned, partition_name
+
+
+class Command(BaseCommand):
+    """
+    Create the monthly transaction log partitions of the current month and
+    of the following ones on PostgreSQL, meant to run on every start and
+    periodically (e.g. from cron). Payments also create the partition of
+    their month when it is missing.
+    """
+    help = "Create the monthly transaction log partitions ahead of time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months",
+                            type=int,
+                            default=3,
+                            help="Months to create after the current one.")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write("Transaction logs are not partitioned here.")
+            return
+        for month in create_partitions(options["months"]):
+            self.stdout.write(f"Partition {partition_name(month)} ready.")
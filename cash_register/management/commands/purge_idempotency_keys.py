@@ -0,0 +1,27 @@
+"""Purge idempotency keys command."""
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Models
+from cash_register.models import IdempotencyKey
+
+# Utils
+from datetime import timedelta
+
+
+class Command(BaseCommand):
+    """
+    Delete the stored responses older than IDEMPOTENCY_KEY_TTL, meant to
+    run periodically (e.g. from cron).
+    """
+    help = "Delete the idempotency keys older than IDEMPOTENCY_KEY_TTL."
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL)
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lt=expired_before).delete()
+        self.stdout.write(f"Deleted {deleted} idempotency keys.")
@@ -0,0 +1,33 @@
+"""Rebuild transaction summaries command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Models
+from cash_register.models import Register, TransactionSummary
+
+
+class Command(BaseCommand):
+    """
+    Recompute the hourly and daily summaries from the transaction logs and
+    payments, one register per transaction. Run it once after upgrading to
+    summarize the existing logs, or to repair the summaries.
+    """
+    help = "Rebuild the hourly and daily transaction summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--register",
+                            type=int,
+                            action="append",
+                            dest="registers",
+                            help="Register to rebuild, every one by default.")
+
+    def handle(self, *args, **options):
+        registers = options["registers"] or Register.objects.order_by(
+            "id").values_list("id", flat=True)
+        for register_id in registers:
+            with transaction.atomic():
+                count = TransactionSummary.objects.rebuild(register_id)
+            self.stdout.write(
+                f"Register {register_id}: {count} summaries rebuilt.")
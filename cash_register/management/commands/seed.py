@@ -0,0 +1,46 @@
+"""Seed command."""
+
+# Django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination, DrawerSnapshot
+
+# Utils
+from cash_register.cache import bump_version
+
+FIXTURES = (
+    ("currency_denomination_fixtures", CurrencyDenomination),
+    ("available_cash_fixtures", AvailableCash),
+)
+
+
+class Command(BaseCommand):
+    """
+    Load the default fixtures, skipping every fixture whose table already
+    has rows, so restarting the application never resets the cash register
+    to the fixture quantities.
+    """
+    help = "Load the default fixtures that are not loaded yet."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for fixture, model in FIXTURES:
+                if model.objects.exists():
+                    self.stdout.write(f"Skipping {fixture}: already loaded.")
+                    continue
+                call_command("loaddata", fixture, verbosity=options["verbosity"])
+                if model is AvailableCash:
+                    self.snapshot_drawers()
+
+    def snapshot_drawers(self):
+        """
+        This method start the drawer history of the registers the fixtures
+        gave cash to, the fixtures do not record drawer events
+        """
+        registers = AvailableCash.objects.order_by("register_id").values_list(
+            "register_id", flat=True).distinct()
+        for register_id in registers:
+            DrawerSnapshot.objects.take(register_id, bump_version(register_id))
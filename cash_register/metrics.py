@@ -0,0 +1,243 @@
+"""Cash register metrics.
+
+Minimal in-process counters and histograms rendered in the Prometheus text
+exposition format, so production hot paths can be watched without extra
+dependencies. Metrics belong to the process serving the request: with
+several workers each scrape sees one of them.
+"""
+
+# Utils
+from bisect import bisect_left
+import threading
+
+# Seconds, from a cached read to a slow payment.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values, extra=()):
+    """
+    Return the {name="value",...} part of a sample
+
+    ...
+    Params
+    - names: Label names
+    - values: Label values, in the order of names
+    - extra: Additional (name, value) pairs, e.g. the le of a bucket
+    """
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"'
+                          for name, value in pairs) + "}"
+
+
+def _escape(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace(
+        '"', '\\"')
+
+
+def _format_value(value):
+    """Format a sample value, whole numbers without decimals."""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """
+    Monotonic counter per label values
+
+    ...
+    Methods:
+        inc(): Increase the counter of some label values
+        value(): Current value of some label values
+        samples(): Lines of the text exposition format
+    """
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """
+        This method increase the counter of some label values
+
+        ...
+        Params
+        - label_values: Values of the labels, in declaration order
+        - amount: Amount to add
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values,
+                                                          0) + amount
+
+    def value(self, *label_values):
+        """
+        This method return the current value of some label values
+
+        ...
+        Params
+        - label_values: Values of the labels, in declaration order
+        """
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        """
+        This method return the lines of the text exposition format
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} "
+            f"{_format_value(value)}" for labels, value in values
+        ]
+
+
+class Histogram:
+    """
+    Cumulative histogram per label values, with fixed buckets
+
+    ...
+    Methods:
+        observe(): Record a value for some label values
+        samples(): Lines of the text exposition format
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """
+        This method record a value for some label values
+
+        ...
+        Params
+        - value: Observed value
+        - label_values: Values of the labels, in declaration order
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # Bucket counts (last one is +Inf) and sum.
+                series = self._values[label_values] = [
+                    [0] * (len(self.buckets) + 1), 0
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        """
+        This method return the lines of the text exposition format
+        """
+        with self._lock:
+            values = sorted((labels, (list(counts), total))
+                            for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf", ), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labels, labels,
+                                               [("le", bound)])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{series_labels} "
+                         f"{_format_value(total)}")
+            lines.append(f"{self.name}_count{series_labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Set of metrics rendered together
+
+    ...
+    Methods:
+        register(): Add a metric
+        register_callback(): Add metrics read when rendering
+        render(): Render every metric in the text exposition format
+    """
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def register(self, metric):
+        """
+        This method add a metric and return it
+
+        ...
+        Params
+        - metric: Counter or Histogram
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def register_callback(self, callback):
+        """
+        This method add metrics computed when rendering
+
+        ...
+        Params
+        - callback: Callable returning (name, kind, documentation, value)
+          tuples
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def render(self):
+        """
+        This method render every metric in the text exposition format
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for callback in self._callbacks:
+            for name, kind, documentation, value in callback():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(
+    Histogram("cash_register_request_duration_seconds",
+              "Time to serve a request, per route.",
+              labels=("route", "method")))
+REQUESTS = registry.register(
+    Counter("cash_register_requests_total",
+            "Requests served, per route and status code.",
+            labels=("route", "method", "status")))
+REQUEST_QUERIES = registry.register(
+    Histogram("cash_register_request_queries",
+              "Database queries run by a request, per route.",
+              labels=("route", "method"),
+              buckets=QUERY_BUCKETS))
+QUERY_TIME = registry.register(
+    Counter("cash_register_db_query_seconds_total",
+            "Time spent running database queries, per route.",
+            labels=("route", "method")))
+CHANGE_FAILURES = registry.register(
+    Counter("cash_register_change_failures_total",
+            "Payments rejected because the change could not be returned.",
+            labels=("reason", )))
+CASH_UPDATE_CONFLICTS = registry.register(
+    Counter("cash_register_cash_update_conflicts_total",
+            "Optimistic changes of available cash tried again, per reason.",
+            labels=("reason", )))
@@ -0,0 +1,221 @@
+"""Cash register middlewares."""
+
+# Django
+from django.conf import settings
+from django.db import connection
+
+# Exceptions
+from .exceptions import QueryBudgetExceeded
+
+# Metrics
+from .metrics import QUERY_TIME, REQUEST_LATENCY, REQUEST_QUERIES, REQUESTS
+
+# Utils
+from contextvars import ContextVar
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Counter of the async request being served, seen by the threads it runs
+# sync code in.
+async_query_counter = ContextVar("async_query_counter", default=None)
+
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def get_query_budget(view_func, method):
+    """
+    Return the query budget declared for a view, None when undeclared
+
+    Function views declare it with the query_budget decorator, viewsets
+    with a query_budgets mapping of action -> budget.
+
+    ...
+    Params
+    - view_func: View function resolved for the request
+    - method: HTTP method of the request
+    """
+    budget = getattr(view_func, "query_budget", None)
+    if budget is not None:
+        return budget
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(method.lower())
+    budgets = getattr(getattr(view_func, "cls", None), "query_budgets", {})
+    return budgets.get(action)
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries of a request and the
+    time spent running them.
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Savepoints depend on the surrounding transaction, not the view.
+        if not sql.startswith(TRANSACTION_CONTROL):
+            self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def count_async_queries(execute, sql, params, many, context):
+    """
+    Count a query against the counter of the async request it runs for, if
+    any. Installed on every connection, since the sync views of an async
+    request run in another thread, with the context of the request copied
+    by asgiref.
+    """
+    counter = async_query_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_async_query_counter(connection, **kwargs):
+    """
+    Install count_async_queries on a new database connection. Connected to
+    the connection_created signal by CashRegisterConfig.
+    """
+    if count_async_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_async_queries)
+
+
+class QueryBudgetMiddleware:
+    """
+    Check every request against the query budget declared by its view.
+
+    Going over budget logs a warning, or raises QueryBudgetExceeded when
+    the QUERY_BUDGET_RAISE setting is enabled, as the test runner does, so
+    N+1 patterns can not silently come back.
+
+    With the QUERY_COUNT_HEADER setting enabled the count of every request
+    is also sent in an X-Query-Count response header.
+
+    Works in sync and async mode, so under ASGI it does not force the
+    requests through a single thread. In async mode the queries are
+    counted in whichever thread runs them (see count_async_queries).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Tell the handler to await this middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request.query_budget = None
+        counter = request.query_counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        self.check_budget(request, counter)
+        return self.add_query_count(response, counter)
+
+    async def __acall__(self, request):
+        request.query_budget = None
+        counter = request.query_counter = QueryCounter()
+        token = async_query_counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            async_query_counter.reset(token)
+        self.check_budget(request, counter)
+        return self.add_query_count(response, counter)
+
+    def check_budget(self, request, counter):
+        """
+        This method log or raise when a request went over its query budget
+
+        ...
+        Params
+        - request: Request served
+        - counter: QueryCounter of the request
+        """
+        budget = request.query_budget
+        if budget is not None and counter.count > budget:
+            message = (f"{request.method} {request.path} ran {counter.count} "
+                       f"queries, over its budget of {budget}")
+            if getattr(settings, "QUERY_BUDGET_RAISE", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def add_query_count(self, response, counter):
+        """
+        This method send the queries of the request in the X-Query-Count
+        header when the QUERY_COUNT_HEADER setting is enabled
+
+        ...
+        Params
+        - response: Response of the request
+        - counter: QueryCounter of the request
+        """
+        if getattr(settings, "QUERY_COUNT_HEADER", False):
+            response["X-Query-Count"] = str(counter.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, status code, query count and query time of every
+    request per route, served at /api/metrics (see cash_register.metrics).
+
+    Must come before QueryBudgetMiddleware, which counts the queries.
+    Works in sync and async mode.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Tell the handler to await this middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, seconds):
+        """
+        This method record the measurements of a request
+
+        ...
+        Params
+        - request: Request served
+        - response: Response sent
+        - seconds: Time taken to serve it
+        """
+        match = getattr(request, "resolver_match", None)
+        # Routes, not paths, keep the number of series bounded.
+        route = match.route if match is not None else "unmatched"
+        method = request.method
+        REQUEST_LATENCY.observe(seconds, route, method)
+        REQUESTS.inc(route, method, response.status_code)
+        counter = getattr(request, "query_counter", None)
+        if counter is not None:
+            REQUEST_QUERIES.observe(counter.count, route, method)
+            QUERY_TIME.inc(route, method, amount=counter.seconds)
@@ -0,0 +1,26 @@
+# Generated by Django 3.1.6 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    CashRegisterVersion = apps.get_model('cash_register', 'CashRegisterVersion')
+    CashRegisterVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0005_auto_20210216_1910'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashRegisterVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.6 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+def compute_balances(apps, schema_editor):
+    TransactionLog = apps.get_model('cash_register', 'TransactionLog')
+    balance = 0
+    logs = []
+    for log in TransactionLog.objects.order_by('id').iterator(chunk_size=2000):
+        balance += log.amount if log.transaction_type == 'income' else -log.amount
+        log.balance = balance
+        logs.append(log)
+        if len(logs) == 2000:
+            TransactionLog.objects.bulk_update(logs, ['balance'])
+            logs = []
+    TransactionLog.objects.bulk_update(logs, ['balance'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0006_cashregisterversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionlog',
+            name='balance',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='transactionlog',
+            index=models.Index(fields=['created_at', 'id'], name='transactionlog_created_idx'),
+        ),
+        migrations.RunPython(compute_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.6 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0007_transactionlog_balance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionlog',
+            index=models.Index(fields=['created_at', 'transaction_type', 'amount'], name='transactionlog_report_idx'),
+        ),
+    ]
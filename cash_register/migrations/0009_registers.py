@@ -0,0 +1,82 @@
+# Generated by Django 3.1.6 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_default_register(apps, schema_editor):
+    # First row of the new table, so it gets DEFAULT_REGISTER_ID (1).
+    Register = apps.get_model('cash_register', 'Register')
+    CashRegisterVersion = apps.get_model('cash_register', 'CashRegisterVersion')
+    version = CashRegisterVersion.objects.values_list('version', flat=True).first()
+    Register.objects.create(name='Principal', version=version or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0008_report_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Register',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_default_register, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transactionlog',
+            name='transactionlog_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transactionlog',
+            name='transactionlog_report_idx',
+        ),
+        migrations.AlterField(
+            model_name='availablecash',
+            name='currency_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='available_currency', to='cash_register.currencydenomination', to_field='currency_type'),
+        ),
+        migrations.AddField(
+            model_name='availablecash',
+            name='register',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='available_cash', to='cash_register.register'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='register',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='cash_register.register'),
+        ),
+        migrations.AddField(
+            model_name='transactionlog',
+            name='register',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='transaction_logs', to='cash_register.register'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='availablecash',
+            unique_together={('register', 'currency_type')},
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['register', 'created_at'], name='payment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionlog',
+            index=models.Index(fields=['register', 'created_at', 'id'], name='transactionlog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionlog',
+            index=models.Index(fields=['register', 'created_at', 'transaction_type', 'amount'], name='transactionlog_report_idx'),
+        ),
+        migrations.DeleteModel(
+            name='CashRegisterVersion',
+        ),
+    ]
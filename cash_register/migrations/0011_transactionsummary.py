@@ -0,0 +1,29 @@
+# Generated by Django 3.1.6 on 2026-10-18 15:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0010_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'hour'), ('day', 'day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('income', models.BigIntegerField(default=0)),
+                ('outcome', models.BigIntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_summaries', to='cash_register.register')),
+            ],
+            options={
+                'unique_together': {('register', 'granularity', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 3.1.6 on 2026-10-18 17:05
+
+from django.db import migrations
+from datetime import datetime, timezone
+
+TABLE = 'cash_register_transactionlog'
+UNPARTITIONED = f'{TABLE}_unpartitioned'
+# Partitions created ahead of the current month.
+MONTHS_AHEAD = 3
+
+
+def next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_transaction_log(apps, schema_editor):
+    # PostgreSQL only: the other backends keep a single table.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f'SELECT min(created_at) FROM "{TABLE}"')
+        first_log = cursor.fetchone()[0]
+
+    now = datetime.now(timezone.utc)
+    month = (first_log or now).astimezone(timezone.utc)
+    month = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    last_month = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+    for _ in range(MONTHS_AHEAD):
+        last_month = next_month(last_month)
+
+    # A table can not become partitioned, copy it into a partitioned one.
+    schema_editor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{UNPARTITIONED}"')
+    schema_editor.execute(f'ALTER TABLE "{UNPARTITIONED}" RENAME CONSTRAINT '
+                          f'"{TABLE}_pkey" TO "{UNPARTITIONED}_pkey"')
+    schema_editor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{UNPARTITIONED}" '
+                          'INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    # The partition key must be part of the primary key.
+    schema_editor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, created_at)')
+    while month <= last_month:
+        schema_editor.execute(
+            f'CREATE TABLE "{TABLE}_{month:%Y_%m}" PARTITION OF "{TABLE}" '
+            'FOR VALUES FROM (%s) TO (%s)', [month, next_month(month)])
+        month = next_month(month)
+    schema_editor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+    schema_editor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{UNPARTITIONED}"')
+    schema_editor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE}"."id"')
+    schema_editor.execute(f'DROP TABLE "{UNPARTITIONED}"')
+
+    schema_editor.execute(f'CREATE INDEX "transactionlog_created_idx" ON "{TABLE}" '
+                          '("register_id", "created_at", "id")')
+    schema_editor.execute(f'CREATE INDEX "transactionlog_report_idx" ON "{TABLE}" '
+                          '("register_id", "created_at", "transaction_type", "amount")')
+    schema_editor.execute(
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_register_id_fk" '
+        'FOREIGN KEY ("register_id") REFERENCES "cash_register_register" ("id") '
+        'DEFERRABLE INITIALLY DEFERRED')
+
+    # Archiving drops partitions, which never fires this trigger.
+    schema_editor.execute(
+        f'CREATE FUNCTION "{TABLE}_append_only"() RETURNS trigger '
+        'LANGUAGE plpgsql AS $$ BEGIN '
+        "RAISE EXCEPTION 'Transaction logs are append-only'; END $$")
+    schema_editor.execute(
+        f'CREATE TRIGGER "{TABLE}_append_only" BEFORE UPDATE OR DELETE '
+        f'ON "{TABLE}" FOR EACH STATEMENT EXECUTE FUNCTION "{TABLE}_append_only"()')
+
+
+def drop_append_only_trigger(apps, schema_editor):
+    # The table stays partitioned, which the previous models also support.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP TRIGGER "{TABLE}_append_only" ON "{TABLE}"')
+    schema_editor.execute(f'DROP FUNCTION "{TABLE}_append_only"()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0011_transactionsummary'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='transactionlog',
+            name='updated_at',
+        ),
+        migrations.RunPython(partition_transaction_log, drop_append_only_trigger),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.1.6 on 2026-10-18 18:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def take_baseline_snapshots(apps, schema_editor):
+    # The drawers have no events yet, start their history from now.
+    AvailableCash = apps.get_model('cash_register', 'AvailableCash')
+    DrawerSnapshot = apps.get_model('cash_register', 'DrawerSnapshot')
+    Register = apps.get_model('cash_register', 'Register')
+    quantities = {}
+    for register_id, currency_type, quantity in AvailableCash.objects.values_list(
+            'register_id', 'currency_type_id', 'quantity'):
+        quantities.setdefault(register_id, {})[str(currency_type)] = quantity
+    versions = dict(Register.objects.filter(pk__in=quantities).values_list('id', 'version'))
+    now = django.utils.timezone.now()
+    DrawerSnapshot.objects.bulk_create([
+        DrawerSnapshot(register_id=register_id,
+                       version=versions[register_id],
+                       quantities=register_quantities,
+                       created_at=now)
+        for register_id, register_quantities in quantities.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0012_transactionlog_append_only'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DrawerEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('currency_type', models.IntegerField()),
+                ('delta', models.IntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drawer_events', to='cash_register.register')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['register', 'created_at'], name='drawerevent_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DrawerSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('quantities', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drawer_snapshots', to='cash_register.register')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['register', 'created_at', 'version'], name='drawersnapshot_created_idx')],
+                'unique_together': {('register', 'version')},
+            },
+        ),
+        migrations.RunPython(take_baseline_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.6 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0013_drawer_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availablecash',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.6 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0014_availablecash_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='register',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='register',
+            name='archived_balance',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
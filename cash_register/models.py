@@ -1,7 +1,20 @@
 """Cash register models."""
 
 # Django
+from django.conf import settings
 from django.db import models
+from django.db.models import BigIntegerField, Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+# Exceptions
+from .exceptions import AppendOnlyError
+
+# Utils
+from collections import defaultdict
+
+# Register used by the routes that are not scoped to a register.
+DEFAULT_REGISTER_ID = 1
 
 
 class CurrencyDenomination(models.Model):
@@ -14,27 +27,234 @@ class CurrencyDenomination(models.Model):
         return self.currency_type.__str__()
 
 
+class Register(models.Model):
+    """
+    Register Model stores the cash drawers. Each one has its own available
+    cash, payments and transaction logs, and a counter increased on every
+    change of its available cash, so each worker knows when its cached
+    state of the drawer is outdated. The balance of its last archived log
+    is kept so the running balance goes on once every log is archived.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(blank=False, null=False, default=0)
+    archived_balance = models.BigIntegerField(blank=False,
+                                              null=False,
+                                              default=0)
+    archived_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.name
+
+
+class AvailableCashQuerySet(models.QuerySet):
+    """
+    AvailableCash queryset.
+    """
+    def compare_and_swap(self, available_cash, **fields):
+        """
+        Update the fields of an available cash row only if its version is
+        still the one of the instance, and bump the version. Return whether
+        the row was updated, the instance gets the new values when it was.
+
+        ...
+        Params
+        - available_cash: AvailableCash instance read before the change
+        - fields: New values of the fields
+        """
+        fields["updated_at"] = timezone.now()
+        updated = self.filter(pk=available_cash.pk,
+                              version=available_cash.version).update(
+                                  version=F("version") + 1, **fields)
+        if not updated:
+            return False
+        for name, value in fields.items():
+            setattr(available_cash, name, value)
+        available_cash.version += 1
+        return True
+
+
 class AvailableCash(models.Model):
     """
     AvailableCash Model stores available cash on cash register.
     """
-    currency_type = models.OneToOneField(CurrencyDenomination,
-                                         to_field="currency_type",
-                                         on_delete=models.CASCADE,
-                                         related_name="available_currency")
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 default=DEFAULT_REGISTER_ID,
+                                 related_name="available_cash")
+    currency_type = models.ForeignKey(CurrencyDenomination,
+                                      to_field="currency_type",
+                                      on_delete=models.CASCADE,
+                                      related_name="available_currency")
     quantity = models.IntegerField(blank=False, null=False, default=0)
+    # Bumped by every update, compared by compare_and_swap().
+    version = models.BigIntegerField(blank=False, null=False, default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AvailableCashQuerySet.as_manager()
+
+    class Meta:
+        unique_together = [["register", "currency_type"]]
+
+
+class DrawerEventManager(models.Manager):
+    """
+    DrawerEvent manager recording and replaying the movements of the
+    drawers.
+    """
+    def append(self, register_id, version, deltas):
+        """
+        Record the quantity differences of a change of the available cash of
+        a register, and take a snapshot of the drawer every
+        DRAWER_SNAPSHOT_INTERVAL versions. Must run in the transaction of
+        the change, after bump_version() and the update of the rows.
+
+        ...
+        Params
+        - register_id: Register whose available cash changed
+        - version: Version returned by bump_version() for the change
+        - deltas: Mapping of denomination -> quantity difference
+        """
+        created_at = timezone.now()
+        self.bulk_create([
+            DrawerEvent(register_id=register_id,
+                        version=version,
+                        currency_type=currency_type,
+                        delta=delta,
+                        created_at=created_at)
+            for currency_type, delta in deltas.items() if delta
+        ])
+        if version % settings.DRAWER_SNAPSHOT_INTERVAL == 0:
+            DrawerSnapshot.objects.take(register_id, version, created_at)
+
+    def state_at(self, register_id, date):
+        """
+        Return the quantity of each denomination in a register at a given
+        date, rebuilt from the last snapshot up to that date and the events
+        after it. Denominations without pieces are left out.
+
+        ...
+        Params
+        - register_id: Register to rebuild the state of
+        - date: Date to rebuild the state at
+        """
+        snapshot = DrawerSnapshot.objects.filter(
+            register_id=register_id, created_at__lte=date).order_by(
+                "-created_at", "-version").values_list(
+                    "version", "created_at", "quantities").first()
+        events = self.filter(register_id=register_id, created_at__lte=date)
+        state = {}
+        if snapshot is not None:
+            version, created_at, quantities = snapshot
+            # Both bounds keep the scan of the index to the tail.
+            events = events.filter(version__gt=version,
+                                   created_at__gte=created_at)
+            # JSON object keys are strings.
+            state = {
+                int(currency_type): quantity
+                for currency_type, quantity in quantities.items()
+            }
+        events = events.values_list("currency_type", "delta")
+        for currency_type, delta in events:
+            state[currency_type] = state.get(currency_type, 0) + delta
+        return {
+            currency_type: quantity
+            for currency_type, quantity in sorted(state.items()) if quantity
+        }
+
+
+class DrawerEvent(models.Model):
+    """
+    DrawerEvent Model stores every change of the quantity of a denomination
+    in a register, tagged with the register version of the change. Events
+    are only appended, so together with the snapshots they rebuild the
+    drawer at any past date.
+    """
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 related_name="drawer_events")
+    version = models.BigIntegerField()
+    # Not a foreign key: history outlives the denominations.
+    currency_type = models.IntegerField()
+    delta = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = DrawerEventManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["register", "created_at"],
+                         name="drawerevent_created_idx"),
+        ]
+
+
+class DrawerSnapshotManager(models.Manager):
+    """
+    DrawerSnapshot manager.
+    """
+    def take(self, register_id, version, created_at=None):
+        """
+        Store the current quantities of a register as of a version. Must run
+        in the transaction that bumped the register to that version.
+
+        ...
+        Params
+        - register_id: Register to take the snapshot of
+        - version: Current version of the register
+        - created_at: Date of the snapshot, now when None
+        """
+        quantities = AvailableCash.objects.filter(
+            register_id=register_id).values_list("currency_type", "quantity")
+        return self.create(register_id=register_id,
+                           version=version,
+                           quantities={
+                               str(currency_type): quantity
+                               for currency_type, quantity in quantities
+                           },
+                           created_at=created_at or timezone.now())
+
+
+class DrawerSnapshot(models.Model):
+    """
+    DrawerSnapshot Model stores the quantity of each denomination in a
+    register after a version, so rebuilding a past state only replays the
+    events after the nearest snapshot.
+    """
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 related_name="drawer_snapshots")
+    version = models.BigIntegerField()
+    quantities = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = DrawerSnapshotManager()
+
+    class Meta:
+        unique_together = [["register", "version"]]
+        indexes = [
+            models.Index(fields=["register", "created_at", "version"],
+                         name="drawersnapshot_created_idx"),
+        ]
+
 
 class Payment(models.Model):
     """
     Payment Model stores the total payment and the amount
     of money delivered by the customer.
     """
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 default=DEFAULT_REGISTER_ID,
+                                 related_name="payments")
     amount = models.IntegerField(blank=False, null=False, default=0)
     total_payment = models.IntegerField(blank=False, null=False, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["register", "created_at"],
+                         name="payment_created_idx"),
+        ]
+
 
 class PaymentForm(models.Model):
     """
@@ -50,15 +270,283 @@ class PaymentForm(models.Model):
     quantity = models.IntegerField(blank=False, null=False)
 
 
+class TransactionLogQuerySet(models.QuerySet):
+    """
+    TransactionLog queryset refusing to change stored logs.
+    """
+    def update(self, **kwargs):
+        raise AppendOnlyError("Transaction logs can not be updated.")
+
+    def delete(self):
+        raise AppendOnlyError(
+            "Transaction logs can not be deleted, archive them instead.")
+
+
+class TransactionLogManager(models.Manager.from_queryset(TransactionLogQuerySet)):
+    """
+    TransactionLog manager keeping the running balance of each register.
+    """
+    def append(self, logs, payments=()):
+        """
+        Insert new logs of a single register setting their running balance,
+        and add them to the summaries of their periods.
+
+        Writers must already hold the register version lock (see
+        cash_register.cache.bump_version) so balances follow insert order.
+
+        ...
+        Params
+        - logs: Unsaved TransactionLog instances of the same register
+        - payments: Saved payments the logs belong to, counted in the
+          summaries
+        """
+        # Imported here, cash_register.partitions imports the models.
+        from .partitions import ensure_partition
+
+        # Falls back to the balance kept when every log got archived.
+        last_balance = self.filter(register_id=OuterRef("pk")).order_by(
+            "-created_at", "-id").values("balance")[:1]
+        balance = Register.objects.filter(
+            pk=logs[0].register_id).values_list(
+            Coalesce(Subquery(last_balance), "archived_balance"),
+            flat=True).first() or 0
+        for log in logs:
+            balance += log.signed_amount
+            log.balance = balance
+        ensure_partition(timezone.now())
+        logs = self.bulk_create(logs)
+        for log in logs:
+            # Backends that can not return the ids from a bulk insert, like
+            # SQLite before Django 4.0, leave the logs marked as unsaved.
+            log._state.adding = False
+        TransactionSummary.objects.add(logs[0].register_id, logs, payments)
+        return logs
+
+    def balance_at(self, register_id, date):
+        """
+        Return the balance of a register at a given date
+
+        ...
+        Params
+        - register_id: Register to retrieve the balance of
+        - date: Date to retrieve the balance
+        """
+        balance = self.filter(register_id=register_id,
+                              created_at__lte=date).order_by(
+            "-created_at", "-id").values_list("balance", flat=True).first()
+        if balance is None:
+            # Dates after the last archived log keep its balance.
+            balance = Register.objects.filter(
+                pk=register_id, archived_at__lte=date).values_list(
+                "archived_balance", flat=True).first()
+        return balance or 0
+
+
 class TransactionLog(models.Model):
     """
-    TransactionLog Model stores all transactions of the cash register.
+    TransactionLog Model stores all transactions of the cash register and
+    the running balance after each one. It is an append-only ledger: logs
+    are never updated or deleted, only archived by month (see
+    cash_register.partitions).
     """
     TRANSACTION_TYPES_CHOICES = [("INCOME", "income"), ("OUTCOME", "outcome")]
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 default=DEFAULT_REGISTER_ID,
+                                 related_name="transaction_logs")
     transaction_type = models.CharField(choices=TRANSACTION_TYPES_CHOICES,
                                         blank=False,
                                         null=False,
                                         max_length=8)
     amount = models.IntegerField(blank=False, null=False, default=0)
+    balance = models.BigIntegerField(blank=False, null=False, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TransactionLogManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["register", "created_at", "id"],
+                         name="transactionlog_created_idx"),
+            # Trailing amount lets type reports be answered from the index.
+            models.Index(
+                fields=["register", "created_at", "transaction_type", "amount"],
+                name="transactionlog_report_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.pk is not None:
+            raise AppendOnlyError("Transaction logs can not be updated.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise AppendOnlyError(
+            "Transaction logs can not be deleted, archive them instead.")
+
+    @property
+    def signed_amount(self):
+        """Amount added to the cash register balance."""
+        if self.transaction_type == "income":
+            return self.amount
+        return -self.amount
+
+
+def period_start(date, granularity):
+    """
+    Return the start of the hour or day of a date, in the current time zone
+
+    ...
+    Params
+    - date: Aware datetime
+    - granularity: "hour" or "day"
+    """
+    local = timezone.localtime(date).replace(minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return local
+    return timezone.make_aware(local.replace(hour=0, tzinfo=None))
+
+
+class TransactionSummaryManager(models.Manager):
+    """
+    TransactionSummary manager keeping the rollups up to date.
+    """
+    def add(self, register_id, logs, payments=()):
+        """
+        Add new logs and payments of a register to the summaries of their
+        hour and day, with one insert of the missing periods and one update
+
+        ...
+        Params
+        - register_id: Register of the logs and payments
+        - logs: Saved TransactionLog instances
+        - payments: Saved Payment instances
+        """
+        totals = defaultdict(lambda: {
+            "income": 0,
+            "outcome": 0,
+            "payment_count": 0
+        })
+        for granularity, _ in TransactionSummary.GRANULARITY_CHOICES:
+            for log in logs:
+                start = period_start(log.created_at, granularity)
+                totals[(granularity, start)][log.transaction_type] += log.amount
+            for payment in payments:
+                start = period_start(payment.created_at, granularity)
+                totals[(granularity, start)]["payment_count"] += 1
+        self.bulk_create([
+            TransactionSummary(register_id=register_id,
+                               granularity=granularity,
+                               period_start=start)
+            for granularity, start in totals
+        ], ignore_conflicts=True)
+
+        condition = Q()
+        increments = {"income": [], "outcome": [], "payment_count": []}
+        for (granularity, start), period in totals.items():
+            condition |= Q(granularity=granularity, period_start=start)
+            for field, cases in increments.items():
+                cases.append(
+                    When(granularity=granularity,
+                         period_start=start,
+                         then=Value(period[field])))
+        self.filter(condition, register_id=register_id).update(**{
+            field: F(field) + Case(*cases,
+                                   default=Value(0),
+                                   output_field=BigIntegerField())
+            for field, cases in increments.items()
+        })
+
+    def rebuild(self, register_id):
+        """
+        Replace the summaries of a register with totals computed from its
+        logs and payments. The days before the first stored log are kept,
+        their logs are archived. Locks the register so no writer adds to
+        the summaries in between.
+
+        ...
+        Params
+        - register_id: Register to rebuild the summaries of
+        """
+        Register.objects.select_for_update().only("id").get(pk=register_id)
+        first_log = TransactionLog.objects.filter(
+            register_id=register_id).order_by("created_at").values_list(
+                "created_at", flat=True).first()
+        if first_log is None:
+            return 0
+        start = period_start(first_log, "day")
+        self.filter(register_id=register_id, period_start__gte=start).delete()
+        summaries = []
+        for granularity, _ in TransactionSummary.GRANULARITY_CHOICES:
+            periods = defaultdict(dict)
+            logs = TransactionLog.objects.filter(
+                register_id=register_id, created_at__gte=start).annotate(
+                    period=Trunc("created_at", granularity)).values(
+                        "period").annotate(
+                            income=Sum("amount",
+                                       filter=Q(transaction_type="income")),
+                            outcome=Sum("amount",
+                                        filter=Q(transaction_type="outcome")))
+            for row in logs.order_by():
+                periods[row["period"]].update(income=row["income"] or 0,
+                                              outcome=row["outcome"] or 0)
+            payments = Payment.objects.filter(
+                register_id=register_id, created_at__gte=start).annotate(
+                    period=Trunc("created_at", granularity)).values(
+                        "period").annotate(payment_count=Count("id"))
+            for row in payments.order_by():
+                periods[row["period"]]["payment_count"] = row["payment_count"]
+            summaries.extend(
+                TransactionSummary(register_id=register_id,
+                                   granularity=granularity,
+                                   period_start=period,
+                                   **totals)
+                for period, totals in periods.items())
+        self.bulk_create(summaries, batch_size=1000)
+        return len(summaries)
+
+
+class TransactionSummary(models.Model):
+    """
+    TransactionSummary Model stores the income, outcome and payments of a
+    register per hour and per day, so reports read a row per period
+    instead of every log.
+    """
+    GRANULARITY_CHOICES = [("hour", "hour"), ("day", "day")]
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 related_name="transaction_summaries")
+    granularity = models.CharField(choices=GRANULARITY_CHOICES, max_length=4)
+    period_start = models.DateTimeField()
+    income = models.BigIntegerField(blank=False, null=False, default=0)
+    outcome = models.BigIntegerField(blank=False, null=False, default=0)
+    payment_count = models.IntegerField(blank=False, null=False, default=0)
+
+    objects = TransactionSummaryManager()
+
+    class Meta:
+        # Also the index of the reports over a range of periods.
+        unique_together = [["register", "granularity", "period_start"]]
+
+    @property
+    def net(self):
+        """Income minus outcome of the period."""
+        return self.income - self.outcome
+
+
+class IdempotencyKey(models.Model):
+    """
+    IdempotencyKey Model stores the response of a payment created with an
+    Idempotency-Key header, so retries of the request get it back instead
+    of paying twice.
+    """
+    register = models.ForeignKey(Register,
+                                 on_delete=models.CASCADE,
+                                 related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = [["register", "key"]]
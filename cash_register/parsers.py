@@ -0,0 +1,38 @@
+"""Cash register parsers."""
+
+# Django
+from django.conf import settings
+
+# Django Rest Framework
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser decoding with orjson when it is installed. Falls back to
+    JSONParser without orjson and for bodies not encoded in UTF-8.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        This method parse a JSON request body
+
+        ...
+        Params
+        - stream: Request body
+        - media_type: Content type of the request
+        - parser_context: View and request of the body
+        """
+        encoding = (parser_context or {}).get("encoding",
+                                              settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f"JSON parse error - {error}")
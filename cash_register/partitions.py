@@ -0,0 +1,273 @@
+"""Cash register transaction log partitions.
+
+On PostgreSQL the transaction log table is partitioned by month of
+``created_at`` (see migration 0012), so range queries only scan the months
+they cover and cold months can be archived by dropping their partition.
+Other backends keep a single table and archive by deleting rows.
+"""
+
+# Django
+from django.db import DatabaseError, connection, models, transaction
+from django.db.models import Q
+
+# Models
+from .models import Register, TransactionLog
+
+# Utils
+from .exports import TRANSACTION_LOG_FIELDS, transaction_logs_ndjson
+from datetime import datetime, timezone
+import gzip
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+TABLE = TransactionLog._meta.db_table
+# Takes the logs of months without a partition (see ensure_partition).
+DEFAULT_PARTITION = f"{TABLE}_default"
+ARCHIVE_FIELDS = ("register_id", ) + TRANSACTION_LOG_FIELDS
+
+_PARTITION_NAME = re.compile(rf"^{TABLE}_(\d{{4}})_(\d{{2}})$")
+_known_months = set()
+_known_months_lock = threading.Lock()
+
+
+def is_partitioned(using=None):
+    """
+    Return whether the transaction log table is partitioned on a connection
+
+    ...
+    Params
+    - using: Database connection, the default one when None
+    """
+    return (using or connection).vendor == "postgresql"
+
+
+def month_start(date):
+    """
+    Return the first instant of the UTC month of a date, partitions do not
+    depend on the TIME_ZONE setting
+
+    ...
+    Params
+    - date: Aware datetime
+    """
+    date = date.astimezone(timezone.utc)
+    return datetime(date.year, date.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(month):
+    """
+    Return the first instant of the month after a month start
+
+    ...
+    Params
+    - month: Value returned by month_start()
+    """
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def previous_month(month):
+    """
+    Return the first instant of the month before a month start
+
+    ...
+    Params
+    - month: Value returned by month_start()
+    """
+    if month.month == 1:
+        return month.replace(year=month.year - 1, month=12)
+    return month.replace(month=month.month - 1)
+
+
+def partition_name(month):
+    """
+    Return the table name of the partition of a month
+
+    ...
+    Params
+    - month: Value returned by month_start()
+    """
+    return f"{TABLE}_{month:%Y_%m}"
+
+
+def create_partition(cursor, month):
+    """
+    Create the partition of a month unless it exists
+
+    ...
+    Params
+    - cursor: Cursor of a PostgreSQL connection
+    - month: Value returned by month_start()
+    """
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" '
+        f'PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+        [month, next_month(month)])
+
+
+def create_partitions(months_ahead=3, start=None):
+    """
+    Create the partitions of the current month and of the following ones,
+    return the months covered
+
+    ...
+    Params
+    - months_ahead: Months to create after the current one
+    - start: Date of the first month to create when earlier than the
+      current one, e.g. to load old logs
+    """
+    if not is_partitioned():
+        return []
+    last_month = month_start(datetime.now(timezone.utc))
+    for _ in range(months_ahead):
+        last_month = next_month(last_month)
+    months = [month_start(start or datetime.now(timezone.utc))]
+    while months[-1] < last_month:
+        months.append(next_month(months[-1]))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month in months:
+            create_partition(cursor, month)
+    with _known_months_lock:
+        _known_months.update(months)
+    return months
+
+
+def ensure_partition(date):
+    """
+    Make sure the month of a log has its partition before it is inserted.
+    Costs a statement once per month and process; when it fails the log
+    lands in the default partition instead of failing the request.
+
+    ...
+    Params
+    - date: Creation date of the log
+    """
+    if not is_partitioned():
+        return
+    month = month_start(date)
+    if month in _known_months:
+        return
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            create_partition(cursor, month)
+    except DatabaseError:
+        logger.warning("Could not create the partition %s",
+                       partition_name(month),
+                       exc_info=True)
+        return
+
+    def remember():
+        with _known_months_lock:
+            _known_months.add(month)
+
+    transaction.on_commit(remember)
+
+
+def partition_months():
+    """
+    Return the months that have a partition, oldest first
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = %s", [TABLE])
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(
+        datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+        for match in map(_PARTITION_NAME.match, names) if match)
+
+
+def stored_months():
+    """
+    Return the months that have stored logs, oldest first
+    """
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE "
+                f"'UTC') FROM \"{DEFAULT_PARTITION}\"")
+            default_months = {
+                row[0].replace(tzinfo=timezone.utc)
+                for row in cursor.fetchall()
+            }
+        return sorted(default_months.union(partition_months()))
+    first_log = TransactionLog.objects.order_by("created_at").values_list(
+        "created_at", flat=True).first()
+    if first_log is None:
+        return []
+    months = [month_start(first_log)]
+    last_month = month_start(datetime.now(timezone.utc))
+    while months[-1] < last_month:
+        months.append(next_month(months[-1]))
+    return months
+
+
+def archive_month(month, directory, chunk_size=2000):
+    """
+    Write the logs of a month to a gzipped NDJSON file and remove them from
+    the database: the partition is dropped on PostgreSQL, along with the
+    logs of the month in the default partition, the rows are deleted
+    elsewhere. The balance of the last archived log of each register
+    is kept on the register. Return the path of the file and the logs
+    archived.
+
+    ...
+    Params
+    - month: Value returned by month_start()
+    - directory: Directory of the archive files
+    - chunk_size: Logs read from the database at a time
+    """
+    path = os.path.join(directory, f"transaction-logs-{month:%Y-%m}.ndjson.gz")
+    logs = TransactionLog.objects.filter(created_at__gte=month,
+                                         created_at__lt=next_month(month))
+    archived = 0
+    # Written aside first so a failed run never leaves a partial archive.
+    with gzip.open(f"{path}.part", "wt") as archive:
+        rows = logs.order_by("created_at", "id").values(
+            *ARCHIVE_FIELDS).iterator(chunk_size=chunk_size)
+        for line in transaction_logs_ndjson(rows):
+            archive.write(line)
+            archived += 1
+    os.replace(f"{path}.part", path)
+
+    with transaction.atomic():
+        register_ids = logs.order_by().values_list("register_id",
+                                                   flat=True).distinct()
+        for register_id in register_ids:
+            balance, created_at = logs.filter(
+                register_id=register_id).order_by(
+                "-created_at", "-id").values_list("balance",
+                                                  "created_at").first()
+            # Months archived out of order never move the balance back.
+            Register.objects.filter(
+                Q(archived_at__isnull=True) | Q(archived_at__lt=created_at),
+                pk=register_id).update(archived_balance=balance,
+                                       archived_at=created_at)
+        if is_partitioned():
+            with connection.cursor() as cursor:
+                # Checks the deferred foreign keys of logs inserted in this
+                # transaction, a partition with pending ones can't be dropped.
+                cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                if month in partition_months():
+                    cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION '
+                                   f'"{partition_name(month)}"')
+                    cursor.execute(f'DROP TABLE "{partition_name(month)}"')
+                # The append-only trigger of the parent table does not fire
+                # for statements on a partition.
+                cursor.execute(
+                    f'DELETE FROM "{DEFAULT_PARTITION}" '
+                    'WHERE created_at >= %s AND created_at < %s',
+                    [month, next_month(month)])
+        else:
+            # The only delete of the ledger.
+            models.QuerySet.delete(logs)
+    with _known_months_lock:
+        _known_months.discard(month)
+    return path, archived
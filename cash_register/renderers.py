@@ -0,0 +1,44 @@
+"""Cash register renderers."""
+
+# Django Rest Framework
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dates go through the encoder of JSONRenderer, which writes UTC as "Z".
+ORJSON_OPTIONS = 0 if orjson is None else (orjson.OPT_NON_STR_KEYS |
+                                           orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with orjson when it is installed, with the same
+    output as JSONRenderer. Falls back to JSONRenderer without orjson and
+    for indented responses, e.g. the browsable API.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        This method render data into a JSON bytestring
+
+        ...
+        Params
+        - data: Data to render
+        - accepted_media_type: Media type negotiated with the client
+        - renderer_context: View, request and response of the data
+        """
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Types orjson does not know, e.g. Decimal, also go through it.
+        content = orjson.dumps(data,
+                               default=self.encoder_class().default,
+                               option=ORJSON_OPTIONS)
+        # Keep JSON a strict subset of JavaScript, like JSONRenderer.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029")
@@ -1,10 +1,54 @@
 """Cash register serializers"""
 
+# Django
+from django.utils import timezone
+from django.utils.functional import cached_property
+
 # Django Rest Framework
 from rest_framework import serializers
 
 # Models
-from .models import CurrencyDenomination, AvailableCash, Payment, PaymentForm, TransactionLog
+from .models import CurrencyDenomination, AvailableCash, Payment, Register, TransactionLog, TransactionSummary
+
+# Utils
+from .denominations import denomination_registry
+from .validation import to_integer
+
+
+class PlainSerializer(serializers.BaseSerializer):
+    """
+    Base of the read-only serializers building plain dicts, without the
+    field introspection of the model serializers.
+    """
+    @cached_property
+    def time_zone(self):
+        """Current time zone, looked up once per response."""
+        return timezone.get_current_timezone()
+
+    def datetime_representation(self, value):
+        """
+        This method return a date in ISO 8601 in the current time zone,
+        like the DateTimeField of the model serializers
+
+        ...
+        Params
+        - value: Aware datetime
+        """
+        value = value.astimezone(self.time_zone).isoformat()
+        if value.endswith("+00:00"):
+            return value[:-6] + "Z"
+        return value
+
+
+class CurrentRegisterDefault:
+    """Default to the register the view is scoped to."""
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        return Register(pk=serializer_field.context["view"].register_id)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
 
 
 class CurrencyDenominationSerializer(serializers.ModelSerializer):
@@ -13,11 +57,69 @@ class CurrencyDenominationSerializer(serializers.ModelSerializer):
         model = CurrencyDenomination
         fields = ["currency_type"]
 
+class RegisterSerializer(serializers.ModelSerializer):
+    """Register serializer."""
+    class Meta:
+        model = Register
+        fields = ["id", "name"]
+
+class DenominationField(serializers.Field):
+    """
+    Currency type of a denomination foreign key, checked against the
+    denomination registry instead of the database.
+    """
+    default_error_messages = {
+        "invalid": serializers.IntegerField.default_error_messages["invalid"],
+        "does_not_exist": serializers.PrimaryKeyRelatedField.
+        default_error_messages["does_not_exist"]
+    }
+
+    def get_attribute(self, instance):
+        # The related instance would cost a query.
+        return getattr(instance, f"{self.source}_id")
+
+    def to_representation(self, value):
+        return value
+
+    def to_internal_value(self, data):
+        value = to_integer(data)
+        if value is None:
+            self.fail("invalid")
+        denomination = denomination_registry.instance(value)
+        if denomination is None:
+            self.fail("does_not_exist", pk_value=value)
+        return denomination
+
 class AvailableCashSerializer(serializers.ModelSerializer):
     """Available Cash serializer."""
+    register = serializers.HiddenField(default=CurrentRegisterDefault())
+    currency_type = DenominationField()
+
     class Meta:
         model = AvailableCash
         fields = "__all__"
+        read_only_fields = ["version"]
+
+class AvailableCashReadSerializer(PlainSerializer):
+    """
+    Available Cash read-only serializer building plain dicts, with the
+    output of AvailableCashSerializer without its field introspection.
+    """
+    def to_representation(self, instance):
+        return {
+            "id": instance.id,
+            "currency_type": instance.currency_type_id,
+            "quantity": instance.quantity,
+            "version": instance.version,
+            "updated_at": self.datetime_representation(instance.updated_at)
+        }
+
+class AvailableCashStateSerializer(serializers.Serializer):
+    """Available Cash state serializer for cached rows."""
+    id = serializers.IntegerField(read_only=True)
+    quantity = serializers.IntegerField(read_only=True)
+    updated_at = serializers.DateTimeField(read_only=True)
+    currency_type = serializers.IntegerField(read_only=True)
 
 class PaymentSerializer(serializers.ModelSerializer):
     """Payment serializer."""
@@ -25,20 +127,57 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = ["amount", "total_payment"]
 
-class PaymentFormSerializer(serializers.ModelSerializer):
-    """Payment Form serializer."""
-    class Meta:
-        model = PaymentForm
-        fields = ["currency_type", "quantity"]
-
-class PaymentFormCreateSerializer(serializers.ModelSerializer):
-    """Payment Form Create serializer."""
-    class Meta:
-        model = PaymentForm
-        fields = "__all__"
-
 class TransactionLogSerializer(serializers.ModelSerializer):
     """Transaction Log serializer."""
     class Meta:
         model = TransactionLog
         fields = "__all__"
+
+class TransactionLogReadSerializer(PlainSerializer):
+    """
+    Transaction Log read-only serializer building plain dicts, with the
+    output of TransactionLogSerializer without its field introspection.
+    """
+    def to_representation(self, instance):
+        return {
+            "id": instance.id,
+            "register": instance.register_id,
+            "transaction_type": instance.transaction_type,
+            "amount": instance.amount,
+            "balance": instance.balance,
+            "created_at": self.datetime_representation(instance.created_at)
+        }
+
+class CashHistorySerializer(serializers.Serializer):
+    """Cash history filter serializer."""
+    date = serializers.DateTimeField()
+    include_logs = serializers.BooleanField(default=False)
+
+class DrawerHistorySerializer(serializers.Serializer):
+    """Drawer history filter serializer."""
+    date = serializers.DateTimeField()
+
+class TransactionSummarySerializer(serializers.ModelSerializer):
+    """Transaction summary serializer."""
+    net = serializers.ReadOnlyField()
+
+    class Meta:
+        model = TransactionSummary
+        fields = ["period_start", "income", "outcome", "payment_count", "net"]
+
+class TransactionSummaryFilterSerializer(serializers.Serializer):
+    """Transaction summary filter serializer."""
+    def get_fields(self):
+        # "from" can not be declared as an attribute.
+        return {
+            "from": serializers.DateTimeField(),
+            "to": serializers.DateTimeField(),
+            "granularity": serializers.ChoiceField(
+                choices=TransactionSummary.GRANULARITY_CHOICES,
+                default="day")
+        }
+
+    def validate(self, data):
+        if data["from"] > data["to"]:
+            raise serializers.ValidationError("from must not be after to.")
+        return data
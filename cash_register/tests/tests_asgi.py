@@ -0,0 +1,119 @@
+"""ASGI test cases."""
+
+# Django
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination
+
+# Views
+from cash_register.exceptions import QueryBudgetExceeded
+from cash_register.views import AvailableCashViewSet, PaymentFormViewSet
+
+# Utils
+from unittest import mock
+import asyncio
+
+
+class ASGITestCase(TestCase):
+    """ASGI test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyDenomination.objects.create(currency_type=20000)
+        CurrencyDenomination.objects.create(currency_type=10000)
+
+        AvailableCash.objects.create(currency_type_id=20000, quantity=5)
+        AvailableCash.objects.create(currency_type_id=10000, quantity=10)
+
+    def setUp(self):
+        self.async_client = AsyncClient()
+
+    def test_check_status(self):
+        """Valid test to check the API status."""
+
+        response = self.client.get(reverse("check-status"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), ["API working"])
+
+    async def test_async_current_state(self):
+        """Valid test to retrieve the current state from the async client."""
+
+        response = await self.async_client.get(reverse("current-state"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_amount"], 200000)
+
+    async def test_async_payment_create(self):
+        """Valid test to create a payment from the async client."""
+
+        response = await self.async_client.post(reverse("payments-list"), {
+            "amount": 10000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        },
+                                                content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()[-1], {"total_change": 10000})
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    async def test_async_query_budget_exceeded(self):
+        """Invalid test when an async request goes over its query budget."""
+
+        with mock.patch.dict(PaymentFormViewSet.query_budgets, {"list": 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.get(reverse("payments-list"))
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    async def test_async_sync_view_query_budget_exceeded(self):
+        """Invalid test when a sync view served async goes over its budget."""
+
+        with mock.patch.dict(AvailableCashViewSet.query_budgets, {"list": 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.get(reverse("available-cash-list"))
+
+    @override_settings(QUERY_COUNT_HEADER=True)
+    async def test_async_sync_view_query_count(self):
+        """Valid test to count the queries a sync view runs in its thread."""
+
+        response = await self.async_client.get(reverse("available-cash-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Query-Count"], "1")
+
+    def test_asgi_application(self):
+        """Valid test to serve a request through the ASGI entry point."""
+
+        from asgiref.sync import async_to_sync
+        from main.asgi import application
+
+        messages = []
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            # The client stays connected until the response is sent.
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        # Like the test client, keep the connection of the test transaction
+        # open across the request signals.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(application)({
+                "type": "http",
+                "method": "GET",
+                "path": reverse("check-status"),
+                "query_string": b"",
+                "headers": [(b"host", b"localhost")],
+            }, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        self.assertEqual(messages[0]["status"], 200)
@@ -5,7 +5,7 @@ from django.test import TestCase
 from django.urls import reverse
 
 # Models
-from cash_register.models import AvailableCash, CurrencyDenomination
+from cash_register.models import AvailableCash, CurrencyDenomination, TransactionLog
 
 # Utils
 import json
@@ -53,3 +53,20 @@ class CashRegisterTestCase(TestCase):
         response_data = json.loads(response.content)
         self.assertEqual(response_data["total_amount"], 211500)
         self.assertEqual(response.status_code, 200)
+
+    def test_available_cash_empty_cash_register_logs_total(self):
+        """Valid test to log the total amount when emptying the register."""
+
+        self.client.get(reverse("empty-register"), formal="json")
+        self.assertEqual(TransactionLog.objects.get().amount, 211500)
+        self.assertFalse(AvailableCash.objects.exclude(quantity=0).exists())
+
+    def test_available_cash_empty_without_cash(self):
+        """Valid test to empty and read a register without available cash."""
+
+        AvailableCash.objects.all().delete()
+        response = self.client.get(reverse("empty-register"), formal="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("current-state"), formal="json")
+        response_data = json.loads(response.content)
+        self.assertEqual(response_data["total_amount"], 0)
@@ -0,0 +1,103 @@
+"""Cash register state cache test cases."""
+
+# Django
+from django.db import transaction
+from django.db.models import F
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+# Models
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, CurrencyDenomination, Register
+
+# Cache
+from cash_register.cache import bump_version, cash_register_cache
+
+# Utils
+from unittest import mock
+import json
+
+
+class CashRegisterCacheTestCase(TransactionTestCase):
+    """Cash register state cache test cases."""
+    def setUp(self):
+        # Flushed by previous test cases, unlike the migration data.
+        Register.objects.get_or_create(pk=DEFAULT_REGISTER_ID,
+                                       defaults={"name": "Principal"})
+        CurrencyDenomination.objects.create(currency_type=20000)
+        CurrencyDenomination.objects.create(currency_type=10000)
+        CurrencyDenomination.objects.create(currency_type=500)
+
+        AvailableCash.objects.create(currency_type_id=20000, quantity=5)
+        AvailableCash.objects.create(currency_type_id=10000, quantity=10)
+        AvailableCash.objects.create(currency_type_id=500, quantity=15)
+        cash_register_cache.clear()
+
+    def _current_total(self):
+        response = self.client.get(reverse("current-state"))
+        return json.loads(response.content)["total_amount"]
+
+    def test_cache_current_state_hit(self):
+        """Valid test to read current state with a version lookup only."""
+
+        self.assertEqual(self._current_total(), 207500)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._current_total(), 207500)
+
+    def test_cache_write_through_payment(self):
+        """Valid test to update cached state after a payment."""
+
+        self._current_total()
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 30000,
+            "payment_form": [{
+                "quantity": 2,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._current_total(), 237500)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=20000).quantity, 7)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=10000).quantity, 9)
+
+    def test_cache_invalidation_from_other_worker(self):
+        """Valid test to reload cached state when the version changes."""
+
+        self._current_total()
+        AvailableCash.objects.filter(currency_type_id=500).update(quantity=0)
+        bump_version(DEFAULT_REGISTER_ID)
+        self.assertEqual(self._current_total(), 200000)
+
+    def test_cache_payment_between_version_and_rows(self):
+        """Valid test to cache rows under the version they were read with."""
+
+        load = cash_register_cache._load
+        payments = []
+
+        def load_after_payment(register_id):
+            # A payment of one 10000 commits after the version lookup.
+            if not payments:
+                with transaction.atomic():
+                    AvailableCash.objects.filter(
+                        currency_type_id=10000).update(quantity=F("quantity") +
+                                                       1)
+                    version = bump_version(DEFAULT_REGISTER_ID)
+                    cash_register_cache.write_through(
+                        DEFAULT_REGISTER_ID,
+                        version,
+                        deltas={10000: 1},
+                        updated_at=timezone.now())
+                payments.append(version)
+            return load(register_id)
+
+        with mock.patch.object(cash_register_cache, "_load",
+                               side_effect=load_after_payment):
+            state = cash_register_cache.get_state(DEFAULT_REGISTER_ID)
+        self.assertEqual(state.version, payments[0])
+        self.assertEqual(state.quantities[10000], 11)
+        # The write-through of the payment must not count it twice.
+        with self.assertNumQueries(1):
+            self.assertEqual(self._current_total(), 217500)
@@ -0,0 +1,146 @@
+"""Change-making engine test cases."""
+
+# Django
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+# Change engine
+from cash_register.cache import change_plan_cache
+from cash_register.change import ChangePlanCache, make_change
+
+# Utils
+from unittest import mock
+import itertools
+import random
+
+
+class MakeChangeTestCase(SimpleTestCase):
+    """Change-making engine test cases."""
+    def test_make_change_zero_amount(self):
+        """Valid test to return no pieces for zero change."""
+
+        self.assertEqual(make_change(0, {500: 1}), [])
+
+    def test_make_change_limited_stock(self):
+        """Valid test to find change where greedy gets stuck."""
+
+        self.assertEqual(make_change(600, {500: 1, 200: 3}), [(200, 3)])
+
+    def test_make_change_fewest_pieces(self):
+        """Valid test to return the combination with fewest pieces."""
+
+        change = make_change(1200, {900: 1, 600: 2, 100: 6})
+        self.assertEqual(change, [(600, 2)])
+
+    def test_make_change_respects_stock(self):
+        """Valid test to never return more pieces than available."""
+
+        change = make_change(150500, {
+            20000: 5,
+            10000: 10,
+            500: 15,
+            200: 20
+        })
+        self.assertEqual(change, [(20000, 5), (10000, 5), (500, 1)])
+
+    def test_make_change_missing_change(self):
+        """Invalid test when stock can not return the amount."""
+
+        self.assertIsNone(make_change(300, {500: 3, 200: 5}))
+        self.assertIsNone(make_change(1000, {200: 2}))
+        self.assertIsNone(make_change(-100, {100: 1}))
+
+    def test_make_change_missing_change_large_stock(self):
+        """Invalid test when a large stock can not return the amount."""
+
+        stock = {
+            denomination: 3000
+            for denomination in (100000, 50000, 20000, 10000, 5000, 1000, 500)
+        }
+        stock[200] = 1
+        # Odd hundreds need an odd number of 200 pieces beyond the first.
+        for amount in (100300, 1000300, 10000300):
+            with self.subTest(amount=amount):
+                self.assertIsNone(make_change(amount, stock))
+        self.assertEqual(make_change(10000700, stock),
+                         [(100000, 100), (500, 1), (200, 1)])
+
+    def test_make_change_matches_exhaustive_search(self):
+        """Valid test to return as few pieces as an exhaustive search."""
+
+        generator = random.Random(0)
+        for _ in range(200):
+            stock = {
+                denomination: generator.randint(0, 4)
+                for denomination in (1000, 500, 200, 50)
+            }
+            amount = generator.randrange(0, 4000, 50)
+            fewest = None
+            for counts in itertools.product(
+                    *(range(quantity + 1) for quantity in stock.values())):
+                if sum(denomination * count for denomination, count in zip(
+                        stock, counts)) == amount:
+                    if fewest is None or sum(counts) < fewest:
+                        fewest = sum(counts)
+            # Also prune with the reachable amounts from the first lookup.
+            for reachable_after in (256, 0):
+                with mock.patch("cash_register.change._REACHABLE_AFTER",
+                                reachable_after):
+                    change = make_change(amount, stock)
+                with self.subTest(amount=amount, stock=stock,
+                                  reachable_after=reachable_after):
+                    if fewest is None:
+                        self.assertIsNone(change)
+                        continue
+                    self.assertEqual(sum(count for _, count in change),
+                                     fewest)
+                    self.assertEqual(
+                        sum(denomination * count
+                            for denomination, count in change), amount)
+
+
+class ChangePlanCacheTestCase(SimpleTestCase):
+    """Change plan cache test cases."""
+    def test_change_plan_cache_hit(self):
+        """Valid test to reuse the plan of an amount with the same stock."""
+
+        cache = ChangePlanCache(max_size=10)
+        stock = {500: 3, 200: 5}
+        self.assertEqual(cache.make_change(900, stock), ((500, 1), (200, 2)))
+        self.assertEqual(cache.make_change(900, stock), ((500, 1), (200, 2)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_change_plan_cache_stock_change(self):
+        """Valid test to recalculate the plan when its stock changes."""
+
+        cache = ChangePlanCache(max_size=10)
+        cache.make_change(900, {500: 3, 200: 5})
+        self.assertIsNone(cache.make_change(900, {500: 0, 200: 5}))
+        self.assertEqual(cache.misses, 2)
+        # Pieces the change could never use leave the plan valid.
+        cache.make_change(900, {500: 3, 200: 5, 1000: 7})
+        cache.make_change(900, {500: 4, 200: 9})
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_change_plan_cache_lru(self):
+        """Valid test to evict the least recently used plans."""
+
+        cache = ChangePlanCache(max_size=2)
+        stock = {100: 50}
+        cache.make_change(100, stock)
+        cache.make_change(200, stock)
+        cache.make_change(100, stock)
+        cache.make_change(300, stock)
+        cache.make_change(200, stock)
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_change_plan_stats(self):
+        """Valid test to expose the counters of the change plan cache."""
+
+        change_plan_cache.clear()
+        response = self.client.get(reverse("change-plan-stats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["hits"], 0)
+        self.assertEqual(response.json()["max_size"],
+                         change_plan_cache.max_size)
@@ -0,0 +1,235 @@
+"""Available cash concurrency test cases."""
+
+# Django
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+# Models
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, CurrencyDenomination, Register, TransactionLog
+
+# Utils
+from cash_register.cache import cash_register_cache
+from cash_register.metrics import CASH_UPDATE_CONFLICTS
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+import json
+
+
+class CompareAndSwapTestCase(TestCase):
+    """Optimistic available cash update test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyDenomination.objects.create(currency_type=20000)
+        CurrencyDenomination.objects.create(currency_type=10000)
+        CurrencyDenomination.objects.create(currency_type=500)
+        CurrencyDenomination.objects.create(currency_type=200)
+
+        AvailableCash.objects.create(currency_type_id=20000, quantity=5)
+        AvailableCash.objects.create(currency_type_id=10000, quantity=10)
+        AvailableCash.objects.create(currency_type_id=500, quantity=15)
+        AvailableCash.objects.create(currency_type_id=200, quantity=20)
+
+    def test_compare_and_swap_stale_version(self):
+        """Invalid test to update available cash read before another update."""
+
+        stale = AvailableCash.objects.get(currency_type_id=500)
+        current = AvailableCash.objects.get(currency_type_id=500)
+        self.assertTrue(
+            AvailableCash.objects.compare_and_swap(current, quantity=7))
+        self.assertFalse(
+            AvailableCash.objects.compare_and_swap(stale, quantity=9))
+        available_cash = AvailableCash.objects.get(currency_type_id=500)
+        self.assertEqual(available_cash.quantity, 7)
+        self.assertEqual(available_cash.version, current.version)
+
+    def test_payment_bumps_row_versions(self):
+        """Valid test to bump the version of the rows a payment changes."""
+
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 10000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        versions = dict(
+            AvailableCash.objects.values_list("currency_type", "version"))
+        self.assertEqual(versions, {20000: 1, 10000: 1, 500: 0, 200: 0})
+
+    @override_settings(CASH_UPDATE_RETRIES=0)
+    def test_payment_locked_rows(self):
+        """Valid test to create payments locking the drawer rows."""
+
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 10000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=10000).quantity, 9)
+
+    def test_available_cash_update_stale_instance(self):
+        """Valid test to update available cash changed by another request."""
+
+        available_cash = AvailableCash.objects.get(currency_type_id=500)
+        AvailableCash.objects.filter(pk=available_cash.pk).update(
+            quantity=3, version=5)
+        response = self.client.patch(
+            reverse("available-cash-detail", args=[available_cash.pk]),
+            {"quantity": 4},
+            content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["version"], 6)
+        self.assertEqual(
+            AvailableCash.objects.get(pk=available_cash.pk).quantity, 4)
+
+
+class StaleStockTestCase(TransactionTestCase):
+    """Payments planned on a stale cached state test cases."""
+    def setUp(self):
+        # Flushed by previous test cases, unlike the migration data.
+        Register.objects.get_or_create(pk=DEFAULT_REGISTER_ID,
+                                       defaults={"name": "Principal"})
+        for currency_type, quantity in ((20000, 5), (10000, 10), (500, 15),
+                                        (200, 20)):
+            CurrencyDenomination.objects.create(currency_type=currency_type)
+            AvailableCash.objects.create(currency_type_id=currency_type,
+                                         quantity=quantity)
+        cash_register_cache.clear()
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_payment_retried_on_changed_stock(self):
+        """Valid test to plan the change again when the stock changed."""
+
+        self.client.get(reverse("current-state"))
+        # Taken by another worker since the state was cached.
+        AvailableCash.objects.filter(currency_type_id=10000).update(quantity=0)
+        conflicts = CASH_UPDATE_CONFLICTS.value("stock_changed")
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 10000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sum(cash["currency_type"] * cash["quantity"]
+                for cash in json.loads(response.content)[:-1]), 10000)
+        self.assertGreater(CASH_UPDATE_CONFLICTS.value("stock_changed"),
+                           conflicts)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=10000).quantity, 0)
+
+
+@skipUnless(connection.vendor == "postgresql",
+            "SQLite serializes every write transaction.")
+class ConcurrentPaymentsTestCase(TransactionTestCase):
+    """Concurrent payments test cases, on PostgreSQL only."""
+    workers = 8
+    payments = 200
+
+    def setUp(self):
+        Register.objects.get_or_create(pk=DEFAULT_REGISTER_ID,
+                                       defaults={"name": "Principal"})
+        for currency_type in (20000, 10000, 5000, 2000, 1000, 500):
+            CurrencyDenomination.objects.create(currency_type=currency_type)
+            AvailableCash.objects.create(currency_type_id=currency_type,
+                                         quantity=1000)
+        cash_register_cache.clear()
+
+    def _total(self):
+        return sum(currency_type * quantity
+                   for currency_type, quantity in AvailableCash.objects.
+                   values_list("currency_type", "quantity"))
+
+    def _pay(self, index):
+        from django.test import Client
+        try:
+            response = Client().post(reverse("payments-list"), {
+                "amount": 1000 + 500 * (index % 37),
+                "payment_form": [{
+                    "quantity": 1,
+                    "currency_type": 20000
+                }]
+            }, content_type="application/json")
+            return response.status_code
+        finally:
+            connections.close_all()
+
+    def _run(self):
+        total = self._total()
+        with ThreadPoolExecutor(self.workers) as executor:
+            statuses = list(executor.map(self._pay, range(self.payments)))
+        self.assertEqual(statuses, [201] * self.payments)
+        # No lost update: the drawer grew by every amount paid.
+        income = sum(1000 + 500 * (index % 37)
+                     for index in range(self.payments))
+        self.assertEqual(self._total(), total + income)
+        self.assertEqual(
+            TransactionLog.objects.filter(transaction_type="income").count(),
+            self.payments)
+
+    def test_concurrent_payments_optimistic(self):
+        """Valid test to create concurrent payments without lost updates."""
+
+        self._run()
+
+    @override_settings(CASH_UPDATE_RETRIES=0)
+    def test_concurrent_payments_locked(self):
+        """Valid test to create concurrent payments locking the rows."""
+
+        self._run()
+
+    def _mixed(self, index):
+        from django.test import Client
+        client = Client()
+        payment = {
+            "amount": 1000 + 500 * (index % 41),
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }
+        try:
+            if index % 25 == 0:
+                response = client.get(reverse("empty-register"))
+            elif index % 5 == 0:
+                response = client.post(reverse("payments-batch"),
+                                       [payment] * 3,
+                                       content_type="application/json")
+            else:
+                response = client.post(reverse("payments-list"),
+                                       payment,
+                                       content_type="application/json")
+            return response.status_code
+        finally:
+            connections.close_all()
+
+    def _run_mixed(self):
+        total = self._total()
+        with ThreadPoolExecutor(self.workers) as executor:
+            statuses = set(executor.map(self._mixed, range(self.payments)))
+        # Payments run out of change once the drawer is emptied.
+        self.assertLessEqual(statuses, {200, 201, 400})
+        # Every change of the drawer went through the running balance.
+        self.assertEqual(
+            self._total(),
+            total + TransactionLog.objects.order_by("-created_at", "-id").
+            values_list("balance", flat=True).first())
+
+    def test_concurrent_mixed_writers_optimistic(self):
+        """Valid test to mix payments, batches and emptying without deadlock."""
+
+        self._run_mixed()
+
+    @override_settings(CASH_UPDATE_RETRIES=0)
+    def test_concurrent_mixed_writers_locked(self):
+        """Valid test to mix locked payments, batches and emptying."""
+
+        self._run_mixed()
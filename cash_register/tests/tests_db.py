@@ -0,0 +1,45 @@
+"""Database connection helpers test cases."""
+
+# Django
+from django.test import SimpleTestCase
+
+# Helpers
+from cash_register.db import check_connections_health
+
+# Utils
+from unittest import mock
+
+
+class ConnectionHealthTestCase(SimpleTestCase):
+    """Connection health check test cases."""
+    def _connection(self, usable, health_checks=True):
+        connection = mock.Mock(in_atomic_block=False)
+        connection.settings_dict = {"CONN_HEALTH_CHECKS": health_checks}
+        connection.is_usable.return_value = usable
+        return connection
+
+    def _check(self, connection):
+        with mock.patch("cash_register.db.connections") as connections:
+            connections.all.return_value = [connection]
+            check_connections_health()
+
+    def test_health_check_closes_broken_connection(self):
+        """Valid test to close a persistent connection that stopped working."""
+
+        connection = self._connection(usable=False)
+        self._check(connection)
+        connection.close.assert_called_once_with()
+
+    def test_health_check_keeps_usable_connection(self):
+        """Valid test to reuse a persistent connection that still works."""
+
+        connection = self._connection(usable=True)
+        self._check(connection)
+        connection.close.assert_not_called()
+
+    def test_health_check_disabled(self):
+        """Valid test to skip the check when health checks are disabled."""
+
+        connection = self._connection(usable=False, health_checks=False)
+        self._check(connection)
+        connection.is_usable.assert_not_called()
@@ -0,0 +1,77 @@
+"""Denomination registry test cases."""
+
+# Django
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import translation
+
+# Django Rest Framework
+from rest_framework import serializers
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination
+
+# Utils
+from cash_register.denominations import denomination_registry
+import json
+
+
+class DenominationRegistryTestCase(TestCase):
+    """Denomination registry test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyDenomination.objects.create(currency_type=500)
+        CurrencyDenomination.objects.create(currency_type=10000)
+        CurrencyDenomination.objects.create(currency_type=2000)
+
+    def test_denominations_sorted_from_memory(self):
+        """Valid test to read the sorted denominations without queries."""
+
+        denomination_registry.get()
+        with self.assertNumQueries(0):
+            denominations = denomination_registry.get()
+            self.assertEqual(denominations.values, (10000, 2000, 500))
+            self.assertEqual(denomination_registry.unknown({500, 2000}),
+                             set())
+
+    def test_denominations_refreshed_by_signals(self):
+        """Valid test to see admin edits of the denominations."""
+
+        denomination_registry.get()
+        denomination = CurrencyDenomination.objects.create(currency_type=50)
+        self.assertIn(50, denomination_registry.get())
+
+        denomination.delete()
+        self.assertNotIn(50, denomination_registry.get())
+
+    def test_available_cash_create_unknown_denomination(self):
+        """Invalid test to add Available Cash of an unknown denomination."""
+
+        response = self.client.post(reverse("available-cash-list"), {
+            "currency_type": 7,
+            "quantity": 1
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("currency_type", json.loads(response.content))
+        self.assertFalse(AvailableCash.objects.exists())
+
+    def test_available_cash_update_malformed_denomination(self):
+        """Invalid test to update Available Cash with a malformed currency type."""
+
+        available_cash = AvailableCash.objects.create(currency_type_id=500,
+                                                      quantity=1)
+        url = reverse("available-cash-detail", args=[available_cash.pk])
+        for method in ("put", "patch"):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(url, {
+                    "currency_type": "--500",
+                    "quantity": 2
+                }, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                with translation.override(settings.LANGUAGE_CODE):
+                    message = str(serializers.IntegerField.
+                                  default_error_messages["invalid"])
+                self.assertEqual(json.loads(response.content),
+                                 {"currency_type": [message]})
+        self.assertEqual(AvailableCash.objects.get().quantity, 1)
@@ -0,0 +1,92 @@
+"""Drawer history test cases."""
+
+# Django
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+# Models
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, DrawerEvent, DrawerSnapshot
+
+# Utils
+from io import StringIO
+
+
+class DrawerHistoryTestCase(TestCase):
+    """Drawer history test cases."""
+    def setUp(self):
+        call_command("seed", verbosity=0, stdout=StringIO())
+
+    def current_quantities(self):
+        return dict(
+            AvailableCash.objects.filter(quantity__gt=0).order_by(
+                "currency_type").values_list("currency_type", "quantity"))
+
+    def pay(self, amount, currency_type, quantity):
+        response = self.client.post(reverse("payments-list"), {
+            "amount": amount,
+            "payment_form": [{
+                "quantity": quantity,
+                "currency_type": currency_type
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_drawer_history_after_movements(self):
+        """Valid test to rebuild the drawer before and after each change."""
+
+        states = [(timezone.now(), self.current_quantities())]
+        self.pay(10000, 20000, 1)
+        states.append((timezone.now(), self.current_quantities()))
+        available_cash = AvailableCash.objects.get(currency_type=50000)
+        response = self.client.patch(
+            reverse("available-cash-detail", args=[available_cash.id]),
+            {"quantity": available_cash.quantity + 3},
+            content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        states.append((timezone.now(), self.current_quantities()))
+        self.client.get(reverse("empty-register"))
+        states.append((timezone.now(), {}))
+
+        for date, quantities in states:
+            self.assertEqual(
+                DrawerEvent.objects.state_at(DEFAULT_REGISTER_ID, date),
+                quantities)
+
+    @override_settings(DRAWER_SNAPSHOT_INTERVAL=2)
+    def test_drawer_history_from_snapshots(self):
+        """Valid test to replay only the events after the last snapshot."""
+
+        for _ in range(4):
+            self.pay(10000, 20000, 1)
+        snapshot = DrawerSnapshot.objects.order_by("-version").first()
+        # Seeding takes the first one.
+        self.assertEqual(DrawerSnapshot.objects.count(), 3)
+        self.assertEqual(
+            DrawerEvent.objects.filter(version__gt=snapshot.version).count(),
+            2)
+        with self.assertNumQueries(2):
+            quantities = DrawerEvent.objects.state_at(DEFAULT_REGISTER_ID,
+                                                      timezone.now())
+        self.assertEqual(quantities, self.current_quantities())
+
+    def test_drawer_history_endpoint(self):
+        """Valid test to retrieve the drawer at a past date."""
+
+        date = timezone.now()
+        self.pay(10000, 20000, 1)
+        response = self.client.get(reverse("available-cash-history"),
+                                   {"date": date.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        quantities = DrawerEvent.objects.state_at(DEFAULT_REGISTER_ID, date)
+        self.assertEqual(response.json()["denominations"], [{
+            "currency_type": currency_type,
+            "quantity": quantity
+        } for currency_type, quantity in quantities.items()])
+        self.assertEqual(
+            response.json()["total_amount"],
+            sum(currency_type * quantity
+                for currency_type, quantity in quantities.items()))
+        response = self.client.get(reverse("available-cash-history"))
+        self.assertEqual(response.status_code, 400)
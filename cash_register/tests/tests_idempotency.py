@@ -0,0 +1,110 @@
+"""Idempotency key test cases."""
+
+# Django
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+# Models
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, CurrencyDenomination, IdempotencyKey, Payment, TransactionLog
+
+# Idempotency
+from cash_register.idempotency import IdempotencyCache, idempotency_cache
+
+# Utils
+from datetime import timedelta
+from io import StringIO
+
+
+class IdempotencyKeyTestCase(TestCase):
+    """Idempotency key test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyDenomination.objects.create(currency_type=20000)
+        CurrencyDenomination.objects.create(currency_type=10000)
+
+        AvailableCash.objects.create(currency_type_id=20000, quantity=5)
+        AvailableCash.objects.create(currency_type_id=10000, quantity=10)
+
+    def setUp(self):
+        idempotency_cache.clear()
+
+    def _pay(self, key, amount=10000):
+        return self.client.post(reverse("payments-list"), {
+            "amount": amount,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        },
+                                content_type="application/json",
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_idempotency_key_retry(self):
+        """Valid test to replay a retried payment without paying twice."""
+
+        response = self._pay("sale-1")
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(1):
+            retry = self._pay("sale-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), response.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(TransactionLog.objects.count(), 2)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=10000).quantity, 9)
+
+    def test_idempotency_key_reused(self):
+        """Invalid test to send a key again with a different payment."""
+
+        self._pay("sale-1")
+        response = self._pay("sale-1", amount=20000)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_idempotency_key_too_long(self):
+        """Invalid test to send a key longer than 255 characters."""
+
+        response = self._pay("k" * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Payment.objects.count(), 0)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=0)
+    def test_idempotency_key_expired(self):
+        """Valid test to apply again a payment whose key expired."""
+
+        self._pay("sale-1")
+        response = self._pay("sale-1")
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Payment.objects.count(), 2)
+
+    def test_idempotency_key_purge(self):
+        """Valid test to purge the keys older than the TTL."""
+
+        self._pay("sale-1")
+        self._pay("sale-2")
+        IdempotencyKey.objects.filter(key="sale-1").update(
+            created_at=timezone.now() - timedelta(days=2))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["sale-2"])
+
+    def test_idempotency_cache_lru(self):
+        """Valid test to evict the least recently used responses."""
+
+        cache = IdempotencyCache(max_size=2)
+        stored = [
+            IdempotencyKey(key=key, created_at=timezone.now())
+            for key in ("a", "b", "c")
+        ]
+        cache.set(DEFAULT_REGISTER_ID, "a", stored[0])
+        cache.set(DEFAULT_REGISTER_ID, "b", stored[1])
+        cache.get(DEFAULT_REGISTER_ID, "a")
+        cache.set(DEFAULT_REGISTER_ID, "c", stored[2])
+        self.assertIs(cache.get(DEFAULT_REGISTER_ID, "a"), stored[0])
+        self.assertIsNone(cache.get(DEFAULT_REGISTER_ID, "b"))
+        self.assertIs(cache.get(DEFAULT_REGISTER_ID, "c"), stored[2])
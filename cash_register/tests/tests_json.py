@@ -0,0 +1,78 @@
+"""JSON rendering and parsing test cases."""
+
+# Django
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+# Django Rest Framework
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination, TransactionLog
+
+# Serializers
+from cash_register.serializers import AvailableCashReadSerializer, AvailableCashSerializer, TransactionLogReadSerializer, TransactionLogSerializer
+
+# Utils
+from cash_register.parsers import FastJSONParser
+from cash_register.renderers import FastJSONRenderer
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+
+class JSONTestCase(TestCase):
+    """JSON rendering and parsing test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        for currency_type in (20000, 500):
+            CurrencyDenomination.objects.create(currency_type=currency_type)
+            AvailableCash.objects.create(currency_type_id=currency_type,
+                                         quantity=4)
+        TransactionLog.objects.append([
+            TransactionLog(transaction_type="income", amount=20000),
+            TransactionLog(transaction_type="outcome", amount=500)
+        ])
+
+    def test_json_read_serializers_match_model_serializers(self):
+        """Valid test to build the output of the model serializers."""
+
+        logs = TransactionLog.objects.all()
+        self.assertEqual(TransactionLogReadSerializer(logs, many=True).data,
+                         TransactionLogSerializer(logs, many=True).data)
+        cash = AvailableCash.objects.all()
+        self.assertEqual(AvailableCashReadSerializer(cash, many=True).data,
+                         AvailableCashSerializer(cash, many=True).data)
+
+    def test_json_renderer_matches_json_renderer(self):
+        """Valid test to render the same bytes as JSONRenderer."""
+
+        data = {
+            "amount": Decimal("10.50"),
+            "date": datetime(2021, 2, 16, 12, tzinfo=dt_timezone.utc),
+            "name": "caja\u2028ñ",
+            1: [None, True, 1.5]
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch("cash_register.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_json_parser(self):
+        """Valid test to parse bodies and reject malformed ones."""
+
+        body = b'{"amount": 100, "name": "caja \xc3\xb1"}'
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), {
+            "amount": 100,
+            "name": "caja ñ"
+        })
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"amount": }'))
+        response = self.client.post(reverse("payments-list"),
+                                    b'{"amount": ',
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
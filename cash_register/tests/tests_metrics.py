@@ -0,0 +1,77 @@
+"""Metrics test cases."""
+
+# Django
+from django.test import TestCase
+from django.urls import reverse
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination
+
+# Utils
+from cash_register.metrics import CHANGE_FAILURES, REQUESTS, Histogram
+
+
+class MetricsTestCase(TestCase):
+    """Metrics test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        for currency_type in (20000, 10000, 500):
+            CurrencyDenomination.objects.create(currency_type=currency_type)
+            AvailableCash.objects.create(currency_type_id=currency_type,
+                                         quantity=2)
+
+    def test_metrics_endpoint(self):
+        """Valid test to expose the metrics in the text exposition format."""
+
+        self.client.get(reverse("current-state"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        self.assertIn("# TYPE cash_register_request_duration_seconds histogram",
+                      content)
+        self.assertIn(
+            'cash_register_request_queries_bucket{route="api/available-cash/'
+            'current-state/",method="GET",le="+Inf"}', content)
+        self.assertIn("# TYPE cash_register_change_plan_cache_hits_total "
+                      "counter", content)
+
+    def test_metrics_requests_per_route(self):
+        """Valid test to count requests per route pattern and status."""
+
+        route = "api/registers/<int:register_id>/available-cash/current-state/"
+        before = REQUESTS.value(route, "GET", 200)
+        for register_id in (1, 1):
+            self.client.get(
+                reverse("register-current-state",
+                        kwargs={"register_id": register_id}))
+        self.assertEqual(REQUESTS.value(route, "GET", 200), before + 2)
+        self.client.get("/not-a-route/")
+        self.assertGreater(REQUESTS.value("unmatched", "GET", 404), 0)
+
+    def test_metrics_change_failures(self):
+        """Valid test to count the payments rejected for missing change."""
+
+        before = CHANGE_FAILURES.value("missing_change")
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 19900,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(CHANGE_FAILURES.value("missing_change"), before + 1)
+
+    def test_metrics_histogram_buckets(self):
+        """Valid test to render cumulative histogram buckets."""
+
+        histogram = Histogram("latency", "Latency.", buckets=(1, 5))
+        for value in (0.5, 2, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.samples(), [
+            'latency_bucket{le="1"} 1', 'latency_bucket{le="5"} 2',
+            'latency_bucket{le="+Inf"} 3', "latency_sum 12.5",
+            "latency_count 3"
+        ])
@@ -1,11 +1,18 @@
 """Payment form test cases."""
 
 # Django
+from django.db import transaction
 from django.test import TestCase
 from django.urls import reverse
 
 # Models
-from cash_register.models import AvailableCash, CurrencyDenomination
+from cash_register.models import AvailableCash, CurrencyDenomination, Payment, TransactionLog
+
+# Views
+from cash_register.denominations import denomination_registry
+from cash_register.exceptions import MissingChangeError
+from cash_register.partitions import create_partitions
+from cash_register.views import PaymentFormViewSet
 
 # Utils
 import json
@@ -48,3 +55,257 @@ class PaymentFormTestCase(TestCase):
             "quantity": 5
         })
         self.assertEqual(response.status_code, 201)
+
+    def test_payment_create_change_with_limited_denominations(self):
+        """Valid test to return change that a greedy walk can not find."""
+
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 19400,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        response_data = json.loads(response.content)
+        self.assertEqual(response_data[0], {
+            "currency_type": 200,
+            "quantity": 3
+        })
+        self.assertEqual(response.status_code, 201)
+
+    def test_payment_create_missing_change(self):
+        """Invalid test when the cash register can not return the change."""
+
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 19950,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_payment_create_new_denomination(self):
+        """Valid test to store pieces without available cash yet."""
+
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 80000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 100000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=100000).quantity, 1)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=20000).quantity, 4)
+
+    def test_payment_update_cash_register_short_stock(self):
+        """Invalid test to update cash register without enough pieces."""
+
+        view = PaymentFormViewSet(kwargs={})
+        with self.assertRaises(MissingChangeError):
+            with transaction.atomic():
+                view._update_cash_register(
+                    [{"currency_type": 20000, "quantity": 1}],
+                    [{"currency_type": 500, "quantity": 16},
+                     {"currency_type": 200, "quantity": 1}],
+                    {20000: 5, 500: 16, 200: 20})
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=20000).quantity, 5)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=200).quantity, 20)
+
+    def test_payment_create_query_count(self):
+        """Valid test to create payments with a constant number of queries."""
+
+        payment_forms = [[{
+            "quantity": 1,
+            "currency_type": 20000
+        }], [{
+            "quantity": 8,
+            "currency_type": 10000
+        }, {
+            "quantity": 1,
+            "currency_type": 20000
+        }, {
+            "quantity": 1,
+            "currency_type": 500
+        }, {
+            "quantity": 1,
+            "currency_type": 200
+        }]]
+        denomination_registry.get()
+        # Partitions are remembered on commit, which test cases never reach.
+        create_partitions()
+        for payment_form in payment_forms:
+            with self.subTest(lines=len(payment_form)):
+                with self.assertNumQueries(14):
+                    response = self.client.post(reverse("payments-list"), {
+                        "amount": 20000,
+                        "payment_form": payment_form
+                    }, content_type="application/json")
+                self.assertEqual(response.status_code, 201)
+
+    def test_payment_create_unknown_denomination(self):
+        """Invalid test to add Payments with unknown currency types."""
+
+        response = self.client.post(reverse("payments-list"), {
+            "amount": 1000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 1000
+            }]
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=500).quantity, 15)
+
+    def test_payment_create_invalid_lines(self):
+        """Invalid test to add Payments with lines rejected without queries."""
+
+        denomination_registry.get()
+        payment_forms = {
+            "quantity": [{
+                "quantity": 0,
+                "currency_type": 20000
+            }],
+            "duplicated": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }, {
+                "quantity": 2,
+                "currency_type": 20000
+            }],
+            "empty": [],
+        }
+        for name, payment_form in payment_forms.items():
+            with self.subTest(name):
+                with self.assertNumQueries(0):
+                    response = self.client.post(reverse("payments-list"), {
+                        "amount": 1000,
+                        "payment_form": payment_form
+                    }, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("payment_form", response.json())
+        self.assertEqual(Payment.objects.count(), 0)
+
+    def test_payment_create_malformed_integers(self):
+        """Invalid test to add Payments with strings that are not integers."""
+
+        for value in ("--5", "--500", "\u00b2", "\uff15" + "00", "5.0", ""):
+            with self.subTest(value=value):
+                response = self.client.post(reverse("payments-list"), {
+                    "amount": value,
+                    "payment_form": [{
+                        "quantity": value,
+                        "currency_type": value
+                    }]
+                }, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("amount", response.json())
+
+                response = self.client.post(reverse("payments-batch"), [{
+                    "amount": 1000,
+                    "payment_form": [{
+                        "quantity": 1,
+                        "currency_type": value
+                    }]
+                }], content_type="application/json")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()[0]["status"], 400)
+        self.assertEqual(Payment.objects.count(), 0)
+
+    def test_payment_create_out_of_range_integers(self):
+        """Invalid test to add Payments that overflow the integer columns."""
+
+        bodies = {
+            "amount": {
+                "amount": 2147483648,
+                "payment_form": [{
+                    "quantity": 1,
+                    "currency_type": 20000
+                }]
+            },
+            "quantity": {
+                "amount": 0,
+                "payment_form": [{
+                    "quantity": 2147483648,
+                    "currency_type": 200
+                }]
+            },
+            "total_payment": {
+                "amount": 0,
+                "payment_form": [{
+                    "quantity": 107375,
+                    "currency_type": 20000
+                }]
+            },
+        }
+        for field, body in bodies.items():
+            with self.subTest(field):
+                response = self.client.post(reverse("payments-list"),
+                                            body,
+                                            content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                errors = response.json()
+                self.assertIn("2147483647", json.dumps(errors))
+                self.assertIn(field if field == "amount" else "payment_form",
+                              errors)
+        self.assertEqual(Payment.objects.count(), 0)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=200).quantity, 20)
+
+    def test_payment_batch(self):
+        """Valid test to add an ordered batch of Payments."""
+
+        response = self.client.post(reverse("payments-batch"), [{
+            "amount": 19400,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, {
+            "amount": 30000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 20000
+            }]
+        }, {
+            "amount": 1000,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 1000
+            }]
+        }, {
+            "amount": 9800,
+            "payment_form": [{
+                "quantity": 1,
+                "currency_type": 10000
+            }]
+        }], content_type="application/json")
+        response_data = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["status"] for result in response_data],
+                         [201, 400, 400, 201])
+        self.assertEqual(response_data[0]["data"], [{
+            "currency_type": 200,
+            "quantity": 3
+        }, {
+            "total_change": 600
+        }])
+        self.assertEqual(Payment.objects.count(), 2)
+        self.assertEqual(TransactionLog.objects.count(), 4)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=200).quantity, 16)
+        self.assertEqual(
+            AvailableCash.objects.get(currency_type_id=20000).quantity, 6)
+
+    def test_payment_batch_invalid_body(self):
+        """Invalid test to add a batch of Payments that is not a list."""
+
+        response = self.client.post(reverse("payments-batch"), {
+            "amount": 1000
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
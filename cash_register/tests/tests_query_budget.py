@@ -0,0 +1,60 @@
+"""Query budget test cases."""
+
+# Django
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination
+
+# Views
+from cash_register.exceptions import QueryBudgetExceeded
+from cash_register.views import AvailableCashViewSet
+
+# Utils
+from unittest import mock
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetTestCase(TestCase):
+    """Query budget test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        for currency_type in (100000, 20000, 10000, 500, 200):
+            CurrencyDenomination.objects.create(currency_type=currency_type)
+            AvailableCash.objects.create(currency_type_id=currency_type,
+                                         quantity=3)
+
+    def test_query_budget_list_without_n_plus_one(self):
+        """Valid test to list available cash with a single query."""
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("available-cash-list"))
+        self.assertEqual(len(response.json()), 5)
+
+    def test_query_budget_exceeded(self):
+        """Invalid test when a request goes over its query budget."""
+
+        with mock.patch.dict(AvailableCashViewSet.query_budgets,
+                             {"list": 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("available-cash-list"))
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_query_budget_exceeded_warning(self):
+        """Valid test to only log requests over budget outside tests."""
+
+        with mock.patch.dict(AvailableCashViewSet.query_budgets,
+                             {"list": 0}):
+            with self.assertLogs("cash_register.middleware", "WARNING"):
+                response = self.client.get(reverse("available-cash-list"))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_COUNT_HEADER=True)
+    def test_query_count_header(self):
+        """Valid test to send the queries of a request in a header."""
+
+        response = self.client.get(reverse("available-cash-list"))
+        self.assertEqual(response["X-Query-Count"], "1")
+        response = self.client.get(reverse("check-status"))
+        self.assertEqual(response["X-Query-Count"], "0")
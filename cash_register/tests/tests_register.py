@@ -0,0 +1,123 @@
+"""Register test cases."""
+
+# Django
+from django.test import TestCase
+from django.urls import reverse
+
+# Models
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, CurrencyDenomination, Payment, Register, TransactionLog
+
+# Utils
+import json
+
+
+class RegisterTestCase(TestCase):
+    """Register test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyDenomination.objects.create(currency_type=20000)
+        CurrencyDenomination.objects.create(currency_type=10000)
+        CurrencyDenomination.objects.create(currency_type=500)
+
+        cls.register = Register.objects.create(name="Store 2")
+        AvailableCash.objects.create(currency_type_id=20000, quantity=5)
+        AvailableCash.objects.create(currency_type_id=10000, quantity=10)
+        AvailableCash.objects.create(register=cls.register,
+                                     currency_type_id=10000,
+                                     quantity=2)
+
+    def _total_amount(self, url):
+        response = self.client.get(url)
+        return json.loads(response.content)["total_amount"]
+
+    def test_register_create(self):
+        """Valid test to create a register."""
+
+        response = self.client.post(reverse("registers-list"),
+                                    {"name": "Store 3"},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)["name"], "Store 3")
+
+    def test_register_payment_scoped(self):
+        """Valid test to pay in a register without touching the others."""
+
+        response = self.client.post(
+            reverse("register-payments-list",
+                    kwargs={"register_id": self.register.id}), {
+                        "amount": 10000,
+                        "payment_form": [{
+                            "quantity": 1,
+                            "currency_type": 20000
+                        }]
+                    },
+            content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            self._total_amount(
+                reverse("register-current-state",
+                        kwargs={"register_id": self.register.id})), 30000)
+        self.assertEqual(self._total_amount(reverse("current-state")), 200000)
+        self.assertEqual(Payment.objects.get().register_id, self.register.id)
+        self.assertFalse(
+            TransactionLog.objects.filter(
+                register_id=DEFAULT_REGISTER_ID).exists())
+
+    def test_register_available_cash_create(self):
+        """Valid test to add a denomination already in another register."""
+
+        url = reverse("register-available-cash-list",
+                      kwargs={"register_id": self.register.id})
+        response = self.client.post(url, {
+            "quantity": 3,
+            "currency_type": 20000
+        },
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(url, {
+            "quantity": 3,
+            "currency_type": 20000
+        },
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_register_empty(self):
+        """Valid test to empty a register only."""
+
+        self.client.get(
+            reverse("register-empty-register",
+                    kwargs={"register_id": self.register.id}))
+        self.assertEqual(
+            AvailableCash.objects.filter(register=self.register).get().quantity,
+            0)
+        self.assertEqual(self._total_amount(reverse("current-state")), 200000)
+        response = self.client.post(reverse(
+            "register-search-date", kwargs={"register_id": self.register.id}),
+                                    {"date": "2100-01-01T00:00:00Z"},
+                                    content_type="application/json")
+        self.assertEqual(json.loads(response.content)["total_amount"], -20000)
+
+    def test_register_not_found(self):
+        """Invalid test to pay in a register that does not exist."""
+
+        response = self.client.post(
+            reverse("register-payments-list", kwargs={"register_id": 999}), {
+                "amount": 10000,
+                "payment_form": [{
+                    "quantity": 1,
+                    "currency_type": 20000
+                }]
+            },
+            content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_register_not_found_list(self):
+        """Invalid test to list the objects of a register that does not exist."""
+
+        for name in ("register-payments-list", "register-logs-list",
+                     "register-available-cash-list", "register-logs-summary"):
+            with self.subTest(name):
+                with self.assertNumQueries(1):
+                    response = self.client.get(
+                        reverse(name, kwargs={"register_id": 999}))
+                self.assertEqual(response.status_code, 404)
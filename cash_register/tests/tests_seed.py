@@ -0,0 +1,31 @@
+"""Seed command test cases."""
+
+# Django
+from django.core.management import call_command
+from django.test import TestCase
+
+# Models
+from cash_register.models import AvailableCash, CurrencyDenomination
+
+# Utils
+from io import StringIO
+
+
+class SeedTestCase(TestCase):
+    """Seed command test cases."""
+    def test_seed_loads_fixtures(self):
+        """Valid test to load the default fixtures on an empty database."""
+
+        call_command("seed", verbosity=0, stdout=StringIO())
+        self.assertEqual(CurrencyDenomination.objects.count(), 10)
+        self.assertEqual(AvailableCash.objects.count(), 10)
+
+    def test_seed_skips_loaded_fixtures(self):
+        """Valid test to keep the cash register when seeding again."""
+
+        call_command("seed", verbosity=0, stdout=StringIO())
+        AvailableCash.objects.update(quantity=0)
+        output = StringIO()
+        call_command("seed", verbosity=0, stdout=output)
+        self.assertFalse(AvailableCash.objects.exclude(quantity=0).exists())
+        self.assertIn("Skipping available_cash_fixtures", output.getvalue())
@@ -1,14 +1,30 @@
 """Transaction log cases."""
 
 # Django
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 # Models
-from cash_register.models import AvailableCash, TransactionLog, CurrencyDenomination
+from cash_register.models import AvailableCash, TransactionLog, TransactionSummary, CurrencyDenomination
+
+# Exceptions
+from cash_register.exceptions import AppendOnlyError
+
+# Partitions
+from cash_register.partitions import archive_month, month_start, stored_months
 
 # Utils
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+import gzip
 import json
+import os
+import tempfile
 
 
 class TransactionLogTestCase(TestCase):
@@ -45,7 +61,7 @@ class TransactionLogTestCase(TestCase):
 
         response = self.client.get(reverse("logs-list"), formal="json")
         response_data = json.loads(response.content)
-        self.assertEqual(response_data[0]["amount"], 280500)
+        self.assertEqual(response_data["results"][0]["amount"], 280500)
         self.assertEqual(response.status_code, 200)
 
     def test_transaction_log_retrieve(self):
@@ -70,3 +86,229 @@ class TransactionLogTestCase(TestCase):
         response_data = json.loads(response.content)
         self.assertEqual(response_data["total_amount"], 130000)
         self.assertEqual(response.status_code, 200)
+
+    def test_transaction_log_retrieve_with_logs(self):
+        """Valid test to retrieve paginated logs with the cash history."""
+
+        self.client.post(reverse("payments-list"), {
+            "amount": 130000,
+            "payment_form": [{
+                "quantity": 8,
+                "currency_type": 10000
+            }, {
+                "quantity": 10,
+                "currency_type": 20000
+            }, {
+                "quantity": 1,
+                "currency_type": 500
+            }]
+        }, content_type="application/json")
+
+        response = self.client.post(
+            f"{reverse('search-date')}?page_size=1", {
+                "date": "2050-02-17T22:39",
+                "include_logs": True
+            }, content_type="application/json")
+        response_data = json.loads(response.content)
+        self.assertEqual(response_data["total_amount"], 130000)
+        self.assertEqual(len(response_data["logs"]["results"]), 1)
+        self.assertEqual(response_data["logs"]["results"][0]["balance"],
+                         280500)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(response_data["logs"]["next"], {
+            "date": "2050-02-17T22:39",
+            "include_logs": True
+        }, content_type="application/json")
+        response_data = json.loads(response.content)
+        self.assertEqual(response_data["logs"]["results"][0]["balance"],
+                         130000)
+        self.assertIsNone(response_data["logs"]["next"])
+
+    def test_transaction_log_retrieve_before_logs(self):
+        """Valid test to retrieve the cash history before any log."""
+
+        self.client.get(reverse("empty-register"))
+        response = self.client.post(reverse("search-date"),
+                                    {"date": "2000-01-01T00:00"},
+                                    formal="json")
+        response_data = json.loads(response.content)
+        self.assertEqual(response_data, {"total_amount": 0})
+        self.assertEqual(TransactionLog.objects.get().balance, -211500)
+
+    def test_transaction_log_list_cursor(self):
+        """Valid test to walk transaction logs page by page."""
+
+        TransactionLog.objects.append([
+            TransactionLog(transaction_type="income", amount=amount)
+            for amount in range(1, 6)
+        ])
+        amounts = []
+        url = f"{reverse('logs-list')}?page_size=2"
+        while url:
+            response_data = json.loads(self.client.get(url).content)
+            amounts.extend(log["amount"] for log in response_data["results"])
+            url = response_data["next"]
+        self.assertEqual(amounts, [1, 2, 3, 4, 5])
+
+        response = self.client.get(f"{reverse('logs-list')}?cursor=invalid")
+        self.assertEqual(response.status_code, 404)
+
+    def test_transaction_log_export(self):
+        """Valid test to stream transaction logs as NDJSON and CSV."""
+
+        TransactionLog.objects.append([
+            TransactionLog(transaction_type="income", amount=500),
+            TransactionLog(transaction_type="outcome", amount=200)
+        ])
+        response = self.client.get(reverse("logs-export"))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line)["balance"] for line in lines],
+                         [500, 300])
+
+        response = self.client.get(f"{reverse('logs-export')}?output=csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0],
+                         "id,transaction_type,amount,balance,created_at")
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get(f"{reverse('logs-export')}?output=xml")
+        self.assertEqual(response.status_code, 400)
+
+    def test_transaction_log_append_only(self):
+        """Invalid test to update or delete transaction logs."""
+
+        log = TransactionLog.objects.append(
+            [TransactionLog(transaction_type="income", amount=500)])[0]
+        log.amount = 100
+        with self.assertRaises(AppendOnlyError):
+            log.save()
+        with self.assertRaises(AppendOnlyError):
+            log.delete()
+        with self.assertRaises(AppendOnlyError):
+            TransactionLog.objects.update(amount=100)
+        with self.assertRaises(AppendOnlyError):
+            TransactionLog.objects.all().delete()
+        self.assertEqual(TransactionLog.objects.get().amount, 500)
+
+    def test_transaction_log_append_only_without_returned_ids(self):
+        """Invalid test to save again logs whose ids were not returned."""
+
+        with mock.patch.object(type(connection.features),
+                               "can_return_rows_from_bulk_insert", False):
+            log = TransactionLog.objects.append(
+                [TransactionLog(transaction_type="income", amount=500)])[0]
+        self.assertIsNone(log.pk)
+        with self.assertRaises(AppendOnlyError):
+            log.save()
+        with self.assertRaises(AppendOnlyError):
+            TransactionLog(pk=TransactionLog.objects.get().pk,
+                           transaction_type="income",
+                           amount=100).save()
+        self.assertEqual(TransactionLog.objects.get().balance, 500)
+
+    def test_transaction_log_append_balance_index(self):
+        """Valid test to look up the last balance with the created_at index."""
+
+        TransactionLog.objects.append(
+            [TransactionLog(transaction_type="income", amount=500)])
+        with CaptureQueriesContext(connection) as queries:
+            TransactionLog.objects.append(
+                [TransactionLog(transaction_type="income", amount=100)])
+        sql = next(query["sql"] for query in queries
+                   if "archived_balance" in query["sql"])
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+            plan = " ".join(str(column) for row in cursor.fetchall()
+                            for column in row)
+        # Postgres names the copies of the index on every partition.
+        self.assertRegex(
+            plan, "transactionlog_created_idx|register_id_created_at_id_idx")
+        self.assertEqual(TransactionLog.objects.latest("id").balance, 600)
+
+    def test_transaction_log_archive(self):
+        """Valid test to archive the logs of cold months to files."""
+
+        old_date = timezone.now() - timedelta(days=400)
+        with mock.patch("django.utils.timezone.now", return_value=old_date):
+            TransactionLog.objects.append([
+                TransactionLog(transaction_type="income", amount=500),
+                TransactionLog(transaction_type="outcome", amount=200)
+            ])
+        TransactionLog.objects.append(
+            [TransactionLog(transaction_type="income", amount=100)])
+
+        directory = tempfile.mkdtemp()
+        call_command("archive_transaction_logs",
+                     keep_months=12,
+                     output_dir=directory,
+                     stdout=StringIO())
+        path = os.path.join(directory,
+                            f"transaction-logs-{old_date:%Y-%m}.ndjson.gz")
+        with gzip.open(path, "rt") as archive:
+            archived = [json.loads(line) for line in archive]
+        self.assertEqual([log["balance"] for log in archived], [500, 300])
+        self.assertEqual(TransactionLog.objects.get().balance, 400)
+        # Reports still cover the archived months.
+        self.assertEqual(
+            TransactionSummary.objects.get(granularity="day",
+                                           period_start__lt=old_date +
+                                           timedelta(days=1)).income, 500)
+
+    def test_transaction_log_archive_every_log(self):
+        """Valid test to go on with the balance once every log is archived."""
+
+        old_date = timezone.now() - timedelta(days=400)
+        with mock.patch("django.utils.timezone.now",
+                        return_value=old_date - timedelta(days=40)):
+            TransactionLog.objects.append(
+                [TransactionLog(transaction_type="income", amount=900)])
+        with mock.patch("django.utils.timezone.now", return_value=old_date):
+            TransactionLog.objects.append([
+                TransactionLog(transaction_type="income", amount=500),
+                TransactionLog(transaction_type="outcome", amount=200)
+            ])
+
+        # The newest month first, the older one must not move it back.
+        directory = tempfile.mkdtemp()
+        archive_month(month_start(old_date), directory)
+        call_command("archive_transaction_logs",
+                     keep_months=12,
+                     output_dir=directory,
+                     stdout=StringIO())
+        self.assertFalse(TransactionLog.objects.exists())
+        self.assertEqual(
+            TransactionLog.objects.balance_at(1, timezone.now()), 1200)
+        self.assertEqual(
+            TransactionLog.objects.balance_at(1, old_date - timedelta(days=1)),
+            0)
+
+        log = TransactionLog.objects.append(
+            [TransactionLog(transaction_type="income", amount=100)])[0]
+        self.assertEqual(log.balance, 1300)
+
+    @skipUnless(connection.vendor == "postgresql",
+                "Only PostgreSQL partitions the transaction logs.")
+    def test_transaction_log_archive_default_partition(self):
+        """Valid test to archive logs stored in the default partition."""
+
+        old_date = timezone.now() - timedelta(days=3650)
+        # Without its partition the log lands in the default one.
+        with mock.patch("django.utils.timezone.now", return_value=old_date), \
+                mock.patch("cash_register.partitions.ensure_partition"):
+            TransactionLog.objects.append(
+                [TransactionLog(transaction_type="income", amount=700)])
+        self.assertIn(month_start(old_date), stored_months())
+
+        directory = tempfile.mkdtemp()
+        call_command("archive_transaction_logs",
+                     keep_months=12,
+                     output_dir=directory,
+                     stdout=StringIO())
+        path = os.path.join(directory,
+                            f"transaction-logs-{old_date:%Y-%m}.ndjson.gz")
+        with gzip.open(path, "rt") as archive:
+            self.assertEqual(len(archive.readlines()), 1)
+        self.assertFalse(TransactionLog.objects.exists())
+        self.assertNotIn(month_start(old_date), stored_months())
@@ -0,0 +1,96 @@
+"""Transaction summary test cases."""
+
+# Django
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+# Models
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, CurrencyDenomination, TransactionSummary, period_start
+
+# Utils
+from datetime import timedelta
+from io import StringIO
+
+
+class TransactionSummaryTestCase(TestCase):
+    """Transaction summary test cases."""
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyDenomination.objects.create(currency_type=20000)
+        CurrencyDenomination.objects.create(currency_type=10000)
+        CurrencyDenomination.objects.create(currency_type=500)
+
+        AvailableCash.objects.create(currency_type_id=20000, quantity=5)
+        AvailableCash.objects.create(currency_type_id=10000, quantity=10)
+        AvailableCash.objects.create(currency_type_id=500, quantity=15)
+
+    def setUp(self):
+        for amount in (10000, 15000):
+            self.client.post(reverse("payments-list"), {
+                "amount": amount,
+                "payment_form": [{
+                    "quantity": 1,
+                    "currency_type": 20000
+                }]
+            }, content_type="application/json")
+        self.client.get(reverse("empty-register"))
+        now = timezone.now()
+        self.query = {
+            "from": (now - timedelta(days=1)).isoformat(),
+            "to": (now + timedelta(days=1)).isoformat()
+        }
+
+    def test_transaction_summary_day(self):
+        """Valid test to summarize the logs of the day."""
+
+        response = self.client.get(reverse("logs-summary"), self.query)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        summary = response.json()[0]
+        self.assertEqual(summary["income"], 40000)
+        self.assertEqual(summary["outcome"], 15000 + 232500)
+        self.assertEqual(summary["payment_count"], 2)
+        self.assertEqual(summary["net"], 40000 - 15000 - 232500)
+
+    def test_transaction_summary_hour(self):
+        """Valid test to summarize the logs of the hour."""
+
+        response = self.client.get(reverse("logs-summary"),
+                                   dict(self.query, granularity="hour"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["payment_count"], 2)
+        self.assertEqual(
+            TransactionSummary.objects.get(
+                granularity="hour").period_start,
+            period_start(timezone.now(), "hour"))
+
+    def test_transaction_summary_invalid_range(self):
+        """Invalid test to summarize with a wrong range or granularity."""
+
+        response = self.client.get(reverse("logs-summary"), {
+            "from": self.query["to"],
+            "to": self.query["from"]
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("logs-summary"),
+                                   dict(self.query, granularity="week"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_transaction_summary_rebuild(self):
+        """Valid test to rebuild the summaries from the logs."""
+
+        expected = list(
+            TransactionSummary.objects.order_by("granularity").values(
+                "granularity", "period_start", "income", "outcome",
+                "payment_count"))
+        TransactionSummary.objects.update(income=0, payment_count=0)
+        call_command("rebuild_transaction_summaries",
+                     register=[DEFAULT_REGISTER_ID],
+                     stdout=StringIO())
+        self.assertEqual(
+            list(
+                TransactionSummary.objects.order_by("granularity").values(
+                    "granularity", "period_start", "income", "outcome",
+                    "payment_count")), expected)
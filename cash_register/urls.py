@@ -5,24 +5,71 @@ from django.urls import path, include
 # Django Rest Framework
 from rest_framework import routers
 
-from .views import AvailableCashViewSet, PaymentFormViewSet, TransactionLogViewSet
+from .views import AvailableCashViewSet, PaymentFormViewSet, RegisterViewSet, TransactionLogViewSet, change_plan_stats, check_status, metrics
+
+
+def register_urlpatterns(router, name_prefix=""):
+    """
+    Return the cash register routes of a single register. Unless they are
+    included under a register_id they work on the default register.
+
+    ...
+    Params
+    - router: Router to register the viewsets on
+    - name_prefix: Prefix of the route names
+    """
+    router.register(r"available-cash",
+                    AvailableCashViewSet,
+                    basename=f"{name_prefix}available-cash")
+    router.register(r"payments",
+                    PaymentFormViewSet,
+                    basename=f"{name_prefix}payments")
+    router.register(r"logs",
+                    TransactionLogViewSet,
+                    basename=f"{name_prefix}logs")
+    return [
+        path("available-cash/empty/",
+             AvailableCashViewSet.as_view({"get": "empty_register"}),
+             name=f"{name_prefix}empty-register"),
+        path("available-cash/current-state/",
+             AvailableCashViewSet.as_view({"get": "current_state"}),
+             name=f"{name_prefix}current-state"),
+        path("available-cash/history/",
+             AvailableCashViewSet.as_view({"get": "history"}),
+             name=f"{name_prefix}available-cash-history"),
+        path("payments/",
+             PaymentFormViewSet.as_view({
+                 "get": "list",
+                 "post": "create"
+             }),
+             name=f"{name_prefix}payments-list"),
+        path("payments/batch/",
+             PaymentFormViewSet.as_view({"post": "batch"}),
+             name=f"{name_prefix}payments-batch"),
+        path("logs/search-date/",
+             TransactionLogViewSet.as_view({"post": "cash_history"}),
+             name=f"{name_prefix}search-date"),
+        path("logs/summary/",
+             TransactionLogViewSet.as_view({"get": "summary"}),
+             name=f"{name_prefix}logs-summary"),
+        path("logs/export/",
+             TransactionLogViewSet.as_view({"get": "export"}),
+             name=f"{name_prefix}logs-export"),
+    ]
+
 
 router = routers.DefaultRouter()
-router.register(r"available-cash",
-                AvailableCashViewSet,
-                basename="available-cash")
-router.register(r"payments", PaymentFormViewSet, basename="payments")
-router.register(r"logs", TransactionLogViewSet, basename="logs")
-
-urlpatterns = [
-    path("available-cash/empty/",
-         AvailableCashViewSet.as_view({"get": "empty_register"}),
-         name="empty-register"),
-    path("available-cash/current-state/",
-         AvailableCashViewSet.as_view({"get": "current_state"}),
-         name="current-state"),
-    path("logs/search-date/",
-         TransactionLogViewSet.as_view({"post": "cash_history"}),
-         name="search-date"),
+router.register(r"registers", RegisterViewSet, basename="registers")
+register_router = routers.SimpleRouter()
+
+urlpatterns = register_urlpatterns(router) + [
+    path("status/", check_status, name="check-status"),
+    path("metrics", metrics, name="metrics"),
+    path("change-plans/stats/",
+         change_plan_stats,
+         name="change-plan-stats"),
+    path("registers/<int:register_id>/",
+         include(register_urlpatterns(register_router, "register-") +
+                 register_router.urls)),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,160 @@
+"""Cash register payment validation."""
+
+# Django
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.utils.translation import gettext as _
+
+# Django Rest Framework
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+# Utils
+from .denominations import denomination_registry
+import re
+
+# The messages of the serializer fields, translated to the request
+# language when formatted.
+REQUIRED = serializers.Field.default_error_messages["required"]
+NOT_AN_INTEGER = serializers.IntegerField.default_error_messages["invalid"]
+MIN_VALUE = serializers.IntegerField.default_error_messages["min_value"]
+MAX_VALUE = serializers.IntegerField.default_error_messages["max_value"]
+NOT_A_DICT = serializers.Serializer.default_error_messages["invalid"]
+NOT_A_LIST = serializers.ListField.default_error_messages["not_a_list"]
+EMPTY_LIST = serializers.ListField.default_error_messages["empty"]
+
+# Range of the IntegerField columns of payments and their lines.
+MIN_INTEGER, MAX_INTEGER = BaseDatabaseOperations.integer_field_ranges[
+    "IntegerField"]
+
+# ASCII digits only: int() also takes "５00" but rejects "²".
+_INTEGER = re.compile(r"-?[0-9]+")
+
+
+def to_integer(value):
+    """
+    Return an integer request value, None when it is not one. Like the
+    IntegerField of the serializers, numeric strings are accepted.
+
+    ...
+    Params
+    - value: Parsed request value
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and _INTEGER.fullmatch(value.strip()):
+        return int(value)
+    return None
+
+
+def integer_errors(value, min_value):
+    """
+    Return the errors of an integer request value with the messages of the
+    IntegerField of the serializers, and the value as an integer.
+
+    ...
+    Params
+    - value: Parsed request value
+    - min_value: Lowest value allowed, the highest one is MAX_INTEGER
+    """
+    if value is None:
+        return [str(REQUIRED)], None
+    integer = to_integer(value)
+    if integer is None:
+        return [str(NOT_AN_INTEGER)], None
+    if integer < min_value:
+        return [MIN_VALUE.format(min_value=min_value)], None
+    if integer > MAX_INTEGER:
+        return [MAX_VALUE.format(max_value=MAX_INTEGER)], None
+    return [], integer
+
+
+def validate_payment(data):
+    """
+    Validate a payment body in a single pass over its lines and return its
+    amount and payment form. Denominations are checked against the set
+    of the registry, so valid payments need no query. Raises
+    ValidationError with the errors of every field.
+
+    ...
+    Params
+    - data: Parsed body with amount and payment_form
+    """
+    if not isinstance(data, dict):
+        raise ValidationError({
+            "non_field_errors":
+            [NOT_A_DICT.format(datatype=type(data).__name__)]
+        })
+    errors = {}
+    amount_errors, amount = integer_errors(data.get("amount"), 0)
+    if amount_errors:
+        errors["amount"] = amount_errors
+
+    lines = data.get("payment_form")
+    payment_form = []
+    if lines is None:
+        errors["payment_form"] = [str(REQUIRED)]
+    elif not isinstance(lines, list):
+        errors["payment_form"] = [
+            NOT_A_LIST.format(input_type=type(lines).__name__)
+        ]
+    elif not lines:
+        errors["payment_form"] = [str(EMPTY_LIST)]
+    else:
+        line_errors = []
+        seen = set()
+        duplicates = set()
+        for line in lines:
+            if not isinstance(line, dict):
+                line_errors.append({
+                    "non_field_errors":
+                    [NOT_A_DICT.format(datatype=type(line).__name__)]
+                })
+                continue
+            line_error = {}
+            # Out of range denominations are unknown ones.
+            currency_type = to_integer(line.get("currency_type"))
+            if currency_type is None:
+                line_error["currency_type"] = [
+                    str(REQUIRED) if line.get("currency_type") is None else
+                    str(NOT_AN_INTEGER)
+                ]
+            quantity_errors, quantity = integer_errors(line.get("quantity"), 1)
+            if quantity_errors:
+                line_error["quantity"] = quantity_errors
+            line_errors.append(line_error)
+            if not line_error:
+                if currency_type in seen:
+                    duplicates.add(currency_type)
+                seen.add(currency_type)
+                payment_form.append({
+                    "currency_type": currency_type,
+                    "quantity": quantity
+                })
+        if any(line_errors):
+            errors["payment_form"] = line_errors
+        elif duplicates:
+            errors["payment_form"] = [
+                _("Duplicated currency types: {currency_types}").format(
+                    currency_types=sorted(duplicates))
+            ]
+
+    if errors:
+        raise ValidationError(errors)
+    # Checked last: only a miss of the registry runs a query.
+    unknown = denomination_registry.unknown(
+        {cash["currency_type"] for cash in payment_form})
+    if unknown:
+        raise ValidationError({
+            "payment_form": [
+                _("Unknown currency types: {currency_types}").format(
+                    currency_types=sorted(unknown))
+            ]
+        })
+    # Stored as the total_payment of the payment.
+    if sum(cash["currency_type"] * cash["quantity"]
+           for cash in payment_form) > MAX_INTEGER:
+        raise ValidationError(
+            {"payment_form": [MAX_VALUE.format(max_value=MAX_INTEGER)]})
+    return amount, payment_form
@@ -1,173 +1,618 @@
 """Cash register views."""
 
+# Django
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
 # Django Rest Framework
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.exceptions import MethodNotAllowed, NotFound, ValidationError
 from rest_framework.response import Response
 import rest_framework.status as status_codes
-from rest_framework.decorators import api_view
 
 # Serializers
-from .serializers import AvailableCashSerializer, PaymentFormSerializer, PaymentSerializer, PaymentFormCreateSerializer, TransactionLogSerializer
+from .serializers import AvailableCashReadSerializer, AvailableCashSerializer, AvailableCashStateSerializer, CashHistorySerializer, DrawerHistorySerializer, PaymentSerializer, RegisterSerializer, TransactionLogReadSerializer, TransactionLogSerializer, TransactionSummaryFilterSerializer, TransactionSummarySerializer
 
 # Models
-from cash_register.models import AvailableCash, Payment, TransactionLog
+from cash_register.models import DEFAULT_REGISTER_ID, AvailableCash, DrawerEvent, Payment, PaymentForm, Register, TransactionLog, TransactionSummary, period_start
 
 # Utils
-from functools import reduce
+from collections import defaultdict
+from .cache import bump_version, cash_register_cache, cash_row, change_plan_cache
+from .db import is_deadlock
+from .decorators import query_budget
+from .denominations import denomination_registry
+from .exceptions import IdempotencyKeyReused, MissingChangeError
+from .exports import TRANSACTION_LOG_FIELDS, transaction_logs_csv, transaction_logs_ndjson
+from .metrics import CASH_UPDATE_CONFLICTS, CHANGE_FAILURES, registry
+from .idempotency import IDEMPOTENCY_HEADER, IDEMPOTENCY_KEY_MAX_LENGTH, get_stored_response, request_hash, store_response
+from .pagination import TransactionLogCursorPagination
+from .validation import validate_payment
+
+@query_budget(0)
+async def check_status(request):
+    """
+    Simple async view function to check the API status, answered on the
+    event loop without any thread hop
+    Args:
+        request (object): The request object
+    """
+    return JsonResponse(["API working"],
+                        safe=False,
+                        status=status_codes.HTTP_200_OK)
+
+
+@query_budget(0)
+def change_plan_stats(request):
+    """
+    Simple view function to retrieve the hit and miss counters of the change
+    plan cache of this process
+    Args:
+        request (object): The request object
+    """
+    return JsonResponse(change_plan_cache.stats(),
+                        status=status_codes.HTTP_200_OK)
+
 
-@api_view(["GET"])
-def check_status(request):
+@query_budget(0)
+def metrics(request):
     """
-    Simple view function to check the API status
+    Simple view function to retrieve the metrics of this process in the
+    Prometheus text exposition format
     Args:
         request (object): The request object
     """
-    return Response({"API working"},
+    return HttpResponse(registry.render(),
+                        content_type="text/plain; version=0.0.4; charset=utf-8",
                         status=status_codes.HTTP_200_OK)
 
-class AvailableCashViewSet(ModelViewSet):
+
+class RegisterScopedMixin:
+    """
+    Scope a viewset to the register of the url, or to the default register
+    on the routes that are not nested under /registers/<id>/
+
+    ...
+    Methods:
+        register_id: Register the request is scoped to
+        initial(): Answer 404 when the register of the url does not exist
+        get_queryset(): Filter the queryset by register
+        handle_exception(): Answer 404 when the register does not exist
+    """
+
+    @property
+    def register_id(self):
+        """Register the request is scoped to."""
+        return int(self.kwargs.get("register_id", DEFAULT_REGISTER_ID))
+
+    def initial(self, request, *args, **kwargs):
+        """
+        This method answer 404 on every route of a register that does not
+        exist, lists included. The default register always exists.
+
+        ...
+        Params
+        - request: Request to the register routes
+        """
+        super().initial(request, *args, **kwargs)
+        if "register_id" in self.kwargs and not cash_register_cache.exists(
+                self.register_id):
+            raise NotFound("Register not found.")
+
+    def get_queryset(self):
+        """
+        This method filter the queryset by register
+        """
+        return super().get_queryset().filter(register_id=self.register_id)
+
+    def handle_exception(self, exc):
+        """
+        This method answer 404 when the register does not exist
+
+        ...
+        Params
+        - exc: Exception raised by the handler
+        """
+        if isinstance(exc, Register.DoesNotExist):
+            exc = NotFound("Register not found.")
+        return super().handle_exception(exc)
+
+
+class RegisterViewSet(ModelViewSet):
+    """
+    Class based view to handle CRUD operations over register objects
+
+    ...
+    Methods:
+        destroy(): Prevent use of delete method
+    """
+    queryset = Register.objects.order_by("id")
+    serializer_class = RegisterSerializer
+    query_budgets = {
+        "list": 1,
+        "retrieve": 1,
+        "create": 2,
+        "update": 3,
+        "partial_update": 3
+    }
+
+    def destroy(self, request, *args, **kwargs):
+        """
+        This method prevent use of delete method
+        """
+        raise MethodNotAllowed(method="DELETE")
+
+
+class AvailableCashViewSet(RegisterScopedMixin, ModelViewSet):
     """
     Class based view to handle CRUD operations over Available cash objects
 
     ...
     Methods:
+        get_serializer_class(): Use the plain dict serializer for reads
+        perform_create(): Override create method to refresh cached state
         perform_update(): Override update method to save transaction log
+        _record_update(): Record an update of available cash
         destroy(): Prevent use of delete method
         empty_register(): Empty the cash register
         current_state(): Retrieve cash register current state
-        _calc_total_cash(): Private method to calc total amount of transaction
+        history(): Retrieve cash register state at a past date
     """
     queryset = AvailableCash.objects.all()
     serializer_class = AvailableCashSerializer
+    query_budgets = {
+        "list": 1,
+        "retrieve": 1,
+        # Writes run 2 more queries when they take a drawer snapshot.
+        "create": 8,
+        "update": 14,
+        "partial_update": 14,
+        "empty_register": 11,
+        "current_state": 2,
+        "history": 2
+    }
+
+    def get_serializer_class(self):
+        """
+        This method return the plain dict serializer for reads
+        """
+        # The forms of the browsable API still need the model serializer.
+        if self.action in ("list", "retrieve") and self.request.method == "GET":
+            return AvailableCashReadSerializer
+        return super().get_serializer_class()
+
+    def perform_create(self, serializer):
+        """
+        This method override create method to refresh cached state
+
+        ...
+        Params
+        - serializer: Serializer data to create
+        """
+        with transaction.atomic():
+            serializer.save()
+            available_cash = serializer.instance
+            version = bump_version(self.register_id)
+            cash_register_cache.write_through(
+                self.register_id,
+                version,
+                rows={available_cash.currency_type_id: cash_row(available_cash)})
+            DrawerEvent.objects.append(
+                self.register_id, version,
+                {available_cash.currency_type_id: available_cash.quantity})
 
     def perform_update(self, serializer):
         """
-        This method override update method to save transaction log
+        This method override update method to save transaction log. The
+        row is compared and swapped on its version, and read again when
+        another request changed it first; out of retries it is locked.
 
         ...
         Params
         - serializer: Serializer data to update
         """
-        serializer.save()
-        amount = serializer.data.get("currency_type") * serializer.data.get(
-            "quantity")
-        TransactionLog.objects.create(transaction_type="income", amount=amount)
+        available_cash = serializer.instance
+        retries = settings.CASH_UPDATE_RETRIES
+        for attempt in range(retries + 1):
+            with transaction.atomic():
+                if attempt == retries:
+                    # Locked before the register, in the order payments use.
+                    available_cash = self.get_queryset().select_for_update(
+                    ).get(pk=available_cash.pk)
+                previous_currency_type = available_cash.currency_type_id
+                previous_quantity = available_cash.quantity
+                if AvailableCash.objects.compare_and_swap(
+                        available_cash, **serializer.validated_data):
+                    self._record_update(available_cash, previous_currency_type,
+                                        previous_quantity)
+                    break
+            CASH_UPDATE_CONFLICTS.inc("version_changed")
+            available_cash = self.get_queryset().get(pk=available_cash.pk)
+        serializer.instance = available_cash
+
+    def _record_update(self, available_cash, previous_currency_type,
+                       previous_quantity):
+        """
+        This method record an update of available cash: cached state,
+        drawer events and transaction log. Must run in the transaction of
+        the update.
 
-    def destroy(self, request, pk=None):
+        ...
+        Params
+        - available_cash: Updated AvailableCash instance
+        - previous_currency_type: Currency type before the update
+        - previous_quantity: Quantity before the update
+        """
+        rows = {previous_currency_type: None}
+        rows[available_cash.currency_type_id] = cash_row(available_cash)
+        version = bump_version(self.register_id)
+        cash_register_cache.write_through(self.register_id,
+                                          version,
+                                          rows=rows)
+        deltas = defaultdict(int, {previous_currency_type: -previous_quantity})
+        deltas[available_cash.currency_type_id] += available_cash.quantity
+        DrawerEvent.objects.append(self.register_id, version, deltas)
+        TransactionLog.objects.append([
+            TransactionLog(register_id=self.register_id,
+                           transaction_type="income",
+                           amount=available_cash.currency_type_id *
+                           available_cash.quantity)
+        ])
+
+    def destroy(self, request, *args, **kwargs):
         """
         This method prevent use of delete method
         """
         raise MethodNotAllowed(method="DELETE")
 
-    def empty_register(self, request):
+    def empty_register(self, request, *args, **kwargs):
         """
         This method empty the cash register
         """
-        query = AvailableCash.objects.all()
-        total_amount = self._calc_total_cash(query)
-        self.queryset.update(quantity=0)
-        TransactionLog.objects.create(transaction_type="outcome",
-                                      amount=total_amount)
+        updated_at = timezone.now()
+        available_cash = AvailableCash.objects.filter(
+            register_id=self.register_id)
+        with transaction.atomic():
+            # Lock the drawer so no payment lands between total and update.
+            quantities = dict(available_cash.select_for_update().order_by(
+                "currency_type").values_list("currency_type", "quantity"))
+            total_amount = sum(currency_type * quantity
+                               for currency_type, quantity in quantities.items())
+            available_cash.update(quantity=0,
+                                  version=F("version") + 1,
+                                  updated_at=updated_at)
+            version = bump_version(self.register_id)
+            cash_register_cache.write_through(self.register_id,
+                                              version,
+                                              zero=True,
+                                              updated_at=updated_at)
+            DrawerEvent.objects.append(
+                self.register_id, version, {
+                    currency_type: -quantity
+                    for currency_type, quantity in quantities.items()
+                })
+            TransactionLog.objects.append([
+                TransactionLog(register_id=self.register_id,
+                               transaction_type="outcome",
+                               amount=total_amount)
+            ])
         return Response("Register has been empty.",
                         status=status_codes.HTTP_200_OK)
 
-    def current_state(self, request):
+    def current_state(self, request, *args, **kwargs):
         """
         This method retrieve cash register current state
         """
-        query = AvailableCash.objects.all()
-        total_amount = self._calc_total_cash(query)
-        denominations = AvailableCashSerializer(query, many=True)
+        state = cash_register_cache.get_state(self.register_id)
+        denominations = AvailableCashStateSerializer(state.rows, many=True)
         data = {
             "denominations": denominations.data,
-            "total_amount": total_amount
+            "total_amount": state.total_amount
         }
         return Response(data, status=status_codes.HTTP_200_OK)
 
-    def _calc_total_cash(self, query):
+    def history(self, request, *args, **kwargs):
         """
-        This private method to calc total amount of transaction
+        This method retrieve the quantity of each denomination in the cash
+        register at a past date, rebuilt from the nearest drawer snapshot
+        and the events after it
 
         ...
         Params
-        - query: Query of all Available cash registers
+        - request: date query param
         """
-        partial_amount = list(
-            map((
-                lambda bill: bill.quantity * bill.currency_type.currency_type),
-                query))
-        total_amount = reduce((lambda total1, total2: total1 + total2),
-                              partial_amount)
-        return total_amount
+        serializer = DrawerHistorySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        date = serializer.validated_data["date"]
+        quantities = DrawerEvent.objects.state_at(self.register_id, date)
+        data = {
+            "date": serializer.data["date"],
+            "denominations": [{
+                "currency_type": currency_type,
+                "quantity": quantity
+            } for currency_type, quantity in quantities.items()],
+            "total_amount": sum(currency_type * quantity
+                                for currency_type, quantity in quantities.items())
+        }
+        return Response(data, status=status_codes.HTTP_200_OK)
 
 
-class PaymentFormViewSet(ModelViewSet):
+class PaymentFormViewSet(RegisterScopedMixin, ModelViewSet):
     """
     Class based view to handle CRUD operations over payment form objects
 
     ...
     Methods:
         create(): Create payment register
+        _idempotent_response(): Answer a request whose key was already used
+        batch(): Create an ordered batch of payment registers
+        _lock_cash(): Lock the available cash rows in currency order
         _validate_payment(): Check if the payment format is correct
         _calc_change(): Calculate change for the customer
         _update_cash_register(): Update cash registers
+        _apply_cash_deltas(): Apply quantity differences to available cash
+        _insert_batch(): Store the accepted payments of a batch
         _insert_log(): Create a new log register
+        _transaction_logs(): Build the log registers of a payment
         destroy(): Prevent use of delete method
         update(): Prevent use of put method
         partial_update(): Prevent use of patch method
     """
 
-    queryset = Payment.objects.all()
+    queryset = Payment.objects.only("id", "amount", "total_payment")
     serializer_class = PaymentSerializer
+    batch_max_size = 500
+    # batch is left out: backends that can not return ids from a bulk
+    # insert save its payments one by one. Payments tried again after a
+    # conflict go over the budget of create.
+    query_budgets = {"list": 1, "retrieve": 1, "create": 19}
 
-    def create(self, request):
+    def create(self, request, *args, **kwargs):
         """
-        This method create payment register
+        This method create payment register. A request sent with an
+        Idempotency-Key header is only applied once, its retries get the
+        stored response back.
 
         ...
         Params
         - reques: Costumer payment detail
         """
-        total_payment = self._validate_payment(request.data["payment_form"],
-                                               request.data["amount"])
-        if total_payment:
-            change, error = self._calc_change(total_payment -
-                                              request.data["amount"])
-            if error:
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        fingerprint = None
+        if idempotency_key is not None:
+            if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
                 return Response(
-                    f"Sorry, Missing change for ${change.__str__()}",
+                    f"{IDEMPOTENCY_HEADER} allows up to "
+                    f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters.",
                     status=status_codes.HTTP_400_BAD_REQUEST)
-
-            request.data["total_payment"] = total_payment
-            serializer_payment_form = PaymentFormSerializer(
-                data=request.data["payment_form"], many=True)
-            serializer_payment = self.serializer_class(data=request.data)
-            if serializer_payment.is_valid(
-            ) and serializer_payment_form.is_valid():
-                self.perform_create(serializer_payment)
-                for payment_method in request.data["payment_form"]:
-                    payment_method["payment"] = serializer_payment.instance.id
-                    payment_form_create = PaymentFormCreateSerializer(
-                        data=payment_method)
-                    if payment_form_create.is_valid():
-                        payment_form_create.save()
-                    else:
-                        return Response(
-                            payment_form_create.errors,
+            fingerprint = request_hash(request.data)
+            response = self._idempotent_response(idempotency_key, fingerprint)
+            if response is not None:
+                return response
+
+        try:
+            amount, payment_form = validate_payment(request.data)
+        except ValidationError as error:
+            return Response(error.detail,
+                            status=status_codes.HTTP_400_BAD_REQUEST)
+        total_payment = self._validate_payment(payment_form, amount)
+        if not total_payment:
+            return Response("Payment value is lower than purchase amount.",
                             status=status_codes.HTTP_400_BAD_REQUEST)
-                self._update_cash_register(request.data["payment_form"],
-                                           change)
-                self._insert_log(total_payment, request.data["amount"])
-                change.append(
-                    {"total_change": total_payment - request.data["amount"]})
-                return Response(change, status=status_codes.HTTP_201_CREATED)
-            else:
-                return Response(serializer_payment_form.errors,
-                                status=status_codes.HTTP_400_BAD_REQUEST)
 
-        return Response("Payment value is lower than purchase amount.",
+        current_cash = cash_register_cache.get_state(self.register_id).quantities
+        retries = settings.CASH_UPDATE_RETRIES
+        for attempt in range(retries + 1):
+            locked = attempt == retries
+            if not locked:
+                change, error = self._calc_change(total_payment - amount,
+                                                  current_cash)
+                if error:
+                    return Response(
+                        f"Sorry, Missing change for ${change.__str__()}",
                         status=status_codes.HTTP_400_BAD_REQUEST)
+            try:
+                with transaction.atomic():
+                    if locked:
+                        # Out of retries: plan the change on locked rows.
+                        current_cash = self._lock_cash()
+                        change, error = self._calc_change(
+                            total_payment - amount, current_cash)
+                        if error:
+                            raise MissingChangeError(change)
+                    response_data = change + [{
+                        "total_change": total_payment - amount
+                    }]
+                    if idempotency_key is not None:
+                        store_response(self.register_id, idempotency_key,
+                                       fingerprint,
+                                       status_codes.HTTP_201_CREATED,
+                                       response_data)
+                    payment = Payment.objects.create(
+                        register_id=self.register_id,
+                        amount=amount,
+                        total_payment=total_payment)
+                    PaymentForm.objects.bulk_create([
+                        PaymentForm(payment=payment,
+                                    currency_type_id=cash["currency_type"],
+                                    quantity=cash["quantity"])
+                        for cash in payment_form
+                    ])
+                    self._update_cash_register(payment_form, change,
+                                               current_cash)
+                    self._insert_log(total_payment, amount, payment)
+                return Response(response_data,
+                                status=status_codes.HTTP_201_CREATED)
+            except MissingChangeError as error:
+                if locked:
+                    return Response(str(error),
+                                    status=status_codes.HTTP_400_BAD_REQUEST)
+                # Another payment took the change since it was planned.
+                CASH_UPDATE_CONFLICTS.inc("stock_changed")
+            except OperationalError as error:
+                if locked or not is_deadlock(error):
+                    raise
+                CASH_UPDATE_CONFLICTS.inc("deadlock")
+            except IntegrityError:
+                if idempotency_key is None:
+                    raise
+                # A concurrent retry with the same key committed first.
+                response = self._idempotent_response(idempotency_key,
+                                                     fingerprint)
+                if response is None:
+                    raise
+                return response
+            current_cash = cash_register_cache.get_state(
+                self.register_id).quantities
+
+    def _idempotent_response(self, idempotency_key, fingerprint):
+        """
+        This method answer a request whose Idempotency-Key was already used,
+        with the stored response or with 422 when it was used for another
+        request. Return None when the key is new.
+
+        ...
+        Params
+        - idempotency_key: Idempotency-Key header of the request
+        - fingerprint: Hash of the request body
+        """
+        try:
+            stored = get_stored_response(self.register_id, idempotency_key,
+                                         fingerprint)
+        except IdempotencyKeyReused as error:
+            return Response(str(error),
+                            status=status_codes.HTTP_422_UNPROCESSABLE_ENTITY)
+        if stored is None:
+            return None
+        return Response(stored.response,
+                        status=stored.status_code,
+                        headers={"Idempotent-Replayed": "true"})
+
+    def batch(self, request, *args, **kwargs):
+        """
+        This method create an ordered batch of payment registers, as
+        queued by offline terminals, in one transaction holding a single
+        lock over the available cash. Each payment is checked against the
+        cash left by the previous ones and gets its own result.
+
+        ...
+        Params
+        - request: List of costumer payment details
+        """
+        if not isinstance(request.data, list) or not request.data:
+            return Response("Expected a non empty list of payments.",
+                            status=status_codes.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.batch_max_size:
+            return Response(
+                f"A batch allows up to {self.batch_max_size} payments.",
+                status=status_codes.HTTP_400_BAD_REQUEST)
+
+        results = []
+        payments = []
+        payment_forms = []
+        changes = []
+        with transaction.atomic():
+            # Rows before the register, in the order payments use.
+            current_cash = self._lock_cash()
+            # Raises Register.DoesNotExist before any payment is checked.
+            Register.objects.select_for_update().only("id").get(
+                pk=self.register_id)
+            stock = dict(current_cash)
+            for data in request.data:
+                try:
+                    amount, payment_form = validate_payment(data)
+                except ValidationError as error:
+                    results.append({
+                        "status": status_codes.HTTP_400_BAD_REQUEST,
+                        "data": error.detail
+                    })
+                    continue
+                total_payment = self._validate_payment(payment_form, amount)
+                if not total_payment:
+                    results.append({
+                        "status": status_codes.HTTP_400_BAD_REQUEST,
+                        "data": "Payment value is lower than purchase amount."
+                    })
+                    continue
+                change, error = self._calc_change(total_payment - amount,
+                                                  stock)
+                if error:
+                    results.append({
+                        "status": status_codes.HTTP_400_BAD_REQUEST,
+                        "data": f"Sorry, Missing change for ${change}"
+                    })
+                    continue
+
+                for cash in payment_form:
+                    stock[cash["currency_type"]] = stock.get(
+                        cash["currency_type"], 0) + cash["quantity"]
+                for cash in change:
+                    stock[cash["currency_type"]] -= cash["quantity"]
+                payments.append(
+                    Payment(register_id=self.register_id,
+                            amount=amount,
+                            total_payment=total_payment))
+                payment_forms.append(payment_form)
+                changes.extend(change)
+                results.append({
+                    "status": status_codes.HTTP_201_CREATED,
+                    "data": change + [{
+                        "total_change": total_payment - amount
+                    }]
+                })
+
+            if payments:
+                self._insert_batch(payments, payment_forms, changes,
+                                   current_cash)
+        return Response(results, status=status_codes.HTTP_200_OK)
+
+    def _lock_cash(self):
+        """
+        This method lock the available cash rows of the register in currency
+        order, the order every writer that locks several rows takes, and
+        return the quantity of each denomination. Must run inside a
+        transaction.
+        """
+        return dict(
+            AvailableCash.objects.filter(
+                register_id=self.register_id).select_for_update().order_by(
+                    "currency_type").values_list("currency_type", "quantity"))
+
+    def _insert_batch(self, payments, payment_forms, changes, current_cash):
+        """
+        This method store the accepted payments of a batch. Must run inside
+        the batch transaction.
+
+        ...
+        Params
+        - payments: Unsaved payment registers
+        - payment_forms: Costumer payment detail of each payment
+        - changes: Change returned for all the payments
+        - current_cash: Mapping of denomination -> available quantity
+          locked by the batch
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            Payment.objects.bulk_create(payments)
+        else:
+            for payment in payments:
+                payment.save()
+        PaymentForm.objects.bulk_create([
+            PaymentForm(payment=payment,
+                        currency_type_id=cash["currency_type"],
+                        quantity=cash["quantity"])
+            for payment, payment_form in zip(payments, payment_forms)
+            for cash in payment_form
+        ])
+        self._update_cash_register(
+            [cash for payment_form in payment_forms for cash in payment_form],
+            changes, current_cash)
+        TransactionLog.objects.append([
+            log for payment in payments for log in self._transaction_logs(
+                payment.total_payment, payment.amount)
+        ], payments=payments)
 
     def _validate_payment(self, payment_method, amount):
         """
@@ -178,160 +623,315 @@ class PaymentFormViewSet(ModelViewSet):
         - payment_method: Costumer payment detail
         - amount: Cost of the product purchased by the customer
         """
-        partial_amount = list(
-            map((
-                lambda bill: bill.get("quantity") * bill.get("currency_type")),
-                payment_method))
-        total_amount = reduce((lambda total1, total2: total1 + total2),
-                              partial_amount)
+        total_amount = 0
+        for bill in payment_method:
+            total_amount += bill["quantity"] * bill["currency_type"]
         return total_amount if total_amount >= amount else 0
 
-    def _calc_change(self, amount):
+    def _calc_change(self, amount, current_cash):
         """
-        This method calculate change for the customer
+        This method calculate change for the customer, reusing the plans
+        cached for the same amount and stock
 
         ...
         Params
-        - amount: Cost of the product purchased by the customer 
-        """
-        current_cash = AvailableCash.objects.filter(
-            quantity__gt=0).values_list("currency_type",
-                                        "quantity").order_by("-currency_type")
-        change = []
-        for available_cash in list(current_cash):
-            if amount >= available_cash[0]:
-                partial_change = dict()
-                partial_change["currency_type"] = available_cash[0]
-                partial_change["quantity"] = amount // available_cash[
-                    0] if amount // available_cash[0] <= available_cash[
-                        1] else available_cash[1]
-                change.append(partial_change)
-                amount = amount - partial_change["quantity"] * partial_change[
-                    "currency_type"]
-        if amount == 0:
-            return change, False
-        return amount, True
-
-    def _update_cash_register(self, payment_method, change):
-        """
-        This method update cash registers
+        - amount: Amount of money to be returned to the customer
+        - current_cash: Mapping of denomination -> available quantity
+        """
+        denominations = denomination_registry.get()
+        # Stock of a denomination added by another process since the
+        # registry was loaded: sort the stock instead.
+        if not all(currency_type in denominations
+                   for currency_type in current_cash):
+            denominations = None
+        change = change_plan_cache.make_change(amount, current_cash,
+                                               denominations)
+        if change is None:
+            CHANGE_FAILURES.inc("missing_change")
+            return amount, True
+        return [{
+            "currency_type": currency_type,
+            "quantity": quantity
+        } for currency_type, quantity in change], False
+
+    def _update_cash_register(self, payment_method, change, current_cash):
+        """
+        This method update cash registers with a single conditional
+        statement, raising MissingChangeError when any denomination no
+        longer has the pieces needed for the change. Must run inside the
+        payment transaction.
 
         ...
         Params
         - payment_method: Costumer payment detail
         - change: Amount of money to be returned to the customer
-        """
-        denominations_payment = dict((cash["currency_type"], cash["quantity"])
-                                     for cash in payment_method)
-        denominations_change = dict(
-            (cash["currency_type"], cash["quantity"]) for cash in change)
-        denominations = list(
-            map(lambda cash: cash.get("currency_type"), payment_method))
-        current_cash = AvailableCash.objects.select_for_update().filter(
-            currency_type__in=denominations)
-        for partial_cash in current_cash:
-            partial_cash.quantity += denominations_payment[
-                partial_cash.currency_type.currency_type]
-            partial_cash.save()
-        denominations_cash = list(
-            map(lambda cash: cash.get("currency_type"), change))
-        current_cash = AvailableCash.objects.select_for_update().filter(
-            currency_type__in=denominations_cash)
-        for partial_cash in current_cash:
-            partial_cash.quantity -= denominations_change[
-                partial_cash.currency_type.currency_type]
-            partial_cash.save()
-
-    def _insert_log(self, total_payment, amount):
+        - current_cash: Mapping of denomination -> available quantity the
+          change was calculated from
+        """
+        deltas = defaultdict(int)
+        for cash in payment_method:
+            deltas[cash["currency_type"]] += cash["quantity"]
+        for cash in change:
+            deltas[cash["currency_type"]] -= cash["quantity"]
+        deltas = {
+            currency_type: delta
+            for currency_type, delta in deltas.items() if delta
+        }
+        updated_at = timezone.now()
+        if deltas:
+            self._apply_cash_deltas(deltas, change, current_cash, updated_at)
+        # Bumped even without deltas: the version row lock also orders the
+        # running balance of the transaction logs.
+        version = bump_version(self.register_id)
+        cash_register_cache.write_through(self.register_id,
+                                          version,
+                                          deltas=deltas,
+                                          updated_at=updated_at)
+        DrawerEvent.objects.append(self.register_id, version, deltas)
+
+    def _apply_cash_deltas(self, deltas, change, current_cash, updated_at):
+        """
+        This method apply quantity differences to the available cash with a
+        single conditional statement, after locking the rows in currency
+        order like every writer of several rows
+
+        ...
+        Params
+        - deltas: Mapping of denomination -> quantity difference
+        - change: Amount of money to be returned to the customer
+        - current_cash: Mapping of denomination -> available quantity the
+          change was calculated from
+        - updated_at: Update date of the changed rows
+        """
+        # Pieces paid with a denomination the register has no row for yet.
+        missing_cash = [
+            AvailableCash(register_id=self.register_id,
+                          currency_type_id=currency_type,
+                          quantity=0,
+                          updated_at=updated_at)
+            for currency_type in deltas if currency_type not in current_cash
+        ]
+        if missing_cash:
+            AvailableCash.objects.bulk_create(missing_cash,
+                                              ignore_conflicts=True)
+
+        # The update alone locks the rows in scan order, which differs
+        # between transactions and would deadlock with the other writers.
+        list(
+            AvailableCash.objects.filter(
+                register_id=self.register_id,
+                currency_type__in=deltas).select_for_update().order_by(
+                    "currency_type").values_list("id", flat=True))
+        condition = Q()
+        for currency_type, delta in deltas.items():
+            if delta < 0:
+                condition |= Q(currency_type=currency_type,
+                               quantity__gte=-delta)
+            else:
+                condition |= Q(currency_type=currency_type)
+        updated = AvailableCash.objects.filter(
+            condition, register_id=self.register_id).update(
+            quantity=F("quantity") + Case(
+                *[
+                    When(currency_type=currency_type, then=Value(delta))
+                    for currency_type, delta in deltas.items()
+                ],
+                default=Value(0),
+                output_field=IntegerField()),
+            version=F("version") + 1,
+            updated_at=updated_at)
+        if updated != len(deltas):
+            raise MissingChangeError(
+                sum(cash["currency_type"] * cash["quantity"]
+                    for cash in change))
+
+    def _insert_log(self, total_payment, amount, payment):
         """
         This method create a new log register
 
+        ...
+        Params
+        - total_payment: Amount of money delivered by the customer
+        - amount: Cost of the product purchased by the customer
+        - payment: Payment register the logs belong to
+        """
+        TransactionLog.objects.append(
+            self._transaction_logs(total_payment, amount), payments=[payment])
+
+    def _transaction_logs(self, total_payment, amount):
+        """
+        This method build the unsaved log registers of a payment
+
         ...
         Params
         - total_payment: Amount of money delivered by the customer
         - amount: Cost of the product purchased by the customer
         """
-        TransactionLog.objects.create(transaction_type="income",
-                                      amount=total_payment)
-        TransactionLog.objects.create(transaction_type="outcome",
-                                      amount=total_payment - amount)
+        return [
+            TransactionLog(register_id=self.register_id,
+                           transaction_type="income",
+                           amount=total_payment),
+            TransactionLog(register_id=self.register_id,
+                           transaction_type="outcome",
+                           amount=total_payment - amount)
+        ]
 
-    def destroy(self, request, pk=None):
+    def destroy(self, request, *args, **kwargs):
         """
         This method prevent use of delete method
         """
         raise MethodNotAllowed(method="DELETE")
 
-    def update(self, request, pk=None):
+    def update(self, request, *args, **kwargs):
         """
         This method prevent use of put method
         """
         raise MethodNotAllowed(method="PUT")
 
-    def partial_update(self, request, pk=None):
+    def partial_update(self, request, *args, **kwargs):
         """
         This method prevent use of pacth method
         """
         raise MethodNotAllowed(method="PATCH")
 
 
-class TransactionLogViewSet(ModelViewSet):
+class TransactionLogViewSet(RegisterScopedMixin, ModelViewSet):
     """
     Class based view to handle CRUD operations over payment form objects
 
     ...
     Methods:
+        get_serializer_class(): Use the plain dict serializer for reads
         create(): Prevent use of post method
         update(): Prevent use of put method
         partial_update(): Prevent use of patch method
         destroy(): Prevent use of delete method
         cash_history(): Retrieve cash history transactions
+        summary(): Retrieve income and outcome totals per hour or day
+        export(): Stream all transaction logs as NDJSON or CSV
     """
     queryset = TransactionLog.objects.all()
     serializer_class = TransactionLogSerializer
-
-    def create(self, request):
+    pagination_class = TransactionLogCursorPagination
+    query_budgets = {
+        "list": 1,
+        "retrieve": 1,
+        "cash_history": 2,
+        "summary": 1,
+        "export": 1
+    }
+    export_chunk_size = 2000
+    export_content_types = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv"
+    }
+
+    def get_serializer_class(self):
+        """
+        This method return the plain dict serializer for reads
+        """
+        # The forms of the browsable API still need the model serializer.
+        if self.request.method == "GET":
+            return TransactionLogReadSerializer
+        return super().get_serializer_class()
+
+    def create(self, request, *args, **kwargs):
         """
         This method prevent use of post method
         """
         raise MethodNotAllowed(method="POST")
 
-    def update(self, request, pk=None):
+    def update(self, request, *args, **kwargs):
         """
         This method prevent use of put method
         """
         raise MethodNotAllowed(method="PUT")
 
-    def partial_update(self, request, pk=None):
+    def partial_update(self, request, *args, **kwargs):
         """
         This method prevent use of patch method
         """
         raise MethodNotAllowed(method="PATCH")
 
-    def destroy(self, request, pk=None):
+    def destroy(self, request, *args, **kwargs):
         """
         This method prevent use of delete method
         """
         raise MethodNotAllowed(method="DELETE")
 
-    def cash_history(self, request):
+    def cash_history(self, request, *args, **kwargs):
         """
-        This method retrieve cash history transactions
+        This method retrieve the cash register balance at a date, read from
+        the running balance of the last log up to that date. The logs are
+        only listed, paginated, when include_logs is set.
 
         ...
         Params
-        - request: Date to filter data
+        - request: Date to filter data and include_logs flag
         """
-        registers = self.queryset.filter(
-            created_at__lte=request.data.get("date"))
-        serializer = self.serializer_class(registers, many=True)
-        total_amount = 0
-        for register in registers:
-            if register.transaction_type == "income":
-                total_amount += register.amount
-            else:
-                total_amount -= register.amount
-        return Response({
-            "total_amount": total_amount,
-            "logs": serializer.data
-        }, status=status_codes.HTTP_200_OK)
+        serializer = CashHistorySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        date = serializer.validated_data["date"]
+        data = {
+            "total_amount":
+            TransactionLog.objects.balance_at(self.register_id, date)
+        }
+        if serializer.validated_data["include_logs"]:
+            registers = self.get_queryset().filter(created_at__lte=date).order_by(
+                "created_at", "id")
+            paginator = TransactionLogCursorPagination()
+            page = paginator.paginate_queryset(registers, request, view=self)
+            data["logs"] = paginator.get_paginated_response(
+                TransactionLogReadSerializer(page, many=True).data).data
+        return Response(data, status=status_codes.HTTP_200_OK)
+
+    def summary(self, request, *args, **kwargs):
+        """
+        This method retrieve the income, outcome, payments and net total of
+        every hour or day in a date range, read from the summaries only
+
+        ...
+        Params
+        - request: from and to dates and granularity, "hour" or "day"
+          (default) query params
+        """
+        serializer = TransactionSummaryFilterSerializer(
+            data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        granularity = serializer.validated_data["granularity"]
+        summaries = TransactionSummary.objects.filter(
+            register_id=self.register_id,
+            granularity=granularity,
+            period_start__gte=period_start(serializer.validated_data["from"],
+                                           granularity),
+            period_start__lte=serializer.validated_data["to"]).order_by(
+                "period_start")
+        return Response(TransactionSummarySerializer(summaries, many=True).data,
+                        status=status_codes.HTTP_200_OK)
+
+    def export(self, request, *args, **kwargs):
+        """
+        This method stream all transaction logs as NDJSON or CSV, reading
+        them in chunks so memory use does not grow with the table
+
+        ...
+        Params
+        - request: output query param, "ndjson" (default) or "csv"
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in self.export_content_types:
+            return Response(
+                f"Unknown output, use one of {list(self.export_content_types)}.",
+                status=status_codes.HTTP_400_BAD_REQUEST)
+        rows = self.get_queryset().order_by("created_at", "id").values(
+            *TRANSACTION_LOG_FIELDS).iterator(
+                chunk_size=self.export_chunk_size)
+        if output == "csv":
+            content = transaction_logs_csv(rows)
+        else:
+            content = transaction_logs_ndjson(rows)
+        response = StreamingHttpResponse(
+            content, content_type=self.export_content_types[output])
+        response["Content-Disposition"] = (
+            f'attachment; filename="transaction-logs.{output}"')
+        return response
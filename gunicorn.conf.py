@@ -0,0 +1,47 @@
+"""
+Gunicorn settings of the production launch mode (see scripts/entrypoint.sh).
+
+Every value can be overridden with the GUNICORN_* environment variables.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Pre-fork workers sized from the CPU count: while a worker waits on the
+# database another one uses the CPU.
+workers = int(
+    os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+# Use uvicorn.workers.UvicornWorker with main.asgi:application for ASGI,
+# after installing uvicorn (see the ASGI section of the README).
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+
+# The sync workers serve every request from the same threads, so they can
+# keep their database connections open (DBCONNMAXAGE in
+# main/settings/base.py, read once the app is preloaded below).
+if worker_class in ("sync", "gthread") and not os.environ.get("DBCONNMAXAGE"):
+    os.environ["DBCONNMAXAGE"] = "60"
+
+# Import Django once in the master, so workers fork ready to serve.
+preload_app = True
+
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    """Load the denominations in the master, inherited by every worker."""
+    from cash_register.denominations import denomination_registry
+
+    denomination_registry.warm_up()
@@ -0,0 +1,27 @@
+"""
+ASGI config for main project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
+"""
+
+import os
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings.develop')
+
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """
+    Serve each request in its own thread-sensitive context, so the sync code
+    of concurrent requests (sync views, ORM queries) runs in one thread per
+    request instead of queueing on a single thread shared by the process.
+    """
+    async with ThreadSensitiveContext():
+        await django_application(scope, receive, send)
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cash_register.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,8 +52,41 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'cash_register.middleware.QueryBudgetMiddleware',
 ]
 
+# Raise instead of logging a warning when a request goes over the query
+# budget declared by its view. The test runner enables it.
+QUERY_BUDGET_RAISE = False
+
+# Send the queries run by each request in an X-Query-Count response
+# header, read by the load test (benchmarks/load.py).
+QUERY_COUNT_HEADER = os.environ.get('QUERYCOUNTHEADER', '') == 'True'
+
+TEST_RUNNER = 'cash_register.tests.runner.QueryBudgetTestRunner'
+
+# Seconds the response of a payment is kept for its Idempotency-Key, and
+# how many of them each process keeps in memory.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCYKEYTTL', 24 * 60 * 60))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCYCACHESIZE', 10000))
+
+# Change plans each process keeps in memory, 0 to calculate every change.
+CHANGE_PLAN_CACHE_SIZE = int(os.environ.get('CHANGEPLANCACHESIZE', 4096))
+
+# Register versions between two snapshots of a drawer, bounds the events
+# replayed to rebuild a past state.
+DRAWER_SNAPSHOT_INTERVAL = int(os.environ.get('DRAWERSNAPSHOTINTERVAL', 500))
+
+# Optimistic attempts of a change of available cash before it locks the
+# rows of the drawer in currency order, 0 to always lock them.
+CASH_UPDATE_RETRIES = int(os.environ.get('CASHUPDATERETRIES', 3))
+
+# Months of transaction logs kept in the database, older months are moved
+# to compressed files by the archive_transaction_logs command.
+TRANSACTION_LOG_HOT_MONTHS = int(os.environ.get('TRANSACTIONLOGHOTMONTHS', 12))
+TRANSACTION_LOG_ARCHIVE_DIR = os.environ.get(
+    'TRANSACTIONLOGARCHIVEDIR', os.path.join(BASE_DIR, 'archive'))
+
 ROOT_URLCONF = 'main.urls'
 
 TEMPLATES = [
@@ -73,6 +107,19 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'main.wsgi.application'
 
+# JSON is encoded and decoded with orjson when it is installed.
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'cash_register.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'cash_register.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -85,10 +132,27 @@ DATABASES = {
         'PASSWORD': os.environ.get('DBPASS', None),
         'HOST': os.environ.get('DBHOST', None),
         'PORT': os.environ.get('DBPORT', None),
-        'TIME_ZONE': os.environ.get('TIME_ZONE', 'America/Bogota')
+        'TIME_ZONE': os.environ.get('TIME_ZONE', 'America/Bogota'),
+        # Seconds a connection is reused across requests, 0 closes it at the
+        # end of every request. Only worth it with a fixed pool of threads,
+        # so gunicorn.conf.py defaults it to 60 for the sync workers only:
+        # runserver and main.asgi run each request in a new thread.
+        'CONN_MAX_AGE': int(os.environ.get('DBCONNMAXAGE') or 0),
+        # Check a reused connection still works before a request runs on it
+        # (see cash_register.db for Django < 4.1).
+        'CONN_HEALTH_CHECKS': os.environ.get('DBHEALTHCHECKS', '') != 'False',
+        'OPTIONS': {},
     }
 }
 
+# Connection pooling: "pgbouncer" when the database is reached through
+# PgBouncer in transaction mode (pgbouncer service of docker-compose.yml),
+# empty to connect directly.
+DB_POOL_MODE = os.environ.get('DBPOOLMODE', '')
+if DB_POOL_MODE == 'pgbouncer':
+    # Server side cursors do not survive transaction pooling.
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -2,12 +2,31 @@
 
 set -e
 
+# SERVER_MODE=production starts gunicorn (see gunicorn.conf.py), anything
+# else the development server.
+if [ "$SERVER_MODE" = "production" ]; then
+    # Check migrations and seed in the background so they never block
+    # boot. Migrations are applied by the release step, not on every start.
+    (
+        if python manage.py migrate --check; then
+            python manage.py seed
+            python manage.py create_transaction_log_partitions
+        else
+            echo "WARNING: unapplied migrations, run: python manage.py migrate" >&2
+        fi
+    ) &
+
+    exec gunicorn main.wsgi:application
+fi
+
 # Migrate database
 python manage.py migrate
 
-# Load default denomination currencies
-python manage.py loaddata currency_denomination_fixtures
-python manage.py loaddata available_cash_fixtures
+# Load default denomination currencies when not loaded yet
+python manage.py seed
+
+# Create the coming monthly transaction log partitions (PostgreSQL only)
+python manage.py create_transaction_log_partitions
 
 # Start Django app
-python manage.py runserver 127.0.0.1:8000
+exec python manage.py runserver 127.0.0.1:8000